@@ -1,36 +1,129 @@
+import argparse
+import glob
 import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.frame_parser import FrameParser
+from utils.hex_codec import to_hex
+from utils.log_follower import LogFollower
 
 # 设置文件路径
 logs_folder = "./logs"
 data_folder = "./data"
 output_filename = "data 01.txt"
 
-# 确保data文件夹存在
-os.makedirs(data_folder, exist_ok=True)
-
-# 日志文件名列表
-log_files = ["id 001.log", "id 002.log", "id 004.log", "id 008.log", "id 010.log", "id 014.log"]
-
-# 用于存储所有日志内容
-all_logs = []
-
-# 依次读取每个日志文件
-for log_file in log_files:
-    log_path = os.path.join(logs_folder, log_file)
-    if os.path.exists(log_path):
-        with open(log_path, "r", encoding="utf-8") as file:
-            lines = file.readlines()
-            for line in lines:
-                # 截取“- 接收 : ”之前的内容
-                if "- 接收 :" in line:
-                    clean_line = line.split("- 接收 :")[-1].strip()
-                    all_logs.append(clean_line)
-
-# 将结果写入到data 01.txt文件中
-output_path = os.path.join(data_folder, output_filename)
-with open(output_path, "w", encoding="utf-8") as output_file:
-    for log in all_logs:
-        output_file.write(log + "\n")
-
-# 输出完成提示
-output_path
+# 默认处理的日志文件（与原先写死的六个文件一致）
+default_pattern = os.path.join(logs_folder, "id *.log")
+
+# 日志行中接收数据的标记，之后的部分为十六进制数据
+receive_markers = ("- 接收 :", "- 接收 (HEX):")
+
+
+def extract_hex(line):
+    """截取日志行中接收标记之后的十六进制内容，不是接收日志时返回 None"""
+    for marker in receive_markers:
+        index = line.find(marker)
+        if index >= 0:
+            return line[index + len(marker):].strip()
+    return None
+
+
+def extract_file(log_path, output_path):
+    """逐行读取一个日志文件，把跨行的数据拼成完整帧并逐帧写出，返回 (帧数, 垃圾字节数)"""
+    parser = FrameParser()
+    frames = 0
+    with open(log_path, "r", encoding="utf-8", errors="replace") as file, \
+            open(output_path, "w", encoding="utf-8", buffering=1 << 20) as output_file:
+        for line in file:
+            hex_text = extract_hex(line)
+            if not hex_text:
+                continue
+            try:
+                data = bytes.fromhex(hex_text)
+            except ValueError:
+                continue
+            for frame in parser.feed(data):
+                output_file.write(to_hex(frame) + "\n")
+                frames += 1
+    parser.reset()
+    return frames, parser.garbage_bytes
+
+
+def follow(patterns, output, checkpoint, capture_dirs=(), interval=None):
+    """增量模式：只处理断点之后新增的日志内容，追加到输出文件
+
+    先写输出再保存断点；两者之间被中断时下次会重复输出这一批，不会漏帧。
+    interval 不为 None 时每隔 interval 秒重复一次，直到 Ctrl+C。
+    跟踪按 config/logging.json 轮转的日志时只需给出正在写的文件：轮转并压缩成 .gz 的旧段
+    会按断点接着读完，输入中的 .gz 文件被忽略；已被保留策略（keep_files 等）删除的段无法补读，
+    检查间隔应远小于轮转间隔。
+    """
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    follower = LogFollower(checkpoint, extract_hex)
+    try:
+        while True:
+            log_paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+            with open(output, "a", encoding="utf-8", buffering=1 << 20) as output_file:
+                counts = follower.poll(log_paths, lambda source, frame: output_file.write(to_hex(frame) + "\n"),
+                                       capture_dirs)
+            follower.save()
+            if counts['frames'] or counts['rotated'] or counts['truncated']:
+                print(f"新增 {counts['frames']} 帧（读取 {counts['bytes']} 字节，{counts['files']} 个文件，"
+                      f"轮转 {counts['rotated']}，截断 {counts['truncated']}），已追加到 {output}")
+            if interval is None:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="从接收日志中提取完整数据帧")
+    arg_parser.add_argument("inputs", nargs="*", default=[default_pattern], help="日志文件或通配符")
+    arg_parser.add_argument("-o", "--output", default=os.path.join(data_folder, output_filename), help="输出文件")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=None, help="并行进程数，默认为 CPU 核数")
+    arg_parser.add_argument("--follow", action="store_true",
+                            help="增量模式：只处理上次之后新增的内容并追加到输出文件；日志轮转后已压缩的 .gz 段"
+                                 "会按断点接着读完（输入中的 .gz 被忽略），已被保留策略删除的段无法补读")
+    arg_parser.add_argument("--checkpoint", default=None, help="增量模式的断点文件，默认为 <输出文件>.checkpoint")
+    arg_parser.add_argument("--capture", action="append", default=[], help="增量模式下同时跟踪的二进制采集目录，可重复")
+    arg_parser.add_argument("--interval", type=float, default=None, help="增量模式下每隔若干秒重复检查，默认只运行一次")
+    args = arg_parser.parse_args()
+
+    if args.follow:
+        follow(args.inputs, args.output, args.checkpoint or args.output + ".checkpoint", args.capture, args.interval)
+        return
+
+    log_paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    if not log_paths:
+        print("没有找到日志文件。")
+        return
+
+    # 确保输出文件夹存在
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+
+    # 每个文件由一个进程写到独立的临时文件，最后按文件顺序拼接
+    part_paths = [f"{args.output}.part{i}" for i in range(len(log_paths))]
+    try:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = list(executor.map(extract_file, log_paths, part_paths))
+
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            for part_path in part_paths:
+                with open(part_path, "r", encoding="utf-8") as part_file:
+                    shutil.copyfileobj(part_file, output_file, 1 << 20)
+    finally:
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    # 输出完成提示
+    for log_path, (frames, garbage) in zip(log_paths, results):
+        print(f"{log_path}: {frames} 帧，丢弃 {garbage} 字节")
+    print(f"已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
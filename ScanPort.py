@@ -1,3 +1,5 @@
+import argparse
+import json
 import serial
 import serial.tools.list_ports
 import threading
@@ -5,6 +7,14 @@ import platform
 import time
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.frame_decoder import decode_frame
+from utils.frame_parser import FrameParser
+from utils.hex_codec import LazyHex
+
+# 依次尝试的候选波特率
+DEFAULT_BAUDRATES = (9600, 115200, 19200, 38400, 57600, 4800)
 
 class Logger:
     @staticmethod
@@ -23,9 +33,16 @@ class Logger:
         )
 
 class ScanSerialDebugger:
-    def __init__(self):
-        self.serial_port = None
-        self.is_running = False
+    """并发扫描所有串口，并对每个串口依次尝试多个波特率
+
+    每个候选波特率按解析出的有效 A9 9A … 0D 0A 帧数量打分，
+    一旦某个波特率解析出 min_frames 个有效帧即认定该串口，不再尝试其它波特率。
+    """
+
+    def __init__(self, baudrates=DEFAULT_BAUDRATES, window=3.0, min_frames=2):
+        self.baudrates = list(baudrates)
+        self.window = window
+        self.min_frames = min_frames
         Logger.setup_logger()
 
     def list_ports(self):
@@ -38,50 +55,91 @@ class ScanSerialDebugger:
                 logging.info(f"{port.device}: {port.description}")
         return [port.device for port in ports]
 
-    def open_port(self, port_name, baudrate=9600):
-        """尝试打开串口"""
+    def probe(self, port_name, baudrate):
+        """以指定波特率监听 window 秒（或直到收到足够的有效帧），返回探测结果"""
+        result = {'baudrate': baudrate, 'frames': 0, 'garbage_bytes': 0, 'device_ids': []}
         try:
-            self.serial_port = serial.Serial(port_name, baudrate, timeout=1)
-            self.is_running = True
-            logging.info(f"已打开端口 {port_name}，波特率为 {baudrate}。")
-            return True
+            serial_port = serial.serial_for_url(port_name, baudrate, timeout=0.2)
         except Exception as e:
             logging.error(f"打开串口 {port_name} 失败: {e}")
-            return False
-
-    def read_from_port(self):
-        """从串口读取数据并记录到文件"""
-        buffer = bytearray()
-        start_time = time.time()
-        while self.is_running and (time.time() - start_time < 10):
-            if self.serial_port.in_waiting > 0:
-                try:
-                    data = self.serial_port.read(self.serial_port.in_waiting)
-                    buffer.extend(data)
-                    logging.info(f"接收 (HEX): {' '.join(f'{byte:02X}' for byte in data)}")
-                    return  # 一旦接收到数据，退出读取
-                except Exception as e:
-                    logging.error(f"读取串口数据时出错: {e}")
-
-    def start(self):
-        """启动串口轮询"""
-        available_ports = self.list_ports()
-        if not available_ports:
+            result['error'] = str(e)
+            return result
+
+        parser = FrameParser()
+        device_ids = set()
+        deadline = time.monotonic() + self.window
+        try:
+            while time.monotonic() < deadline and result['frames'] < self.min_frames:
+                # 阻塞读，最多等待一个超时周期，不再忙等 in_waiting
+                _, frames = parser.fill_from(serial_port, max(1, serial_port.in_waiting))
+                for frame in frames:
+                    decoded = decode_frame(frame)
+                    if decoded is not None:
+                        logging.info("%s@%s 接收 (HEX): %s", port_name, baudrate, LazyHex(frame))
+                        result['frames'] += 1
+                        device_ids.add(decoded.device_id)
+        except Exception as e:
+            logging.error(f"读取串口 {port_name} 数据时出错: {e}")
+            result['error'] = str(e)
+        finally:
+            serial_port.close()
+        result['garbage_bytes'] = parser.garbage_bytes
+        result['device_ids'] = sorted(device_ids)
+        return result
+
+    def scan_port(self, port_name):
+        """依次尝试各个波特率，返回得分最高的结果"""
+        best = None
+        for baudrate in self.baudrates:
+            result = self.probe(port_name, baudrate)
+            logging.info(f"{port_name}@{baudrate}: {result['frames']} 个有效帧，垃圾字节 {result['garbage_bytes']}")
+            if best is None or (result['frames'], -result['garbage_bytes']) > (best['frames'], -best['garbage_bytes']):
+                best = result
+            # 已经识别，或者串口本身打不开/读出错，都没有必要再试其它波特率
+            if result['frames'] >= self.min_frames or 'error' in result:
+                break
+        best = dict(best)
+        best['port'] = port_name
+        best['classified'] = best['frames'] >= self.min_frames
+        return best
+
+    def start(self, ports=None):
+        """并发扫描所有串口，全部完成后返回 端口 -> 结果 的映射"""
+        ports = ports or self.list_ports()
+        if not ports:
             logging.warning("未发现可用的串口。")
-            return
+            return {}
+
+        port_map = {}
+        with ThreadPoolExecutor(max_workers=len(ports)) as executor:
+            futures = {executor.submit(self.scan_port, port_name): port_name for port_name in ports}
+            for future in as_completed(futures):
+                result = future.result()
+                port_map[result['port']] = {
+                    'baudrate': result['baudrate'] if result['classified'] else None,
+                    'device_ids': result['device_ids'],
+                    'frames': result['frames'],
+                    'classified': result['classified'],
+                }
+        return dict(sorted(port_map.items()))
+
 
-        for port_name in available_ports:
-            if self.open_port(port_name):
-                self.read_from_port()
-                self.close_port()
+def main():
+    parser = argparse.ArgumentParser(description="并发扫描串口并自动识别波特率")
+    parser.add_argument('ports', nargs='*', help="要扫描的串口，默认扫描全部")
+    parser.add_argument('-b', '--baudrates', default=','.join(map(str, DEFAULT_BAUDRATES)),
+                        help="候选波特率，逗号分隔")
+    parser.add_argument('-w', '--window', type=float, default=3.0, help="每个波特率的监听时长（秒）")
+    parser.add_argument('-o', '--output', default=None, help="把结果写入 JSON 文件")
+    args = parser.parse_args()
 
-    def close_port(self):
-        """关闭当前打开的串口"""
-        if self.serial_port and self.serial_port.is_open:
-            self.is_running = False
-            self.serial_port.close()
-            logging.info("已关闭串口。")
+    debugger = ScanSerialDebugger([int(b) for b in args.baudrates.split(',')], window=args.window)
+    port_map = debugger.start(args.ports)
+    text = json.dumps(port_map, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
 
 if __name__ == "__main__":
-    debugger = ScanSerialDebugger()
-    debugger.start()
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import glob
+import json
+import os
+import time
+
+from utils.batch_analysis import analyze, summarize, summarize_streams
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程批量分析历史日志：按文件统计丢包，按设备统计帧数和数值")
+    parser.add_argument('inputs', nargs='*', default=[os.path.join('logs', 'id *.log')],
+                        help="日志文件或通配符（文本日志、.gz 压缩日志、.bin/.raw 二进制帧流）")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="并行进程数，默认为 CPU 核数")
+    parser.add_argument('--chunk-mb', type=float, default=None, help="每块大小（MB），默认按进程数自动选择")
+    parser.add_argument('-o', '--output', help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    if not paths:
+        print("没有找到日志文件。")
+        return
+
+    start = time.perf_counter()
+    chunk_bytes = int(args.chunk_mb * 1024 * 1024) if args.chunk_mb else None
+    totals, streams, devices = analyze(paths, args.jobs, chunk_bytes)
+    elapsed = time.perf_counter() - start
+    stream_summary = summarize_streams(streams)
+    summary = summarize(devices)
+
+    # 数据编号由端口上的网关统一递增，丢包按文件（端口）统计
+    for path, item in stream_summary.items():
+        print(f"{path}: {item['received']} 帧，丢失 {item['missing']}，重复 {item['duplicates']}，"
+              f"乱序 {item['reordered']}，重启 {item['resets']}，丢包率 {item['loss_rate']:.4%}，"
+              f"{len(item['devices'])} 个设备")
+    for device_id, item in summary.items():
+        print(f"设备 {device_id}: {item['frames']} 帧，{item['first_time']} ~ {item['last_time']}")
+        for name, value in item['values'].items():
+            print(f"    {name:12s} 均值 {value['mean']:12.2f}  标准差 {value['std']:10.2f}  "
+                  f"最小 {value['min']:12.0f}  最大 {value['max']:12.0f}")
+    print(f"{totals['files']} 个文件 / {totals['chunks']} 块，{totals['frames']} 帧（格式异常 {totals['invalid']}），"
+          f"丢弃 {totals['garbage_bytes']} 字节；用时 {elapsed:.2f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'totals': totals,
+                       'files': {path: dict(item, devices={str(k): v for k, v in item['devices'].items()})
+                                 for path, item in stream_summary.items()},
+                       'devices': {str(k): v for k, v in summary.items()}},
+                      f, ensure_ascii=False, indent=2)
+        print(f"已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""批量分析的多进程扩展性：同一批合成日志分别用 1..N 个进程分析，比较吞吐量并校验结果一致
+
+用法: python benchmarks/bench_batch_analysis.py [-n 帧数] [-f 文件数] [--jobs 1,2,4] [--format log|raw]
+在临时目录中运行。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.batch_analysis import analyze, analyze_chunk, merge_results  # noqa: E402
+from utils.frame_generator import FrameGenerator  # noqa: E402
+
+
+def make_inputs(workdir, count, files, fmt):
+    """每个文件模拟一个端口的日志，带少量丢包、重复和损坏帧"""
+    paths = []
+    for i in range(files):
+        path = os.path.join(workdir, f"id {i + 1:03d}.{'log' if fmt == 'log' else 'bin'}")
+        generator = FrameGenerator(devices=50, base_device_id=0x253A0000 + i * 1000, seed=i,
+                                   gap=0.001, duplicate=0.001, corrupt=0.0005)
+        generator.write_file(path, count // files, fmt)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量分析基准测试")
+    parser.add_argument('-n', '--count', type=int, default=1000000, help="总帧数")
+    parser.add_argument('-f', '--files', type=int, default=2, help="文件数")
+    parser.add_argument('--jobs', default=None, help="逗号分隔的进程数列表，默认 1 到 CPU 核数的 2 的幂")
+    parser.add_argument('--format', choices=('log', 'raw'), default='log', help="输入格式")
+    args = parser.parse_args()
+    cpus = os.cpu_count() or 1
+    jobs_list = ([int(x) for x in args.jobs.split(',')] if args.jobs
+                 else sorted({min(2 ** i, cpus) for i in range(cpus.bit_length() + 1)}))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = make_inputs(workdir, args.count, args.files, args.format)
+        size = sum(os.path.getsize(path) for path in paths)
+        # 基准结果：每个文件整体一块，单进程
+        reference = merge_results([analyze_chunk(path, 0, os.path.getsize(path)) for path in paths])
+
+        print(f"{args.files} 个文件，{size / 1e6:.1f} MB，{reference[0]['frames']} 帧，CPU 核数 {cpus}")
+        base = None
+        for jobs in jobs_list:
+            start = time.perf_counter()
+            totals, streams, devices = analyze(paths, jobs)
+            elapsed = time.perf_counter() - start
+            base = base or elapsed
+            same = totals['frames'] == reference[0]['frames'] and all(
+                streams[p][key] == reference[1][p][key]
+                for p in reference[1] for key in ('frames', 'received', 'missing', 'duplicates', 'reordered',
+                                                  'device_frames')) and all(
+                devices[d]['frames'] == reference[2][d]['frames'] for d in reference[2])
+            print(f"{jobs:3d} 进程 {totals['chunks']:4d} 块：{size / elapsed / 1e6:8.1f} MB/s，"
+                  f"{totals['frames'] / elapsed:10.0f} 帧/s，加速 {base / elapsed:5.2f}x，"
+                  f"结果{'一致' if same else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
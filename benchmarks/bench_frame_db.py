@@ -0,0 +1,74 @@
+"""帧数据库的批量写入速率和按设备、时间范围查询的延迟
+
+用法: python benchmarks/bench_frame_db.py [-n 帧数] [-d 设备数] [-q 查询次数] [--keep 数据库路径]
+默认在临时目录中运行。
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.frame_db import FrameDB  # noqa: E402
+from utils.frame_generator import FrameGenerator  # noqa: E402
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(path, count, devices, queries, batch_size):
+    generator = FrameGenerator(devices=devices, seed=1)
+    insert_time = 0.0
+    with FrameDB(path) as db:
+        recv = time.time()
+        for batch in generator.iter_batches(count, batch_size):
+            records = [(recv, 1, frame) for frame in generator.split(batch)]
+            start = time.perf_counter()
+            db.insert(records)
+            insert_time += time.perf_counter() - start
+        inserted = db.inserted
+
+    span = count // devices  # 每个设备的帧数，即覆盖的秒数
+    first = generator.start.astype('datetime64[s]').item()
+    latencies = []
+    returned = 0
+    with FrameDB(path, readonly=True) as db:
+        for _ in range(queries):
+            device_id = generator.base_device_id + random.randrange(devices)
+            start_at = first + timedelta(seconds=random.randrange(max(1, span - 600)))
+            start = time.perf_counter()
+            rows = db.query(device_id, start_at, start_at + timedelta(minutes=10))
+            latencies.append(time.perf_counter() - start)
+            returned += len(rows)
+    return inserted, insert_time, latencies, returned
+
+
+def main():
+    parser = argparse.ArgumentParser(description="帧数据库基准测试")
+    parser.add_argument('-n', '--count', type=int, default=1000000, help="写入的帧数")
+    parser.add_argument('-d', '--devices', type=int, default=100, help="设备数")
+    parser.add_argument('-q', '--queries', type=int, default=200, help="查询次数（每次 10 分钟范围）")
+    parser.add_argument('-b', '--batch-size', type=int, default=1000, help="每批写入的帧数")
+    parser.add_argument('--keep', help="数据库路径（保留），默认写入临时目录")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = args.keep or os.path.join(workdir, 'frames.db')
+        inserted, insert_time, latencies, returned = run(path, args.count, args.devices, args.queries,
+                                                         args.batch_size)
+        size = os.path.getsize(path)
+
+    print(f"写入 {inserted} 帧，每批 {args.batch_size}：{inserted / insert_time:12.0f} 帧/s，"
+          f"数据库 {size / inserted:.1f} 字节/帧")
+    print(f"{args.queries} 次 10 分钟范围查询，平均返回 {returned / args.queries:.0f} 帧："
+          f"中位数 {percentile(latencies, 0.5) * 1000:.2f} ms，p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
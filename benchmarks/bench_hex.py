@@ -0,0 +1,68 @@
+"""对比逐帧十六进制格式化的几种写法，以及日志级别关闭时延迟渲染的开销
+
+用法: python benchmarks/bench_hex.py [-n 帧数]
+在临时目录中运行，不会写入项目的 logs 目录。
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hex_codec import LazyHex, to_hex, to_hex_table  # noqa: E402
+from utils.logger import Logger  # noqa: E402
+
+SAMPLE_FRAME = bytes.fromhex(
+    'A99A34253ACEB82C0000DEF22C182D092D19200F3A343A142C47FD2C00002C00000000'
+    '2C000000002C000000002C000000000D0A'
+)
+
+
+def per_frame_ns(func, count):
+    return min(timeit.repeat(func, number=count, repeat=3)) / count * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="十六进制格式化基准测试")
+    parser.add_argument('-n', '--count', type=int, default=200000, help="每项的帧数")
+    args = parser.parse_args()
+    frame = SAMPLE_FRAME
+    assert to_hex(frame) == to_hex_table(frame) == ' '.join(f'{byte:02X}' for byte in frame)
+
+    results = [
+        ("逐字节 f'{:02X}' + join", lambda: ' '.join(f'{byte:02X}' for byte in frame)),
+        ("查表 join", lambda: to_hex_table(frame)),
+        ("to_hex (bytes.hex)", lambda: to_hex(frame)),
+    ]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        Logger.setup_logger()
+        root = logging.getLogger()
+        # 模拟调试日志关闭：原来的 f-string 仍会渲染，LazyHex 不会
+        root.setLevel(logging.INFO)
+        results += [
+            ("debug 关闭 + f-string", lambda: Logger.debug(f"发送到 COM4 的数据: {frame.hex(' ')}")),
+            ("debug 关闭 + LazyHex", lambda: Logger.debug("发送到 %s 的数据: %s", 'COM4', LazyHex(frame))),
+        ]
+        # 写入 app.log 和 send_data.log 两个处理器
+        count = min(args.count, 50000)
+        file_results = [
+            ("info 写文件 + 逐字节 join",
+             lambda: Logger.info("接收 : " + ' '.join(f'{byte:02X}' for byte in frame))),
+            ("info 写文件 + LazyHex", lambda: Logger.info("%s%s", "接收 : ", LazyHex(frame))),
+        ]
+
+        print(f"帧长 {len(frame)} 字节，每项 {args.count} 帧（写文件 {count} 帧），取 3 次最小值")
+        for name, func in results:
+            print(f"{name:28s} {per_frame_ns(func, args.count):10.0f} ns/帧")
+        for name, func in file_results:
+            print(f"{name:28s} {per_frame_ns(func, count):10.0f} ns/帧")
+        logging.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""对比同步日志与异步批量日志管道的接收帧吞吐量
+
+用法: python benchmarks/bench_logging.py [-n 帧数]
+在临时目录中运行，不会写入项目的 logs 目录。
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import Logger  # noqa: E402
+
+SAMPLE_FRAME = bytes.fromhex(
+    'A99A34253ACEB82C0000DEF22C182D092D19200F3A343A142C47FD2C00002C00000000'
+    '2C000000002C000000002C000000000D0A'
+)
+
+
+def bench_sync(count):
+    start = time.perf_counter()
+    for _ in range(count):
+        Logger.receive(SAMPLE_FRAME)
+    return time.perf_counter() - start
+
+
+def bench_async(count):
+    pipeline = Logger.start_receive_pipeline(queue_size=count + 1)
+    start = time.perf_counter()
+    for _ in range(count):
+        Logger.receive(SAMPLE_FRAME)
+    enqueue_time = time.perf_counter() - start
+    Logger.stop_receive_pipeline()
+    total_time = time.perf_counter() - start
+    return enqueue_time, total_time, pipeline.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="接收日志吞吐量基准测试")
+    parser.add_argument('-n', '--count', type=int, default=100000, help="帧数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        Logger.setup_logger()
+
+        sync_time = bench_sync(args.count)
+        enqueue_time, total_time, stats = bench_async(args.count)
+        logging.shutdown()
+
+    print(f"帧数: {args.count}")
+    print(f"同步 Logger.info:        {args.count / sync_time:12.0f} 帧/s")
+    print(f"异步管道（读线程入队）:  {args.count / enqueue_time:12.0f} 帧/s")
+    print(f"异步管道（含后台写出）:  {args.count / total_time:12.0f} 帧/s")
+    print(f"管道统计: {stats}")
+
+
+if __name__ == "__main__":
+    main()
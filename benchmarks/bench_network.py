@@ -0,0 +1,104 @@
+"""网络接收的本地回环测试：大量并发 TCP 客户端（可选 UDP）向 NetworkIngest 发送合成帧
+
+用法: python benchmarks/bench_network.py [-c 连接数] [-n 每连接帧数] [--udp]
+在临时目录中运行，经过真实的接收日志管道；结束时核对收到的帧数与发送的帧数一致。
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from network_service import NetworkService  # noqa: E402
+from utils.frame_generator import FrameGenerator  # noqa: E402
+from utils.logger import Logger  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+async def tcp_client(port, payload, chunk):
+    _, writer = await asyncio.open_connection('127.0.0.1', port)
+    for start in range(0, len(payload), chunk):
+        writer.write(payload[start:start + chunk])
+        await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+class UdpClient(asyncio.DatagramProtocol):
+    pass
+
+
+async def udp_client(port, payload, chunk, interval):
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+        UdpClient, remote_addr=('127.0.0.1', port))
+    for start in range(0, len(payload), chunk):
+        transport.sendto(payload[start:start + chunk])
+        # UDP 没有流控，按间隔发送以免服务端接收缓冲区溢出
+        await asyncio.sleep(interval)
+    transport.close()
+
+
+async def run(args):
+    service = NetworkService(host='127.0.0.1', tcp_port=0, udp_port=0 if args.udp else None)
+    ingest = service.ingest
+    Logger.setup_logger()
+    pipeline = Logger.start_receive_pipeline(queue_size=args.connections * args.frames + 1)
+    await ingest.start()
+
+    # 每个连接模拟一台 DTU，各自一个设备编号
+    payloads = [FrameGenerator(devices=1, base_device_id=0x253A0000 + i, seed=i).generate(args.frames).data
+                for i in range(args.connections)]
+    expected = args.connections * args.frames
+
+    start = time.perf_counter()
+    if args.udp:
+        # 帧大小 52 字节，按整帧切分数据报
+        await asyncio.gather(*(udp_client(ingest.udp_port, payload, 52 * 20, args.udp_interval) for payload in payloads))
+    else:
+        await asyncio.gather(*(tcp_client(ingest.tcp_port, payload, args.chunk) for payload in payloads))
+    while ingest.frames < expected and time.perf_counter() - start < args.timeout:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    await ingest.stop()
+    Logger.stop_receive_pipeline()
+    stats = ingest.stats()
+    print(f"连接 {args.connections}，发送 {expected} 帧，收到 {stats['frames']} 帧，用时 {elapsed:.2f}s，"
+          f"{stats['frames'] / elapsed:.0f} 帧/s，暂停读取 {stats['pause_events']} 次，垃圾字节 {stats['garbage_bytes']}")
+    print(f"日志管道: {pipeline.stats()}")
+    print(f"数据编号统计: {service.sequences.totals()}")
+    return stats['frames'] == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="网络接收回环测试")
+    parser.add_argument('-c', '--connections', type=int, default=1000, help="并发连接数")
+    parser.add_argument('-n', '--frames', type=int, default=100, help="每个连接发送的帧数")
+    parser.add_argument('--chunk', type=int, default=100, help="TCP 每次写入的字节数（故意不按帧对齐）")
+    parser.add_argument('--udp', action='store_true', help="改用 UDP 发送")
+    parser.add_argument('--udp-interval', type=float, default=0.02, help="每个 UDP 客户端发送数据报的间隔（秒）")
+    parser.add_argument('--timeout', type=float, default=30, help="等待全部帧到达的超时（秒）")
+    args = parser.parse_args()
+
+    # 每个连接占用两个文件描述符（客户端和服务端）
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = min(hard, args.connections * 2 + 256)
+        if soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        ok = asyncio.run(run(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""基于虚拟串口的可复现基准测试
+
+用法: python benchmarks/bench_suite.py [-n 帧数] [-r 帧/秒] [-t pty|loop] [-o 结果.json] [--baseline 旧结果.json]
+
+不需要 RS485 硬件：在 Linux/macOS 上用 pty 对模拟串口，其他平台用 pyserial 的 loop://。
+把 main.py、onlyRecive.py、send2DTU.py 中的 SerialDebugger 打开的端口名映射到虚拟串口，
+按设定速率灌入合成的 A9 9A 帧，测量接收、转发、回放路径；另外对 Analyzed.py 和 compare.py
+的离线处理计时。每个场景在独立子进程中运行，分别报告吞吐量、p50/p99 延迟、CPU 占用率和峰值内存。
+结果写入 JSON，指定 --baseline 时与上一次结果比较；吞吐量下降超过阈值，或任一场景出现读写、
+转发错误（errors、relay_errors 非零）时返回非零退出码。
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import select
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial  # noqa: E402
+
+from utils.frame_decoder import FRAME_LEN, encode_frame  # noqa: E402
+from utils.metrics import METRICS  # noqa: E402
+from utils.replay import ReplayEngine, percentile  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INPUT_PORT = 'BENCH_IN'
+RELAY_PORT = 'COM4'
+
+
+def make_frames(count, devices=8, start=datetime(2024, 9, 25, 15, 52, 20)):
+    """合成帧：第 i 帧的数据编号为 i，设备编号轮换，便于接收端按编号算延迟"""
+    return [encode_frame(0x253ACEB8 + i % devices, i, start + timedelta(seconds=i // devices),
+                         0x4800 + i % 256, i % 100 - 50, (i, -i, i * 3, 0))
+            for i in range(count)]
+
+
+class VirtualPort:
+    """虚拟串口的一端交给被测程序打开（url），另一端（peer）由基准测试读写"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.port = None
+        if transport == 'pty':
+            import tty
+            self.master, self.slave = os.openpty()
+            tty.setraw(self.slave)
+            self.url = os.ttyname(self.slave)
+        else:
+            self.master = self.slave = None
+            self.url = 'loop://'
+
+    def write(self, data):
+        if self.master is None:
+            return self.port.write(data)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.master, view):]
+        return len(data)
+
+    def read(self, size=65536, timeout=0.2):
+        if self.master is None:
+            return self.port.read(min(size, max(1, self.port.in_waiting)))
+        if select.select([self.master], [], [], timeout)[0]:
+            return os.read(self.master, size)
+        return b''
+
+    def close(self):
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                os.close(fd)
+
+
+class TimedWriter:
+    """记录每一帧写出的时刻（按数据编号，即帧序号）"""
+
+    def __init__(self, peer):
+        self.peer = peer
+        self.sent_at = array('d')
+
+    def write(self, data):
+        now = time.perf_counter()
+        self.sent_at.extend([now] * (len(data) // FRAME_LEN))
+        return self.peer.write(data)
+
+
+class Drain:
+    """后台持续读空 peer，避免被测程序写满缓冲区；同时统计收到的字节数"""
+
+    def __init__(self, peer):
+        self.peer = peer
+        self.bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.bytes += len(self.peer.read())
+            except (OSError, serial.SerialException):
+                break
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+@contextlib.contextmanager
+def virtual_serial(transport, names):
+    """把 serial.Serial(端口名, ...) 重定向到虚拟串口，被测代码无需改动"""
+    ports = {name: VirtualPort(transport) for name in names}
+    real_serial = serial.Serial
+
+    def open_virtual(name, *args, **kwargs):
+        virtual = ports.get(name)
+        if virtual is None:
+            return real_serial(name, *args, **kwargs)
+        if virtual.transport == 'loop':
+            virtual.port = serial.serial_for_url(virtual.url, *args, **kwargs)
+        else:
+            virtual.port = real_serial(virtual.url, *args, **kwargs)
+        return virtual.port
+
+    serial.Serial = open_virtual
+    try:
+        yield ports
+    finally:
+        serial.Serial = real_serial
+        for virtual in ports.values():
+            virtual.close()
+
+
+def latency_summary(latencies):
+    values = sorted(latencies)
+    return {
+        'latency_p50_ms': percentile(values, 0.50) * 1000,
+        'latency_p99_ms': percentile(values, 0.99) * 1000,
+        'latency_max_ms': (values[-1] if values else 0.0) * 1000,
+    }
+
+
+def wait_until(predicate, idle_timeout=3.0, progress=lambda: 0):
+    """等待 predicate 成立；进度（progress 的返回值）idle_timeout 秒不变时放弃"""
+    last, last_change = progress(), time.monotonic()
+    while not predicate():
+        time.sleep(0.01)
+        current = progress()
+        if current != last:
+            last, last_change = current, time.monotonic()
+        elif time.monotonic() - last_change > idle_timeout:
+            return False
+    return True
+
+
+def bench_receive(module_name, args):
+    """驱动 main.py / onlyRecive.py 的 SerialDebugger：接收 → 解析 → 遥测 → 日志（→ 转发）"""
+    module = __import__(module_name)
+    frames = make_frames(args.frames, args.devices)
+    names = [INPUT_PORT, RELAY_PORT] if hasattr(module.SerialDebugger, 'open_com4_port') else [INPUT_PORT]
+    with virtual_serial(args.transport, names) as ports:
+        debugger = module.SerialDebugger()
+        received_at = array('d', bytes(8 * len(frames)))
+        received = [0]
+        handle_frames = debugger.handle_frames
+
+        def timed_handle_frames(batch):
+            seqs = [int.from_bytes(frame[8:12], 'big') for frame in batch]
+            handle_frames(batch)
+            now = time.perf_counter()
+            for seq in seqs:
+                received_at[seq] = now
+            received[0] += len(seqs)
+
+        debugger.handle_frames = timed_handle_frames
+        debugger.open_port(INPUT_PORT, args.baudrate)
+        drain = None
+        if RELAY_PORT in ports:
+            debugger.open_com4_port(args.baudrate)
+            drain = Drain(ports[RELAY_PORT])
+
+        writer = TimedWriter(ports[INPUT_PORT])
+        start = time.perf_counter()
+        sender = ReplayEngine(frames, rate=args.rate or None).run(writer)
+        complete = wait_until(lambda: received[0] >= len(frames), progress=lambda: received[0])
+        elapsed = time.perf_counter() - start
+        if drain is not None:
+            wait_until(lambda: drain.bytes >= received[0] * FRAME_LEN, progress=lambda: drain.bytes)
+        relay = getattr(debugger, 'relay', None)
+        debugger.close_ports()
+        if drain is not None:
+            drain.stop()
+
+    count = received[0]
+    latencies = [received_at[i] - writer.sent_at[i] for i in range(min(len(frames), len(writer.sent_at)))
+                 if received_at[i]]
+    result = {
+        'frames_sent': sender['frames'],
+        'frames_received': count,
+        'complete': complete,
+        'throughput_fps': count / elapsed if elapsed else 0.0,
+        'throughput_mbps': count * FRAME_LEN / elapsed / 1e6 if elapsed else 0.0,
+        'sender_lateness_p99_ms': sender['lateness_p99_ms'],
+    }
+    result.update(latency_summary(latencies))
+    if relay is not None:
+        result['relay_forwarded_bytes'] = drain.bytes
+        result['relay_latency_p50_ms'] = relay.end_to_end.percentile(0.50) * 1000
+        result['relay_latency_p99_ms'] = relay.end_to_end.percentile(0.99) * 1000
+        result['relay_dropped'] = relay.dropped
+        result['relay_errors'] = relay.errors
+    return result
+
+
+def bench_replay(args):
+    """驱动 send2DTU.py 的 SerialDebugger：按速率同时回放到两个端口"""
+    import send2DTU
+    frames = make_frames(args.frames, args.devices)
+    with virtual_serial(args.transport, [INPUT_PORT, RELAY_PORT]) as ports:
+        debugger = send2DTU.SerialDebugger()
+        debugger.open_port(INPUT_PORT, args.baudrate)
+        debugger.open_COM4_port(args.baudrate)
+        drains = [Drain(ports[RELAY_PORT])]
+        if args.transport == 'pty':
+            drains.append(Drain(ports[INPUT_PORT]))
+        debugger.data_buffer = frames
+        stats = debugger.send_data_from_buffer(args.rate or None)
+        wait_until(lambda: drains[0].bytes >= len(frames) * FRAME_LEN, progress=lambda: drains[0].bytes)
+        debugger.close_ports()
+        for drain in drains:
+            drain.stop()
+    elapsed = stats['elapsed_s']
+    return {
+        'frames_sent': stats['frames'],
+        'write_calls': stats['write_calls'],
+        'throughput_fps': stats['frames'] / elapsed if elapsed else 0.0,
+        'throughput_mbps': stats['bytes'] / elapsed / 1e6 if elapsed else 0.0,
+        'target_rate': stats['target_rate'],
+        'latency_p50_ms': stats['lateness_p50_ms'],
+        'latency_p99_ms': stats['lateness_p99_ms'],
+        'latency_max_ms': stats['lateness_max_ms'],
+        'jitter_ms': stats['jitter_ms'],
+    }
+
+
+def write_synthetic_log(path, frames, split=20):
+    """与串口接收日志格式一致，每帧拆成两行以覆盖跨行拼帧"""
+    base = time.time()
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, frame in enumerate(frames):
+            ts = base + i * 0.001
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)) + f",{int(ts * 1000) % 1000:03d}"
+            f.write(f"{stamp} - 接收 : {frame[:split].hex(' ').upper()}\n")
+            f.write(f"{stamp} - 接收 : {frame[split:].hex(' ').upper()}\n")
+
+
+def bench_analyze(args):
+    """Analyzed.py：从多个接收日志中提取完整帧（多进程）"""
+    import Analyzed
+    frames = make_frames(args.analysis_frames, args.devices)
+    files = 4
+    paths = [os.path.join('logs', f'id {i:03d}.log') for i in range(files)]
+    os.makedirs('logs', exist_ok=True)
+    for i, path in enumerate(paths):
+        write_synthetic_log(path, frames[i::files])
+    input_bytes = sum(os.path.getsize(path) for path in paths)
+    output = os.path.join('data', 'data 01.txt')
+
+    sys.argv = ['Analyzed.py', '-o', output] + paths
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        Analyzed.main()
+    elapsed = time.perf_counter() - start
+    with open(output, 'r', encoding='utf-8') as f:
+        extracted = sum(1 for _ in f)
+    return {
+        'frames_in': len(frames),
+        'frames_extracted': extracted,
+        'input_mb': input_bytes / 1e6,
+        'elapsed_s': elapsed,
+        'throughput_fps': extracted / elapsed,
+        'throughput_mbps': input_bytes / elapsed / 1e6,
+    }
+
+
+def bench_compare(args):
+    """compare.py：Excel 导出与日志解析结果对账，分别测冷启动（解析 Excel）和命中缓存"""
+    import compare
+    from openpyxl import Workbook
+    frames = make_frames(args.analysis_frames, args.devices)
+    excel_path, txt_path = 'bench.xlsx', 'bench.txt'
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(['a', 'b', 'c', 'data'])
+    for i, frame in enumerate(frames):
+        if i % 1000 != 7:  # 少量缺失，让对账走完整的差异路径
+            ws.append([i, None, None, '00' + frame.hex().upper()[2:]])
+    wb.save(excel_path)
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        for frame in frames:
+            f.write(frame.hex(' ').upper() + '\n')  # 与 Analyzed.py 的输出格式相同
+
+    timings = {}
+    for label in ('cold', 'cached'):
+        start = time.perf_counter()
+        excel_data = compare.read_excel_data(excel_path)
+        txt_data = compare.read_txt_data(txt_path)
+        result = compare.reconcile(excel_data, txt_data)
+        timings[label] = time.perf_counter() - start
+    return {
+        'rows': len(excel_data),
+        'frames': len(txt_data),
+        'missing': len(result['missing']),
+        'elapsed_cold_s': timings['cold'],
+        'elapsed_cached_s': timings['cached'],
+        'throughput_fps': len(txt_data) / timings['cold'],
+        'throughput_cached_fps': len(txt_data) / timings['cached'],
+    }
+
+
+SCENARIOS = {
+    'receive_main': lambda args: bench_receive('main', args),
+    'receive_only': lambda args: bench_receive('onlyRecive', args),
+    'replay_send2dtu': bench_replay,
+    'analyze': bench_analyze,
+    'compare': bench_compare,
+}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_scenario(name, args):
+    """在子进程中运行：切换到临时目录，日志等输出都不会落到项目目录"""
+    os.chdir(args.workdir)
+    # 打开指标只为统计读、写、转发和回调中的错误次数，开销只是每次事件一次字典更新
+    METRICS.enable()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    result = SCENARIOS[name](args)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu += children.ru_utime + children.ru_stime
+    result['wall_s'] = wall
+    result['cpu_percent'] = cpu / wall * 100 if wall else 0.0
+    result['peak_rss_mb'] = peak_rss_mb()
+    counters = METRICS.collect()[0]
+    result['errors'] = sum(value for (metric, _), value in counters.items() if metric == 'errors')
+    return result
+
+
+def failed_scenarios(results):
+    """运行中出现读写、转发或回调错误的场景"""
+    return [name for name, result in results.items()
+            if result.get('errors') or result.get('relay_errors')]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_baseline(results, baseline_path, threshold):
+    """吞吐量比基线下降超过 threshold（比例）的场景视为退化，返回退化列表"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name, {}).get('throughput_fps')
+        new = result.get('throughput_fps')
+        if not old or new is None:
+            continue
+        change = new / old - 1
+        print(f"{name:18s} 吞吐量 {old:12.0f} -> {new:12.0f} 帧/s ({change:+.1%})")
+        if change < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    default_transport = 'pty' if os.name == 'posix' else 'loop'
+    parser = argparse.ArgumentParser(description="虚拟串口基准测试")
+    parser.add_argument('-n', '--frames', type=int, default=10000, help="串口场景的帧数")
+    parser.add_argument('-r', '--rate', type=float, default=2000, help="发送速率（帧/秒），0 表示不限速")
+    parser.add_argument('-t', '--transport', choices=('pty', 'loop'), default=default_transport, help="虚拟串口类型")
+    parser.add_argument('-b', '--baudrate', type=int, default=115200, help="打开端口时使用的波特率")
+    parser.add_argument('--devices', type=int, default=8, help="合成帧中的设备数")
+    parser.add_argument('--analysis-frames', type=int, default=100000, help="Analyzed/compare 场景的帧数")
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS), help="只运行指定场景，可重复")
+    parser.add_argument('-o', '--output', default='bench_results.json', help="结果 JSON 文件")
+    parser.add_argument('--baseline', help="与之比较的历史结果 JSON")
+    parser.add_argument('--threshold', type=float, default=0.10, help="判定退化的吞吐量下降比例")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for name in args.scenario or list(SCENARIOS):
+        with tempfile.TemporaryDirectory() as workdir:
+            args.workdir = workdir
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[name] = executor.submit(run_scenario, name, args).result()
+        print(f"{name:18s} {json.dumps(results[name], ensure_ascii=False)}")
+
+    report = {
+        'meta': {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'transport': args.transport,
+            'frames': args.frames,
+            'rate': args.rate,
+            'analysis_frames': args.analysis_frames,
+        },
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {output}")
+
+    failed = failed_scenarios(results)
+    if failed:
+        print(f"运行中出现错误: {', '.join(failed)}")
+    regressions = []
+    if args.baseline:
+        regressions = compare_baseline(results, args.baseline, args.threshold)
+        if regressions:
+            print(f"吞吐量退化: {', '.join(regressions)}")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
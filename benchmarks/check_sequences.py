@@ -0,0 +1,61 @@
+"""用项目自带的 logs/id *.log 检查数据编号统计：每个文件是一个端口的数据流，已知的丢包数与人工核对一致。
+同时用小分块多进程运行批量分析，结果应与逐帧统计相同
+
+用法: python benchmarks/check_sequences.py
+统计与期望不符时返回非零退出码。
+"""
+import glob
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from utils.batch_analysis import analyze  # noqa: E402
+from utils.frame_decoder import decode_frame  # noqa: E402
+from utils.log_reader import iter_log_frames  # noqa: E402
+from utils.sequence_tracker import SequenceTracker  # noqa: E402
+
+# 文件名 -> 期望的丢包数；其余文件期望为 0
+EXPECTED_MISSING = {'id 004.log': 6}
+# 批量分析的分块大小，足够小使每个文件被切成多块
+CHUNK_BYTES = 4096
+
+
+def check_file(path):
+    tracker = SequenceTracker()
+    for _, frame in iter_log_frames(path):
+        decoded = decode_frame(frame)
+        if decoded is not None:
+            tracker.observe(path, decoded.seq, decoded.device_id)
+    return tracker.stats(path), tracker.device_frames
+
+
+def main():
+    paths = sorted(glob.glob(os.path.join(PROJECT_DIR, 'logs', 'id *.log')))
+    if not paths:
+        print("没有找到 logs/id *.log")
+        sys.exit(1)
+    failed = []
+    totals, streams, _ = analyze(paths, jobs=2, chunk_bytes=CHUNK_BYTES)
+    print(f"批量分析 {totals['chunks']} 块")
+    for path in paths:
+        name = os.path.basename(path)
+        stats, device_frames = check_file(path)
+        expected = EXPECTED_MISSING.get(name, 0)
+        ok = stats['missing'] == expected and stats['duplicates'] == 0 and stats['resets'] == 0
+        batch = streams.get(path, {})
+        same = (all(batch.get(key) == stats[key] for key in ('received', 'missing', 'duplicates', 'reordered'))
+                and batch.get('device_frames') == dict(device_frames))
+        print(f"{name}: {stats['received']} 帧，丢失 {stats['missing']}（期望 {expected}），"
+              f"丢包率 {stats['loss_rate']:.2%}，设备帧数 {dict(device_frames)}，"
+              f"批量分析{'一致' if same else '不一致'} {'OK' if ok and same else '不符'}")
+        if not (ok and same):
+            failed.append(name)
+    if failed:
+        print(f"统计不符: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+import serial
+
+from utils.capture_file import CaptureWriter
+from utils.frame_db import FrameDB
+from utils.frame_parser import FrameParser
+from utils.hex_codec import to_hex
+from utils.log_shard import open_shard, safe_name
+from utils.logger import Logger
+from utils.metrics import METRICS, setup_metrics
+from utils.sequence_tracker import SequenceTracker, log_sequence_event
+from utils.serial_reader import SerialReader
+from utils.telemetry import TelemetryStore
+
+
+def format_timestamp(ts):
+    """与现有日志一致的时间格式：2024-09-20 17:22:21,107"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)) + f",{int(ts * 1000) % 1000:03d}"
+
+
+class PortCapture:
+    """单个串口的采集：打开串口、阻塞读线程、帧解析"""
+
+    def __init__(self, port_id, port_number, port_name, baudrate, output_queue, telemetry):
+        self.port_id = port_id
+        self.port_number = port_number
+        self.port_name = port_name
+        self.baudrate = baudrate
+        self.output_queue = output_queue
+        self.telemetry = telemetry
+        self.serial_port = None
+        self.parser = FrameParser()
+        self.reader = None
+        self.frames = 0
+        self.dropped = 0
+        self._last_report = (time.monotonic(), 0, 0)
+
+    def open(self):
+        try:
+            # serial_for_url 同时支持 COMx、/dev/ttyUSBx 和 loop:// 等 URL
+            self.serial_port = serial.serial_for_url(self.port_name, self.baudrate, timeout=1)
+        except Exception as e:
+            Logger.error(f"打开串口 {self.port_name} 失败: {e}")
+            return False
+        Logger.info(f"已打开端口 {self.port_name} (id {self.port_id})，波特率为 {self.baudrate}。")
+        self.reader = SerialReader(self.serial_port, name=self.port_name,
+                                   parser=self.parser, on_frames=self.handle_frames)
+        self.reader.start()
+        return True
+
+    def handle_frames(self, frames):
+        ts = time.time()
+        mono_ns = time.monotonic_ns()
+        for frame in frames:
+            self.telemetry.add(frame, ts, self.port_name)
+            try:
+                self.output_queue.put_nowait((ts, mono_ns, self, bytes(frame)))
+                self.frames += 1
+            except queue.Full:
+                self.dropped += 1
+
+    def close(self):
+        if self.reader:
+            self.reader.stop()
+        if self.serial_port and self.serial_port.is_open:
+            self.serial_port.close()
+            Logger.info(f"已关闭串口 {self.port_name}。")
+
+    def throughput(self):
+        """返回自上次调用以来的 (帧/秒, 字节/秒)"""
+        now = time.monotonic()
+        last_time, last_frames, last_bytes = self._last_report
+        received = self.reader.bytes_received if self.reader else 0
+        elapsed = max(now - last_time, 1e-9)
+        self._last_report = (now, self.frames, received)
+        return (self.frames - last_frames) / elapsed, (received - last_bytes) / elapsed
+
+
+class CaptureService:
+    """无交互的多串口采集服务：每个串口一个阻塞读线程，合并写线程把帧按端口写入带时间戳的日志分片"""
+
+    def __init__(self, config, queue_size=100000):
+        self.config = config
+        # 每个端口一个分片：logs/capture.log -> logs/capture-001.log，按 config/logging.json 轮转和压缩
+        self.output_path = config.get('output', os.path.join('logs', 'capture.log'))
+        self.report_interval = config.get('report_interval', 10)
+        # 可选：同时写入二进制采集文件和可查询的帧数据库
+        self.capture_dir = config.get('capture_dir')
+        self.database = config.get('database')
+        self.output_queue = queue.Queue(maxsize=queue_size)
+        # 所有串口共享的实时遥测存储，按设备编号查询最新值和滑动窗口统计
+        self.sequences = SequenceTracker(on_event=log_sequence_event)
+        self.telemetry = TelemetryStore(config.get('telemetry_capacity', 1024), sequences=self.sequences)
+        self.captures = [
+            PortCapture(str(item.get('id', item['port'])), self._port_number(item, i), item['port'],
+                        item.get('baudrate', 9600), self.output_queue, self.telemetry)
+            for i, item in enumerate(config['ports'])
+        ]
+        self._stop_event = threading.Event()
+        self._writer = None
+
+    @staticmethod
+    def _port_number(item, index):
+        """二进制采集文件中的端口号：优先使用数字形式的 id"""
+        port_id = str(item.get('id', ''))
+        return int(port_id) if port_id.isdigit() else index
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def start(self):
+        Logger.setup_logger()
+        # 可选："metrics": {"http_port": 9108, "dump_interval": 60}
+        metrics_config = self.config.get('metrics') or {}
+        setup_metrics(metrics_config.get('http_port'), metrics_config.get('dump_interval'))
+        METRICS.register_gauge('capture_queue_depth', self.output_queue.qsize)
+        opened = [capture for capture in self.captures if capture.open()]
+        if not opened:
+            Logger.error("没有成功打开任何串口，采集服务退出。")
+            return False
+        self.captures = opened
+        # 启动前先试打开一次数据库；打不开时只记录错误，采集和日志照常进行
+        frame_db = self._open_database()
+        if frame_db:
+            frame_db.close()
+        else:
+            self.database = None
+        self._stop_event.clear()
+        self._writer = threading.Thread(target=self._write_loop, name='capture-writer', daemon=True)
+        self._writer.start()
+        return True
+
+    def _port_path(self, capture):
+        stem, ext = os.path.splitext(self.output_path)
+        return f"{stem}-{safe_name(capture.port_id)}{ext or '.log'}"
+
+    def _open_database(self):
+        """打开帧数据库，未配置或打开失败时返回 None"""
+        if not self.database:
+            return None
+        try:
+            return FrameDB(self.database)
+        except Exception as e:
+            Logger.error(f"打开帧数据库 {self.database} 失败，不写入数据库: {e}")
+            return None
+
+    def _write_loop(self):
+        """合并写线程：阻塞取帧，按端口分组后批量写入各自的分片"""
+        os.makedirs(os.path.dirname(self.output_path) or '.', exist_ok=True)
+        shards = {capture: open_shard(self._port_path(capture), **Logger.shard_options)
+                  for capture in self.captures}
+        # 实时采集时压缩块最多攒 1 秒，跟踪读取的延迟不超过 1 秒
+        capture_writer = CaptureWriter(self.capture_dir, block_ns=1_000_000_000) if self.capture_dir else None
+        # sqlite3 连接只能在创建它的线程中使用，因此在写线程中打开
+        frame_db = self._open_database()
+        while not (self._stop_event.is_set() and self.output_queue.empty()):
+            try:
+                item = self.output_queue.get(timeout=0.5)
+            except queue.Empty:
+                for shard in shards.values():
+                    shard.flush()
+                if capture_writer:
+                    capture_writer.flush()
+                continue
+            lines = {}
+            records = []
+            count = 0
+            while True:
+                ts, mono_ns, capture, frame = item
+                lines.setdefault(capture, []).append(
+                    f"{format_timestamp(ts)} - id {capture.port_id} - 接收 : {to_hex(frame)}\n")
+                if capture_writer:
+                    capture_writer.write(capture.port_number, frame, mono_ns)
+                if frame_db:
+                    records.append((ts, capture.port_number, frame))
+                count += 1
+                if count >= 1000:
+                    break
+                try:
+                    item = self.output_queue.get_nowait()
+                except queue.Empty:
+                    break
+            write_start = time.perf_counter()
+            for capture, port_lines in lines.items():
+                shards[capture].write(''.join(port_lines))
+            if METRICS.enabled:
+                METRICS.observe('capture_write_seconds', time.perf_counter() - write_start)
+            if frame_db:
+                insert_start = time.perf_counter()
+                try:
+                    frame_db.insert(records)
+                except Exception as e:
+                    Logger.error(f"写入帧数据库失败: {e}")
+                if METRICS.enabled:
+                    METRICS.observe('db_insert_seconds', time.perf_counter() - insert_start)
+        for shard in shards.values():
+            shard.close()
+        if capture_writer:
+            capture_writer.close()
+        if frame_db:
+            frame_db.close()
+
+    def report(self):
+        """输出每个串口的吞吐量和链路丢包率"""
+        for capture in self.captures:
+            frames_per_sec, bytes_per_sec = capture.throughput()
+            Logger.info(f"id {capture.port_id} ({capture.port_name}): {frames_per_sec:.1f} 帧/s, "
+                        f"{bytes_per_sec:.0f} B/s, 累计 {capture.frames} 帧, 丢弃 {capture.dropped} 帧, "
+                        f"垃圾字节 {capture.parser.garbage_bytes}")
+        totals = self.sequences.totals()
+        Logger.info(f"数据编号统计：收到 {totals['received']} 帧，丢失 {totals['missing']}，"
+                    f"重复 {totals['duplicates']}，乱序 {totals['reordered']}，丢包率 {totals['loss_rate']:.4%}")
+
+    def run(self, duration=None):
+        """运行直到 Ctrl+C 或达到 duration 秒"""
+        if not self.start():
+            return
+        deadline = time.monotonic() + duration if duration else None
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                wait = self.report_interval
+                if deadline is not None:
+                    wait = min(wait, max(deadline - time.monotonic(), 0))
+                time.sleep(wait)
+                self.report()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        for capture in self.captures:
+            capture.close()
+        self._stop_event.set()
+        if self._writer:
+            self._writer.join()
+        self.report()
+        METRICS.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多串口并发采集服务")
+    parser.add_argument('-c', '--config', default=os.path.join('config', 'capture.json'), help="配置文件路径")
+    parser.add_argument('-d', '--duration', type=float, default=None, help="采集时长（秒），默认一直运行")
+    args = parser.parse_args()
+
+    CaptureService.from_file(args.config).run(args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+import json
+import os
+
+from utils.capture_session import SessionScheduler
+from utils.logger import Logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按计划运行多个定时采集窗口")
+    parser.add_argument('-c', '--config', default=os.path.join('config', 'sessions.json'), help="配置文件路径")
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    Logger.setup_logger()
+    sessions = SessionScheduler(config['windows'], config.get('output_dir', os.path.join('logs', 'sessions')))
+    sessions.start()
+    try:
+        # 带超时等待，主线程才能及时响应 Ctrl+C
+        while not sessions.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        Logger.info("收到中断，结束所有采集窗口。")
+    finally:
+        sessions.stop()
+    for summary in sessions.summaries:
+        print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
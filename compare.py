@@ -1,19 +1,16 @@
+import argparse
 import re
-from openpyxl import load_workbook
+
+from utils.excel_reader import read_column_cached
 
 # 1. 从 Excel 文件中读取数据并处理
 def read_excel_data(excel_file):
-    wb = load_workbook(excel_file)
-    ws = wb.active  # 或者指定工作表名称，如 wb['Sheet1']
-
     excel_data = []
-    # 遍历第 D 列，从第二行开始
-    for row in ws.iter_rows(min_row=2, min_col=4, max_col=4):
-        cell_value = row[0].value
-        if cell_value is not None:
-            # 丢掉前两个字符
-            modified_value = str(cell_value)[2:]
-            excel_data.append(modified_value)
+    # 流式读取第 D 列，从第二行开始；文件未变化时直接使用缓存
+    for cell_value in read_column_cached(excel_file, column=4, min_row=2):
+        # 丢掉前两个字符
+        modified_value = cell_value[2:]
+        excel_data.append(modified_value)
     return excel_data
 
 # 2. 从 txt 文件中提取数据并处理
@@ -21,6 +18,9 @@ def read_txt_data(txt_file):
     with open(txt_file, 'r', encoding='utf-8') as f:
         content = f.read()
 
+    # Analyzed.py 输出的是带空格的十六进制（A9 9A 34 ...），先去掉行内空白，保留换行
+    content = content.replace(' ', '').replace('\t', '')
+
     txt_data = []
     # 使用正则表达式提取以 A99A 开头，0D0A 结尾的数据段
     pattern = r'A99A.*?0D0A'
@@ -31,29 +31,104 @@ def read_txt_data(txt_file):
         txt_data.append(modified_match)
     return txt_data
 
-# 3. 比较两个数据列表
-def compare_data(excel_data, txt_data):
-    min_length = min(len(excel_data), len(txt_data))
-    for i in range(min_length):
-        excel_item = excel_data[i]
-        txt_item = txt_data[i]
-        if excel_item == txt_item:
-            print(f"第 {i+1} 项匹配：\nExcel 数据：{excel_item}\nTXT 数据：{txt_item}\n")
+# 3. 以 (设备编号, 数据编号) 为键对账
+def frame_key(item):
+    """从去掉前两个字符的帧十六进制串中取出 (设备编号, 数据编号)，格式不对时返回 None
+
+    9A | 长度 | 设备编号(8) | 2C | 数据编号(8) | ...
+    """
+    try:
+        return int(item[4:12], 16), int(item[14:22], 16)
+    except ValueError:
+        return None
+
+
+def build_index(items):
+    """建立 键 -> 首次出现的数据 的哈希索引，返回 (索引, 重复项列表, 无法识别的条目数)"""
+    index = {}
+    duplicates = []
+    invalid = 0
+    for item in items:
+        key = frame_key(item)
+        if key is None:
+            invalid += 1
+        elif key in index:
+            duplicates.append((key, item))
         else:
-            print(f"第 {i+1} 项不匹配：\nExcel 数据：{excel_item}\nTXT 数据：{txt_item}\n")
+            index[key] = item
+    return index, duplicates, invalid
+
+
+def reconcile(excel_data, txt_data):
+    """对账两侧数据，线性时间，返回匹配、缺失、多出、内容不一致和重复的统计与明细"""
+    excel_index, excel_duplicates, excel_invalid = build_index(excel_data)
+    txt_index, txt_duplicates, txt_invalid = build_index(txt_data)
+
+    matched = 0
+    mutated = []
+    missing = []
+    for key, txt_item in txt_index.items():
+        excel_item = excel_index.get(key)
+        if excel_item is None:
+            missing.append((key, txt_item))
+        elif excel_item == txt_item:
+            matched += 1
+        else:
+            mutated.append((key, excel_item, txt_item))
+    extra = [(key, item) for key, item in excel_index.items() if key not in txt_index]
+
+    return {
+        'excel_total': len(excel_data),
+        'txt_total': len(txt_data),
+        'matched': matched,
+        'mutated': mutated,
+        'missing': missing,
+        'extra': extra,
+        'excel_duplicates': excel_duplicates,
+        'txt_duplicates': txt_duplicates,
+        'excel_invalid': excel_invalid,
+        'txt_invalid': txt_invalid,
+    }
+
+
+def write_diff(result, diff_file):
+    """把所有不一致的明细写入差异文件"""
+    with open(diff_file, 'w', encoding='utf-8') as f:
+        for (device_id, seq), item in sorted(result['missing']):
+            f.write(f"MISSING\t{device_id}\t{seq}\ttxt={item}\n")
+        for (device_id, seq), item in sorted(result['extra']):
+            f.write(f"EXTRA\t{device_id}\t{seq}\texcel={item}\n")
+        for (device_id, seq), excel_item, txt_item in sorted(result['mutated']):
+            f.write(f"MUTATED\t{device_id}\t{seq}\texcel={excel_item}\ttxt={txt_item}\n")
+        for side in ('excel', 'txt'):
+            for (device_id, seq), item in result[f'{side}_duplicates']:
+                f.write(f"DUPLICATE\t{device_id}\t{seq}\t{side}={item}\n")
+
+
+def print_summary(result):
+    print(f"Excel 数据 {result['excel_total']} 条，TXT 数据 {result['txt_total']} 条")
+    print(f"匹配：{result['matched']}")
+    print(f"内容不一致：{len(result['mutated'])}")
+    print(f"仅在 TXT 中（服务器缺失）：{len(result['missing'])}")
+    print(f"仅在 Excel 中（多出）：{len(result['extra'])}")
+    print(f"重复：Excel {len(result['excel_duplicates'])}，TXT {len(result['txt_duplicates'])}")
+    print(f"无法识别：Excel {result['excel_invalid']}，TXT {result['txt_invalid']}")
 
 # 主函数
 def main():
-    excel_file = 'data/11_tcpserver.xlsx'  # 替换为您的 Excel 文件名
-    txt_file = 'data/11_log解析.txt'       # 替换为您的 txt 文件名
-
-    # excel_file = 'data/11_tcpserver.xlsx'  # 替换为您的 Excel 文件名
-    # txt_file = 'data/11_log解析.txt'  # 替换为您的 txt 文件名
+    parser = argparse.ArgumentParser(description="按 (设备编号, 数据编号) 对账 Excel 导出与日志解析数据")
+    parser.add_argument('--excel', default='data/11_tcpserver.xlsx', help="Excel 文件")
+    parser.add_argument('--txt', default='data/11_log解析.txt', help="txt 文件")
+    parser.add_argument('--diff', default='data/compare_diff.txt', help="差异明细输出文件")
+    args = parser.parse_args()
 
-    excel_data = read_excel_data(excel_file)
-    txt_data = read_txt_data(txt_file)
+    excel_data = read_excel_data(args.excel)
+    txt_data = read_txt_data(args.txt)
 
-    compare_data(excel_data, txt_data)
+    result = reconcile(excel_data, txt_data)
+    print_summary(result)
+    write_diff(result, args.diff)
+    print(f"差异明细已写入 {args.diff}")
 
 if __name__ == "__main__":
     main()
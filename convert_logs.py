@@ -0,0 +1,44 @@
+import argparse
+import glob
+import heapq
+import os
+import re
+
+from utils.capture_file import CaptureWriter
+from utils.log_reader import parse_log
+
+
+def port_id_from_name(path, default):
+    """从 'id 001.log' 这类文件名中取端口号"""
+    digits = re.findall(r'\d+', os.path.basename(path))
+    return int(digits[-1]) if digits else default
+
+
+def convert(paths, output_dir, segment_bytes):
+    # 各文件内部时间有序，按时间归并后写入，保证段内索引单调
+    sources = [parse_log(path, port_id_from_name(path, i)) for i, path in enumerate(paths)]
+    text_bytes = sum(os.path.getsize(path) for path in paths)
+    with CaptureWriter(output_dir, segment_bytes=segment_bytes, wall_base_ns=0, mono_base_ns=0) as writer:
+        for ts_ns, port_id, data in heapq.merge(*sources, key=lambda record: record[0]):
+            writer.write(port_id, data, ts_ns)
+    return writer.records, text_bytes, writer.bytes_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把十六进制文本日志转换为二进制采集文件")
+    parser.add_argument('inputs', nargs='*', default=[os.path.join('logs', 'id *.log')], help="日志文件或通配符")
+    parser.add_argument('-o', '--output', default=os.path.join('data', 'capture'), help="输出目录")
+    parser.add_argument('--segment-mb', type=int, default=64, help="段文件大小（MB）")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    if not paths:
+        print("没有找到日志文件。")
+        return
+    records, text_bytes, binary_bytes = convert(paths, args.output, args.segment_mb * 1024 * 1024)
+    ratio = text_bytes / binary_bytes if binary_bytes else 0.0
+    print(f"已转换 {len(paths)} 个文件，{records} 条记录：{text_bytes} 字节 -> {binary_bytes} 字节（{ratio:.1f} 倍）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import time
+from datetime import datetime
+
+import serial
+
+from utils.frame_generator import FORMATS, FrameGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成数据帧：写入文件或按速率发送到串口 / pty / socket")
+    parser.add_argument('-n', '--count', type=int, default=None, help="生成的帧数（编号数），发送时默认不停止")
+    parser.add_argument('-d', '--devices', type=int, default=1000, help="模拟的设备数")
+    parser.add_argument('--start', default=None, help="起始时间，例如 '2024-09-25 15:52:20'，默认当前时间")
+    parser.add_argument('--interval', type=float, default=1.0, help="每个设备的出帧间隔（秒）")
+    parser.add_argument('--seed', type=int, default=None, help="随机种子，相同种子生成相同数据")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="随机改写一个字节的帧比例")
+    parser.add_argument('--truncate', type=float, default=0.0, help="截断的帧比例")
+    parser.add_argument('--gap', type=float, default=0.0, help="丢弃（编号空缺）的帧比例")
+    parser.add_argument('--duplicate', type=float, default=0.0, help="重复发送的帧比例")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('-o', '--output', help="输出文件（scap 格式为目录）")
+    output.add_argument('-p', '--port', help="发送目标：串口名、pty 路径或 pyserial URL（如 socket://127.0.0.1:9000）")
+    parser.add_argument('-f', '--format', choices=FORMATS, default='raw', help="输出文件格式")
+    parser.add_argument('-b', '--baudrate', type=int, default=9600, help="串口波特率")
+    parser.add_argument('-r', '--rate', type=float, default=None, help="发送速率（帧/秒），默认全速")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, '%Y-%m-%d %H:%M:%S') if args.start else None
+    generator = FrameGenerator(args.devices, start=start, interval=args.interval, seed=args.seed,
+                               corrupt=args.corrupt, truncate=args.truncate, gap=args.gap, duplicate=args.duplicate)
+
+    begin = time.perf_counter()
+    if args.output:
+        if args.count is None:
+            parser.error("写入文件时需要指定 -n")
+        generator.write_file(args.output, args.count, args.format)
+    else:
+        port = serial.serial_for_url(args.port, args.baudrate, timeout=1)
+        try:
+            generator.stream(port, args.count, args.rate)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            port.close()
+    elapsed = time.perf_counter() - begin
+
+    stats = generator.stats()
+    print(f"生成 {stats['frames']} 帧 / {stats['bytes']} 字节，用时 {elapsed:.2f}s"
+          f"（{stats['bytes'] / elapsed / 1e6:.1f} MB/s）")
+    print(f"注入故障：空缺 {stats['gaps']}，重复 {stats['duplicates']}，"
+          f"改写 {stats['corrupted']}，截断 {stats['truncated']}")
+
+
+if __name__ == "__main__":
+    main()
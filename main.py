@@ -1,14 +1,25 @@
+import os
 import serial
 import serial.tools.list_ports
-import threading
 import platform
 from utils.logger import Logger  # 引入刚刚创建的日志工具类
+from utils.metrics import setup_metrics
+from utils.frame_parser import FrameParser
+from utils.relay import RelayWriter
+from utils.sequence_tracker import SequenceTracker, log_sequence_event
+from utils.serial_reader import SerialReader
+from utils.telemetry import TelemetryStore
 
 class SerialDebugger:
     def __init__(self):
         self.serial_port = None
         self.is_running = False
+        self.reader = None
+        self.parser = FrameParser()
+        self.sequences = SequenceTracker(on_event=log_sequence_event)
+        self.telemetry = TelemetryStore(sequences=self.sequences)
         self.com4_port = None
+        self.relay = None
         Logger.setup_logger()
 
     def list_ports(self):
@@ -32,13 +43,18 @@ class SerialDebugger:
             self.serial_port = serial.Serial(port_name, baudrate, timeout=1)
             self.is_running = True
             Logger.info(f"已打开端口 {port_name}，波特率为 {baudrate}。")
-            threading.Thread(target=self.read_from_port).start()
+            self.reader = SerialReader(self.serial_port, name=port_name,
+                                       parser=self.parser, on_frames=self.handle_frames)
+            Logger.start_receive_pipeline()
+            self.reader.start()
         except Exception as e:
             Logger.error(f"打开串口失败: {e}")
 
     def open_com4_port(self, baudrate=9600):
         try:
             self.com4_port = serial.Serial("COM4", baudrate, timeout=1)
+            self.relay = RelayWriter(self.com4_port, name="COM4")
+            self.relay.start()
             Logger.info("已打开com4端口用于数据发送。")
         except Exception as e:
             Logger.error(f"打开 COM4 端口失败: {e}")
@@ -46,10 +62,18 @@ class SerialDebugger:
     def close_ports(self):
         if self.serial_port and self.serial_port.is_open:
             self.is_running = False
+            if self.reader:
+                self.reader.stop()
             self.serial_port.close()
+            Logger.stop_receive_pipeline()
             Logger.info("已关闭串口。")
+            for stream in self.sequences.streams():
+                Logger.info(f"{stream} 数据编号统计: {self.sequences.stats(stream)}")
 
         if self.com4_port and self.com4_port.is_open:
+            if self.relay:
+                self.relay.stop()
+                self.relay.report()
             self.com4_port.close()
             Logger.info("已关闭 COM4 端口。")
 
@@ -65,30 +89,19 @@ class SerialDebugger:
             Logger.warning("串口未打开，无法发送数据。")
 
     def send_to_com4(self, data):
-        if self.com4_port and self.com4_port.is_open:
-            try:
-                self.com4_port.write(data)
-                Logger.info(f"发送到 COM4 的数据: {data.hex(' ')}")
-            except Exception as e:
-                Logger.error(f"发送数据到 COM4 时出错: {e}")
+        # 只入队，由转发写线程合并写出，下游阻塞不会拖慢读线程
+        if self.relay and self.com4_port.is_open:
+            self.relay.put(data)
         else:
             Logger.warning("COM4 未打开，无法发送数据。")
 
-    def read_from_port(self):
-        buffer = bytearray()
-        while self.is_running:
-            if self.serial_port.in_waiting > 0:
-                try:
-                    data = self.serial_port.read(self.serial_port.in_waiting)
-                    buffer.extend(data)
-
-                    while len(buffer) >= 8:
-                        hex_data = ' '.join(f'{byte:02X}' for byte in buffer[:8])
-                        Logger.info(f"接收 : {hex_data}")
-                        self.send_to_com4(buffer[:8])
-                        buffer = buffer[8:]
-                except Exception as e:
-                    Logger.error(f"读取串口数据时出错: {e}")
+    def handle_frames(self, frames):
+        """读线程回调：处理解析出的 A9 9A … 0D 0A 帧（memoryview，仅在回调内有效）"""
+        port = self.reader.name
+        for frame in frames:
+            self.telemetry.add(frame, stream=port)
+            Logger.receive(frame, port=port)
+            self.send_to_com4(frame)
 
     def start(self):
         available_ports = self.list_ports()
@@ -120,5 +133,7 @@ class SerialDebugger:
                 self.send_data(cmd)
 
 if __name__ == "__main__":
+    # 设置 SERIAL_METRICS_PORT=9108 后可在 http://127.0.0.1:9108/metrics 查看运行指标
+    setup_metrics(os.environ.get('SERIAL_METRICS_PORT'))
     debugger = SerialDebugger()
     debugger.start()
\ No newline at end of file
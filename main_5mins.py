@@ -1,17 +1,22 @@
-from venv import logger
-
 import serial
 import serial.tools.list_ports
-import threading
 import platform
-import time
 from utils.logger import Logger  # 引入刚刚创建的日志工具类
+from utils.hex_codec import to_hex
+from utils.scheduler import Scheduler
+from utils.serial_reader import SerialReader
+
+# 收到第一包数据后继续采集的时长（秒）
+CAPTURE_SECONDS = 5 * 60
 
 class SerialDebugger:
     def __init__(self):
         self.serial_port = None
         self.is_running = False
-        self.timer_started = False
+        self.reader = None
+        # 倒计时交给调度线程，不再单独开一个每秒轮询的线程
+        self.scheduler = Scheduler('capture-timer')
+        self.stop_timer = None
         Logger.setup_logger()
 
     def list_ports(self):
@@ -38,43 +43,37 @@ class SerialDebugger:
             self.serial_port = serial.Serial(port_name, baudrate, timeout=1)
             self.is_running = True
             print(f"已打开端口 {port_name}，波特率为 {baudrate}。")
-            threading.Thread(target=self.read_from_port).start()
+            self.reader = SerialReader(self.serial_port, self.handle_data, name=port_name)
+            self.scheduler.start()
+            self.reader.start()
         except Exception as e:
             print(f"打开串口失败: {e}")
 
     def close_ports(self):
-        """关闭串口"""
+        """关闭串口：先停读线程并取走缓冲区剩余数据，再关闭"""
+        if self.stop_timer is not None:
+            self.stop_timer.cancel()
+        self.scheduler.stop()
         if self.serial_port and self.serial_port.is_open:
             self.is_running = False
+            if self.reader:
+                self.reader.stop(drain=True)
             self.serial_port.close()
             print("已关闭串口。")
 
-    def read_from_port(self):
-        """从串口读取数据并处理"""
-        buffer = bytearray()
-        while self.is_running:
-            if self.serial_port.in_waiting > 0:
-                try:
-                    data = self.serial_port.read(self.serial_port.in_waiting)
-                    buffer.extend(data)
-
-                    # 记录接收到的数据并启动倒计时
-                    if not self.timer_started:
-                        self.timer_started = True
-                        threading.Thread(target=self.start_timer).start()
+    def handle_data(self, data):
+        """读线程回调：处理从串口读取到的数据"""
+        # 记录接收到的数据，收到第一包时开始倒计时
+        if self.stop_timer is None:
+            self.stop_timer = self.scheduler.call_later(CAPTURE_SECONDS, self.on_timeout)
 
-                    hex_data = ' '.join(f'{byte:02X}' for byte in data)
-                    logger.info(f"接收 : {hex_data}")
-                    print(f"接收 (HEX): {hex_data}")  # 控制台输出
-                except Exception as e:
-                    print(f"读取串口数据时出错: {e}")
+        # 日志和控制台共用同一次渲染
+        hex_data = to_hex(data)
+        Logger.info(f"接收 : {hex_data}")
+        print(f"接收 (HEX): {hex_data}")  # 控制台输出
 
-    def start_timer(self):
-        """启动五分钟倒计时"""
-        countdown = 5 * 60  # 5分钟
-        while countdown > 0 and self.is_running:
-            time.sleep(1)
-            countdown -= 1
+    def on_timeout(self):
+        """倒计时结束：在调度线程中关闭串口，读线程由 close_ports 停止"""
         if self.is_running:
             print("倒计时结束，程序将停止。")
             self.close_ports()
@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+
+from utils.logger import Logger
+from utils.metrics import setup_metrics
+from utils.network_ingest import NetworkIngest
+from utils.sequence_tracker import SequenceTracker, log_sequence_event
+from utils.telemetry import TelemetryStore
+
+
+class NetworkService:
+    """DTU 网络接收服务：TCP/UDP 收到的帧与串口走同一套解析、遥测和接收日志"""
+
+    def __init__(self, host='0.0.0.0', tcp_port=9000, udp_port=None, report_interval=10):
+        self.sequences = SequenceTracker(on_event=log_sequence_event)
+        self.telemetry = TelemetryStore(sequences=self.sequences)
+        self.ingest = NetworkIngest(self.handle_frames, host, tcp_port, udp_port)
+        self.report_interval = report_interval
+
+    def handle_frames(self, source, frames):
+        """事件循环回调：与 SerialDebugger.handle_frames 相同，日志前缀带上来源连接"""
+        prefix = f"{source} - 接收 : "
+        for frame in frames:
+            self.telemetry.add(frame, stream=source)
+            Logger.receive(frame, prefix)
+
+    def report(self):
+        stats = self.ingest.stats()
+        totals = self.sequences.totals()
+        Logger.info(f"网络接收：{stats['connections']} 个连接（累计 {stats['accepted']}），"
+                    f"{stats['frames']} 帧 / {stats['bytes_received']} 字节，暂停读取 {stats['pause_events']} 次，"
+                    f"丢包率 {totals['loss_rate']:.4%}")
+
+    async def run(self, duration=None):
+        Logger.setup_logger()
+        Logger.start_receive_pipeline()
+        await self.ingest.start()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration if duration else None
+        try:
+            while deadline is None or loop.time() < deadline:
+                wait = self.report_interval
+                if deadline is not None:
+                    wait = min(wait, max(deadline - loop.time(), 0))
+                await asyncio.sleep(wait)
+                self.report()
+        finally:
+            await self.ingest.stop()
+            Logger.stop_receive_pipeline()
+            self.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DTU 网络接收服务（TCP/UDP）")
+    parser.add_argument('--host', default='0.0.0.0', help="监听地址")
+    parser.add_argument('--tcp-port', type=int, default=9000, help="TCP 端口")
+    parser.add_argument('--udp-port', type=int, default=None, help="UDP 端口，默认不监听")
+    parser.add_argument('-d', '--duration', type=float, default=None, help="运行时长（秒），默认一直运行")
+    parser.add_argument('--report-interval', type=float, default=10, help="统计输出间隔（秒）")
+    parser.add_argument('--metrics-port', type=int, default=None, help="在该端口提供 /metrics")
+    args = parser.parse_args()
+
+    setup_metrics(args.metrics_port)
+    service = NetworkService(args.host, args.tcp_port, args.udp_port, args.report_interval)
+    try:
+        asyncio.run(service.run(args.duration))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 import serial
 import serial.tools.list_ports
-import threading
 import platform
 from utils.logger import Logger  # 引入刚刚创建的日志工具类
+from utils.frame_parser import FrameParser
+from utils.sequence_tracker import SequenceTracker, log_sequence_event
+from utils.serial_reader import SerialReader
+from utils.telemetry import TelemetryStore
 
 class SerialDebugger:
     def __init__(self):
         self.serial_port = None
         self.is_running = False
+        self.reader = None
+        self.parser = FrameParser()
+        self.sequences = SequenceTracker(on_event=log_sequence_event)
+        self.telemetry = TelemetryStore(sequences=self.sequences)
         Logger.setup_logger()
 
     def list_ports(self):
@@ -31,30 +38,30 @@ class SerialDebugger:
             self.serial_port = serial.Serial(port_name, baudrate, timeout=1)
             self.is_running = True
             Logger.info(f"已打开端口 {port_name}，波特率为 {baudrate}。")
-            threading.Thread(target=self.read_from_port).start()
+            self.reader = SerialReader(self.serial_port, name=port_name,
+                                       parser=self.parser, on_frames=self.handle_frames)
+            Logger.start_receive_pipeline()
+            self.reader.start()
         except Exception as e:
             Logger.error(f"打开串口失败: {e}")
 
     def close_ports(self):
         if self.serial_port and self.serial_port.is_open:
             self.is_running = False
+            if self.reader:
+                self.reader.stop()
             self.serial_port.close()
+            Logger.stop_receive_pipeline()
             Logger.info("已关闭串口。")
+            for stream in self.sequences.streams():
+                Logger.info(f"{stream} 数据编号统计: {self.sequences.stats(stream)}")
 
-    def read_from_port(self):
-        buffer = bytearray()
-        while self.is_running:
-            if self.serial_port.in_waiting > 0:
-                try:
-                    data = self.serial_port.read(self.serial_port.in_waiting)
-                    buffer.extend(data)
-
-                    while len(buffer) >= 8:
-                        hex_data = ' '.join(f'{byte:02X}' for byte in buffer[:8])
-                        Logger.info(f"接收 (HEX): {hex_data}")
-                        buffer = buffer[8:]
-                except Exception as e:
-                    Logger.error(f"读取串口数据时出错: {e}")
+    def handle_frames(self, frames):
+        """读线程回调：处理解析出的 A9 9A … 0D 0A 帧（memoryview，仅在回调内有效）"""
+        port = self.reader.name
+        for frame in frames:
+            self.telemetry.add(frame, stream=port)
+            Logger.receive(frame, "接收 (HEX): ", port)
 
     def start(self):
         available_ports = self.list_ports()
@@ -0,0 +1,107 @@
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from datetime import datetime
+
+from convert_logs import port_id_from_name
+from utils.frame_db import FrameDB
+from utils.hex_codec import to_hex
+from utils.log_reader import iter_log_frames
+
+
+def parse_time(text):
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"时间格式应为 'YYYY-mm-dd HH:MM[:SS]': {text!r}")
+
+
+def parse_seq_range(text):
+    """'100-200' 或 '100'"""
+    first, _, last = text.partition('-')
+    return int(first), int(last) if last else int(first)
+
+
+def import_logs(db, paths, batch_size=10000):
+    """把十六进制文本日志中的帧导入数据库，接收时间取日志行时间"""
+    total = 0
+    for i, path in enumerate(paths):
+        port = port_id_from_name(path, i)
+        records = []
+        for ts_ns, frame in iter_log_frames(path):
+            records.append((ts_ns / 1e9, port, frame))
+            if len(records) >= batch_size:
+                total += db.insert(records)
+                records = []
+        total += db.insert(records)
+        print(f"{path}: 已导入，累计 {total} 帧")
+    return total
+
+
+def print_rows(rows, fmt):
+    if fmt == 'csv':
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['device_id', 'seq', 'timestamp', 'recv_time', 'port', 'voltage', 'temperature',
+                         'data1', 'data2', 'data3', 'data4'])
+        for row in rows:
+            writer.writerow([row.device_id, row.seq, row.timestamp, row.recv_time.isoformat(sep=' ', timespec='milliseconds'),
+                             row.port, row.voltage, row.temperature, *row.channels])
+    elif fmt == 'hex':
+        # 与接收日志相同的行格式，可直接交给 Analyzed.py
+        for row in rows:
+            stamp = row.recv_time.strftime('%Y-%m-%d %H:%M:%S') + f",{row.recv_time.microsecond // 1000:03d}"
+            print(f"{stamp} - 接收 : {to_hex(FrameDB.to_frame(row))}")
+    else:
+        for row in rows:
+            print(f"{row.device_id} {row.seq:>10} {row.timestamp} 电压 {row.voltage} 温度 {row.temperature} "
+                  f"数据 {' '.join(str(value) for value in row.channels)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询帧数据库，或把文本日志导入数据库")
+    parser.add_argument('-b', '--database', default=os.path.join('data', 'frames.db'), help="数据库文件")
+    parser.add_argument('--import', dest='imports', nargs='+', metavar='LOG', help="导入日志文件或通配符")
+    parser.add_argument('--devices', action='store_true', help="列出所有设备的帧数和时间范围")
+    parser.add_argument('-d', '--device', type=lambda text: int(text, 0), help="设备编号（十进制或 0x 十六进制）")
+    parser.add_argument('--start', type=parse_time, help="开始时间（含）")
+    parser.add_argument('--end', type=parse_time, help="结束时间（不含）")
+    parser.add_argument('--seq', type=parse_seq_range, help="数据编号范围，如 100-200")
+    parser.add_argument('-l', '--limit', type=int, help="最多返回的帧数")
+    parser.add_argument('-f', '--format', choices=('table', 'csv', 'hex'), default='table', help="输出格式")
+    args = parser.parse_args()
+
+    if args.imports:
+        paths = sorted({path for pattern in args.imports for path in glob.glob(pattern)})
+        with FrameDB(args.database) as db:
+            start = time.perf_counter()
+            total = import_logs(db, paths)
+            elapsed = time.perf_counter() - start
+        print(f"共导入 {total} 帧（丢弃 {db.rejected} 帧），用时 {elapsed:.2f}s")
+        return
+
+    if not os.path.exists(args.database):
+        parser.error(f"数据库不存在: {args.database}")
+    with FrameDB(args.database, readonly=True) as db:
+        if args.devices:
+            for device_id, count, first, last in db.devices():
+                print(f"{device_id} (0x{device_id:08X}): {count} 帧，{first} ~ {last}")
+            return
+        if args.device is None:
+            parser.error("需要 -d 设备编号，或使用 --devices / --import")
+        start = time.perf_counter()
+        if args.seq:
+            rows = db.query_seq(args.device, args.seq[0], args.seq[1], args.limit)
+        else:
+            rows = db.query(args.device, args.start, args.end, args.limit)
+        elapsed = time.perf_counter() - start
+        print_rows(rows, args.format)
+        print(f"{len(rows)} 帧，查询用时 {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,23 @@
-import re
-
 import serial
 import serial.tools.list_ports
-import threading
 import platform
-import time
 from utils.logger import Logger  # 引入刚刚创建的日志工具类
+from utils.hex_codec import LazyHex
+from utils.log_reader import iter_log_frames
+from utils.replay import ReplayEngine
+from utils.frame_parser import FrameParser
+from utils.serial_reader import SerialReader
 
 
 class SerialDebugger:
     def __init__(self):
         self.serial_port = None
         self.is_running = False
+        self.reader = None
+        self.parser = FrameParser()
         self.COM4_port = None
         self.data_buffer = []
+        self.data_timestamps = None
         Logger.setup_logger()
 
     def list_ports(self):
@@ -30,7 +34,10 @@ class SerialDebugger:
             self.serial_port = serial.Serial(port_name, baudrate, timeout=1)
             self.is_running = True
             Logger.info(f"已打开端口 {port_name}，波特率为 {baudrate}。")
-            threading.Thread(target=self.read_from_port).start()
+            self.reader = SerialReader(self.serial_port, name=port_name,
+                                       parser=self.parser, on_frames=self.handle_frames)
+            Logger.start_receive_pipeline()
+            self.reader.start()
         except Exception as e:
             Logger.error(f"打开串口失败: {e}")
 
@@ -44,7 +51,10 @@ class SerialDebugger:
     def close_ports(self):
         if self.serial_port and self.serial_port.is_open:
             self.is_running = False
+            if self.reader:
+                self.reader.stop()
             self.serial_port.close()
+            Logger.stop_receive_pipeline()
             Logger.info("已关闭串口。")
 
         if self.COM4_port and self.COM4_port.is_open:
@@ -52,56 +62,70 @@ class SerialDebugger:
             Logger.info("已关闭 COM4 端口。")
 
     def send_data(self, data):
-        if self.serial_port and self.serial_port.is_open:
+        # 手动输入的是十六进制字符串，只在这里编码一次，两个端口发送同一份字节
+        if isinstance(data, str):
             try:
-                # hex_data = bytes.fromhex(data)
-                self.serial_port.write(data)
-                Logger.info(f"发送 (HEX): {data}")
+                data = bytes.fromhex(data)
             except ValueError:
                 Logger.error("无效的HEX格式输入，请确保HEX输入有效。")
+                return
+
+        if self.serial_port and self.serial_port.is_open:
+            try:
+                self.serial_port.write(data)
+                Logger.info("发送 (HEX): %s", LazyHex(data))
+            except serial.SerialException as e:
+                Logger.error(f"发送数据到串口时出错: {e}")
         else:
             Logger.warning("串口未打开，无法发送数据。")
 
         # 发送数据到COM4
         if self.COM4_port and self.COM4_port.is_open:
             try:
-                self.COM4_port.write(data.encode())  # 发送数据到COM4端口
-                Logger.info(f"已向COM4发送数据: {data}")
+                self.COM4_port.write(data)  # 发送数据到COM4端口
+                Logger.info("已向COM4发送数据: %s", LazyHex(data))
             except Exception as e:
                 Logger.error(f"发送数据到COM4时出错: {e}")
 
-    def read_from_port(self):
-        buffer = bytearray()
-        while self.is_running:
-            if self.serial_port.in_waiting > 0:
-                try:
-                    data = self.serial_port.read(self.serial_port.in_waiting)
-                    buffer.extend(data)
-
-                    while len(buffer) >= 8:
-                        hex_data = ' '.join(f'{byte:02X}' for byte in buffer[:8])
-                        Logger.info(f"接收 : {hex_data}")
-                        self.send_to_COM4(buffer[:8])
-                        buffer = buffer[8:]
-                except Exception as e:
-                    Logger.error(f"读取串口数据时出错: {e}")
+    def handle_frames(self, frames):
+        """读线程回调：处理解析出的 A9 9A … 0D 0A 帧（memoryview，仅在回调内有效）"""
+        port = self.reader.name
+        for frame in frames:
+            Logger.receive(frame, port=port)
 
     def load_data_from_file(self, filepath):
-        with open(filepath, "r", encoding="utf-8") as file:
-            content = file.read()
-            # 移除换行符
-            content = content.replace("\n", " ").replace("\r", "")
-            # 使用正则表达式来匹配以A9 9A开头，0D 0A结尾的内容
-            matches = re.findall(r"(A9 9A.*?0D 0A)", content, re.DOTALL)
-            self.data_buffer = matches
-
-    def send_data_from_buffer(self):
-        for data in self.data_buffer:
-            print(data)
-            hex_data = bytes.fromhex(data)
-            print(hex_data)
-            self.send_data(hex_data)
-            time.sleep(1)  # 每秒发送一组数据
+        """加载待发送的帧；如果是带时间戳的接收日志，同时记录每帧的采集时间"""
+        frames = []
+        timestamps = []
+        for ts_ns, frame in iter_log_frames(filepath):
+            timestamps.append(ts_ns / 1e9)
+            frames.append(frame)
+        if not frames:
+            # 纯十六进制文本：逐行转换为字节并增量解析以 A9 9A 开头、0D 0A 结尾的帧
+            parser = FrameParser()
+            with open(filepath, "r", encoding="utf-8") as file:
+                for line_number, line in enumerate(file, 1):
+                    try:
+                        data = bytes.fromhex(line)
+                    except ValueError:
+                        Logger.warning(f"{filepath} 第 {line_number} 行不是有效的HEX，已跳过: {line.strip()[:80]}")
+                        continue
+                    frames.extend(bytes(frame) for frame in parser.feed(data))
+        self.data_buffer = frames
+        self.data_timestamps = timestamps or None
+
+    def send_data_from_buffer(self, rate=1.0, use_capture_timing=False):
+        """回放已加载的帧：rate 为每秒帧数，None 表示按波特率全速发送"""
+        timestamps = self.data_timestamps if use_capture_timing else None
+        engine = ReplayEngine(self.data_buffer, rate=rate, timestamps=timestamps)
+        ports = []
+        for port in (self.serial_port, self.COM4_port):
+            if port and port.is_open and port not in ports:
+                ports.append(port)
+        Logger.info(f"开始回放 {len(self.data_buffer)} 帧。")
+        stats = engine.run(*ports)
+        Logger.info(engine.format_stats())
+        return stats
 
     def start(self):
         available_ports = self.list_ports()
@@ -122,8 +146,20 @@ class SerialDebugger:
         data_file_path = "./data/data 01.txt"
         self.load_data_from_file(data_file_path)
 
-        # 开始每秒发送一组数据
-        self.send_data_from_buffer()
+        # 按设定的速率回放
+        while True:
+            rate_input = input("请输入发送速率（帧/秒，默认 1；输入 0 按波特率全速发送；输入 c 按采集时间回放）：") or "1"
+            if rate_input.lower() == 'c':
+                self.send_data_from_buffer(use_capture_timing=True)
+                break
+            try:
+                rate = float(rate_input)
+            except ValueError:
+                rate = -1
+            if 0 <= rate < float('inf'):
+                self.send_data_from_buffer(rate or None)
+                break
+            Logger.warning(f"无效的发送速率: {rate_input}，请重新输入。")
 
         while True:
             cmd = input("如果需要发送数据\n请输入要发送的16进制数据（输入 'q' 退出）：\n")
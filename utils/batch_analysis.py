@@ -0,0 +1,353 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.frame_decoder import FRAME_LEN, decode_frames
+from utils.sequence_tracker import GAP, REORDER, SequenceTracker
+
+# 日志行中接收数据的标记，与 Analyzed.py 相同
+RECEIVE_MARKERS = (b"- \xe6\x8e\xa5\xe6\x94\xb6 :", b"- \xe6\x8e\xa5\xe6\x94\xb6 (HEX):")  # "- 接收 :"、"- 接收 (HEX):"
+VALUE_FIELDS = ('voltage', 'temperature', 'data1', 'data2', 'data3', 'data4')
+RAW_EXTENSIONS = ('.bin', '.raw')
+SEARCH_WINDOW = 1 << 16
+# 每块保留的开头若干个数据编号，合并时用来衔接前一块的判定状态
+HEAD_FRAMES = 128
+SEQ_COUNTERS = ('received', 'missing', 'duplicates', 'reordered', 'wraps', 'resets')
+FRAME_START = b'\xA9\x9A\x34'
+FRAME_END = b'\r\n'
+
+
+def input_kind(path):
+    """gz 压缩日志只能整体处理；.bin/.raw 为二进制帧流；其余按十六进制文本日志处理"""
+    if path.endswith('.gz'):
+        return 'gz'
+    return 'raw' if path.endswith(RAW_EXTENSIONS) else 'text'
+
+
+def _line_hex(line):
+    """接收日志行中的十六进制部分（bytes），不是接收日志时返回 None"""
+    for marker in RECEIVE_MARKERS:
+        index = line.find(marker)
+        if index >= 0:
+            return line[index + len(marker):].strip()
+    return None
+
+
+def _line_bytes(line):
+    """接收日志行中的数据字节，不是接收日志或十六进制不合法时返回 None"""
+    hex_text = _line_hex(line)
+    if not hex_text:
+        return None
+    try:
+        return bytes.fromhex(hex_text.decode('ascii'))
+    except ValueError:
+        return None
+
+
+def _text_to_bytes(lines):
+    """文本日志行中的数据拼接为原始字节流"""
+    return b''.join(data for data in map(_line_bytes, lines) if data)
+
+
+def _find_text_boundary(f, offset):
+    """offset 之后第一个同时满足以下条件的行首：上一段数据以 0D 0A 结束、本行以 A9 9A 34 开头、
+    第 52 字节处是帧尾。在这里切开，两边都不会有跨界的帧。找不到时返回 None"""
+    f.seek(offset)
+    window = f.read(SEARCH_WINDOW)
+    newline = window.find(b'\n')
+    if newline < 0:
+        return None
+    lines = window[newline + 1:].splitlines(keepends=True)
+    if len(window) == SEARCH_WINDOW and lines:
+        lines.pop()  # 窗口末尾可能是不完整的行
+    position = offset + newline + 1
+    previous = b''
+    for index, line in enumerate(lines):
+        data = _line_bytes(line)
+        if data:
+            if previous.endswith(FRAME_END) and data.startswith(FRAME_START):
+                # 确认第 52 字节处是帧尾，数据可能跨越后面几行
+                frame = data
+                for following in lines[index + 1:]:
+                    if len(frame) >= FRAME_LEN:
+                        break
+                    frame += _line_bytes(following) or b''
+                if frame[FRAME_LEN - 2:FRAME_LEN] == FRAME_END:
+                    return position
+            previous = data
+        position += len(line)
+    return None
+
+
+def _find_raw_boundary(f, offset):
+    """二进制帧流中 offset 之后第一个前一帧以 0D 0A 结束、以 A9 9A 34 开头且帧尾位置正确的起点"""
+    f.seek(max(0, offset - 2))
+    window = f.read(SEARCH_WINDOW)
+    base = max(0, offset - 2)
+    index = window.find(FRAME_START, 2)
+    while index >= 0:
+        if window[index - 2:index] == FRAME_END and window[index + FRAME_LEN - 2:index + FRAME_LEN] == FRAME_END:
+            return base + index
+        index = window.find(FRAME_START, index + 1)
+    return None
+
+
+def split_file(path, chunk_bytes):
+    """按字节范围把一个文件切成若干 (path, start, end)，切点都落在帧边界上"""
+    size = os.path.getsize(path)
+    kind = input_kind(path)
+    if kind == 'gz' or size <= chunk_bytes:
+        return [(path, 0, size)]
+    find = _find_raw_boundary if kind == 'raw' else _find_text_boundary
+    points = [0]
+    with open(path, 'rb') as f:
+        offset = chunk_bytes
+        while offset < size:
+            boundary = find(f, offset)
+            if boundary is None:
+                offset += SEARCH_WINDOW
+                continue
+            if boundary > points[-1]:
+                points.append(boundary)
+            offset = max(boundary, offset) + chunk_bytes
+    points.append(size)
+    return [(path, start, end) for start, end in zip(points, points[1:]) if end > start]
+
+
+def _read_chunk(path, start, end):
+    """读取一个分块，返回原始帧字节流"""
+    kind = input_kind(path)
+    if kind == 'gz':
+        with gzip.open(path, 'rb') as f:
+            return _text_to_bytes(f.read().splitlines())
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return data if kind == 'raw' else _text_to_bytes(data.splitlines())
+
+
+def _chunk_sequence(path, seqs):
+    """一个分块的数据编号统计。数据编号由端口上的网关统一递增，一个文件是一个数据流，按到达顺序逐帧统计，
+    与在线的 SequenceTracker 一致。前 HEAD_FRAMES 帧单独记下，合并时从前一块的状态重放；之后的帧记录丢包计数的变化轨迹
+    """
+    head = seqs[:HEAD_FRAMES]
+    walk = [0, 0]
+
+    def on_event(event):
+        if event['type'] == GAP:
+            change = event['lost']
+        elif event['type'] == REORDER:
+            change = -1  # 迟到帧冲减丢包，但丢包数不低于 0
+        else:
+            return
+        walk[0] += change
+        walk[1] = max(0, walk[1] + change)
+
+    tracker = SequenceTracker()
+    for seq in head:
+        tracker.observe(path, seq)
+    head_stats = tracker.stats(path)
+    head_snapshot = tracker.snapshot(path)
+    tracker.on_event = on_event
+    for seq in seqs[HEAD_FRAMES:]:
+        tracker.observe(path, seq)
+
+    stats = tracker.stats(path)
+    del stats['loss_rate']
+    stats['first_seq'] = head[0]
+    stats['head'] = head
+    stats['head_counts'] = {key: head_stats[key] for key in SEQ_COUNTERS}
+    stats['head_snapshot'] = head_snapshot
+    stats['suffix_walk'] = tuple(walk)
+    stats['snapshot'] = tracker.snapshot(path)
+    stats['frames'] = len(seqs)
+    return stats
+
+
+def analyze_chunk(path, start, end):
+    """在工作进程中解码一个分块：整个分块的数据编号统计，以及按设备聚合的帧数、帧内时间范围、各数值的均值和方差"""
+    stream = _read_chunk(path, start, end)
+    decoded = decode_frames(stream)
+    # 首尾相接的分块走结构化视图，会保留长度或帧尾损坏的帧；与 FrameParser 一致，把它们当作垃圾字节
+    data = np.frombuffer(stream, dtype=np.uint8)
+    offsets = decoded['offset']
+    intact = ((data[offsets + 2] == FRAME_LEN) & (data[offsets + FRAME_LEN - 2] == 0x0D)
+              & (data[offsets + FRAME_LEN - 1] == 0x0A)) if len(offsets) else np.ones(0, dtype=bool)
+    if not intact.all():
+        decoded = {key: value[intact] for key, value in decoded.items()}
+    frames = len(decoded['offset'])
+    result = {
+        'path': path,
+        'start': start,
+        'bytes': len(stream),
+        'frames': frames,
+        'invalid': int(np.count_nonzero(~decoded['valid'])),
+        'garbage_bytes': len(stream) - frames * FRAME_LEN,
+        'sequence': None,
+        'devices': {},
+    }
+    if not frames:
+        return result
+    result['sequence'] = _chunk_sequence(path, decoded['seq'].tolist())
+
+    # 数值统计按设备分组向量化计算：数量、均值、离差平方和、最小、最大
+    device_ids, inverse = np.unique(decoded['device_id'], return_inverse=True)
+    counts = np.bincount(inverse)
+    values = {'voltage': decoded['voltage'], 'temperature': decoded['temperature']}
+    for i in range(4):
+        values[f'data{i + 1}'] = decoded['channels'][:, i]
+    order = np.argsort(inverse, kind='stable')
+    group_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    field_stats = {}
+    for name in VALUE_FIELDS:
+        x = values[name].astype(np.float64)
+        mean = np.bincount(inverse, weights=x) / counts
+        m2 = np.bincount(inverse, weights=(x - mean[inverse]) ** 2)
+        ordered = x[order]
+        field_stats[name] = (mean.tolist(), m2.tolist(), np.minimum.reduceat(ordered, group_starts).tolist(),
+                             np.maximum.reduceat(ordered, group_starts).tolist())
+
+    times = decoded['timestamp']
+    has_time = ~np.isnat(times)
+    seconds = np.where(has_time, times.astype(np.int64), 0)
+    big = np.iinfo(np.int64).max
+    first_time = np.full(len(device_ids), big, dtype=np.int64)
+    last_time = np.full(len(device_ids), -big, dtype=np.int64)
+    np.minimum.at(first_time, inverse[has_time], seconds[has_time])
+    np.maximum.at(last_time, inverse[has_time], seconds[has_time])
+
+    for index, device_id in enumerate(device_ids.tolist()):
+        result['devices'][device_id] = {
+            'frames': int(counts[index]),
+            'first_time': int(first_time[index]) if first_time[index] != big else None,
+            'last_time': int(last_time[index]) if last_time[index] != -big else None,
+            'values': {name: (int(counts[index]), field_stats[name][0][index], field_stats[name][1][index],
+                              field_stats[name][2][index], field_stats[name][3][index])
+                       for name in VALUE_FIELDS},
+        }
+    return result
+
+
+def _merge_values(a, b):
+    """合并两组 (数量, 均值, 离差平方和, 最小, 最大)，并行方差公式"""
+    n_a, mean_a, m2_a, min_a, max_a = a
+    n_b, mean_b, m2_b, min_b, max_b = b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    return (n, mean_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n,
+            min(min_a, min_b), max(max_a, max_b))
+
+
+def _stitch(merged, part):
+    """把同一文件中下一个分块的数据编号统计接到前面
+
+    分块内的计数是从空状态开始得到的。从前一块结束时的状态（含已记丢包数）重放该块开头的 head，
+    重放后的判定状态（最大序号和到达位图）与分块内 head 结束时一致时，之后的判定完全相同：
+    收到、重复、乱序等计数直接累加，丢包数按 head 之后记录的轨迹 (净变化 a, 从 0 出发的终值 b)
+    计算为 max(重放后的丢包数 + a, b)。状态不一致（head 内有严重错乱的编号）时同样按此近似。
+    """
+    continued = SequenceTracker()
+    continued.restore(0, merged['snapshot'], merged['missing'])
+    for seq in part['head']:
+        continued.observe(0, seq)
+    replayed = continued.stats(0)
+    net, floor = part['suffix_walk']
+    for key in SEQ_COUNTERS:
+        if key != 'missing':
+            merged[key] += replayed[key] + part[key] - part['head_counts'][key]
+    merged['missing'] = max(replayed['missing'] + net, floor)
+    merged['frames'] += part['frames']
+    merged['snapshot'] = part['snapshot'] if part['frames'] > len(part['head']) else continued.snapshot(0)
+    merged['highest'] = merged['snapshot'][0]
+
+
+def _merge_times_values(merged, part):
+    for key, pick in (('first_time', min), ('last_time', max)):
+        times = [t for t in (merged[key], part[key]) if t is not None]
+        merged[key] = pick(times) if times else None
+    merged['values'] = {name: _merge_values(merged['values'][name], part['values'][name]) for name in VALUE_FIELDS}
+
+
+def merge_results(results):
+    """合并所有分块结果，返回 (汇总, 各文件的数据编号统计, 各设备的统计)
+
+    同一文件（一个端口的数据流）的分块按顺序衔接数据编号；设备统计跨文件累加，并按文件记下各设备的帧数。
+    """
+    totals = {'files': 0, 'chunks': len(results), 'bytes': 0, 'frames': 0, 'invalid': 0, 'garbage_bytes': 0}
+    streams = {}
+    devices = {}
+    paths = set()
+    for result in sorted(results, key=lambda r: (r['path'], r['start'])):
+        for key in ('bytes', 'frames', 'invalid', 'garbage_bytes'):
+            totals[key] += result[key]
+        paths.add(result['path'])
+        part = result['sequence']
+        if part is None:
+            continue
+        merged = streams.get(result['path'])
+        if merged is None:
+            merged = streams[result['path']] = dict(part, device_frames={})
+        else:
+            _stitch(merged, part)
+        for device_id, device in result['devices'].items():
+            merged['device_frames'][device_id] = merged['device_frames'].get(device_id, 0) + device['frames']
+            known = devices.get(device_id)
+            if known is None:
+                devices[device_id] = dict(device)
+            else:
+                known['frames'] += device['frames']
+                _merge_times_values(known, device)
+    totals['files'] = len(paths)
+    return totals, streams, devices
+
+
+def analyze(paths, jobs=None, chunk_bytes=None):
+    """多进程批量分析：按文件和字节范围切块，分发到进程池，合并各块结果
+
+    chunk_bytes 为 None 时按总大小和进程数自动选择，使每个进程分到约 4 块。
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if chunk_bytes is None:
+        total = sum(os.path.getsize(path) for path in paths)
+        chunk_bytes = max(1 << 20, total // (jobs * 4) + 1)
+    chunks = [chunk for path in paths for chunk in split_file(path, chunk_bytes)]
+    # 大块先提交，减少最后只剩一个进程在忙的时间
+    chunks.sort(key=lambda chunk: chunk[2] - chunk[1], reverse=True)
+    if jobs == 1:
+        results = [analyze_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(analyze_chunk, *zip(*chunks))) if chunks else []
+    return merge_results(results)
+
+
+def summarize_streams(streams):
+    """各文件的数据编号统计：收到、丢失、重复、乱序、重启、丢包率，以及各设备的帧数"""
+    summary = {}
+    for path in sorted(streams):
+        stats = streams[path]
+        expected = stats['received'] + stats['missing']
+        item = {key: stats[key] for key in ('frames', 'received', 'missing', 'duplicates', 'reordered',
+                                             'wraps', 'resets', 'first_seq', 'highest')}
+        item['loss_rate'] = stats['missing'] / expected if expected else 0.0
+        item['devices'] = dict(sorted(stats['device_frames'].items()))
+        summary[path] = item
+    return summary
+
+
+def summarize(devices):
+    """设备统计转为便于输出的字典：数值给出 均值/标准差/最小/最大，时间为 ISO 字符串"""
+    summary = {}
+    for device_id in sorted(devices):
+        stats = devices[device_id]
+        item = {'frames': stats['frames']}
+        for key in ('first_time', 'last_time'):
+            item[key] = (str(np.datetime64(stats[key], 's')).replace('T', ' ')
+                         if stats[key] is not None else None)
+        item['values'] = {}
+        for name, (n, mean, m2, low, high) in stats['values'].items():
+            item['values'][name] = {'mean': mean, 'std': (m2 / n) ** 0.5 if n else 0.0, 'min': low, 'max': high}
+        summary[device_id] = item
+    return summary
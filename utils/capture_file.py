@@ -0,0 +1,283 @@
+import bisect
+import glob
+import mmap
+import os
+import struct
+import time
+import zlib
+
+# 段文件头：魔数、版本、保留、墙上时钟基准(ns)、单调时钟基准(ns)
+SEGMENT_HEADER = struct.Struct('<4sHHqq')
+SEGMENT_MAGIC = b'SCAP'
+# 版本 1：记录依次直接写入；版本 2：记录攒成块后 zlib 压缩写入
+SEGMENT_VERSION = 2
+SEGMENT_VERSIONS = (1, 2)
+# 记录头：单调时钟时间戳(ns)、端口号、数据长度
+RECORD_HEADER = struct.Struct('<qHH')
+MAX_RECORD_BYTES = 0xFFFF
+# 压缩块头：块内第一条记录的时间戳(ns)、压缩后长度、压缩前长度
+BLOCK_HEADER = struct.Struct('<qII')
+# 稀疏索引项：单调时钟时间戳(ns)、记录（版本 2 为块）在段文件中的偏移
+INDEX_ENTRY = struct.Struct('<qQ')
+
+SEGMENT_SUFFIX = '.scap'
+INDEX_SUFFIX = '.sidx'
+
+
+class CaptureWriter:
+    """二进制采集文件写入器
+
+    每条记录为 (单调时钟 ns, 端口号, 原始字节)。串口一次读到的往往只是一帧的一小段，
+    同一端口在 coalesce_ns 之内的连续写入合并为一条记录（时间戳取第一段的），不再每段各带一个记录头。
+    记录攒满 block_bytes（或块内最早的记录已超过 block_ns）后整块 zlib 压缩写出，按大小滚动成段文件，
+    每个段文件旁边有一个稀疏时间索引，每块一项。compress=False 时写版本 1 的未压缩段，每 index_every 条记录一项索引。
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, index_every=256,
+                 wall_base_ns=None, mono_base_ns=None, coalesce_ns=100_000_000,
+                 compress=True, block_bytes=64 * 1024, block_ns=None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.index_every = index_every
+        # 从其它来源转换数据时可以指定时钟基准，例如两者都为 0 表示时间戳本身就是墙上时间
+        self.wall_base_ns = wall_base_ns
+        self.mono_base_ns = mono_base_ns
+        self.coalesce_ns = coalesce_ns
+        self.compress = compress
+        self.block_bytes = block_bytes
+        self.block_ns = block_ns
+        os.makedirs(directory, exist_ok=True)
+        existing = list_segments(directory)
+        self._next_number = segment_number(existing[-1]) + 1 if existing else 1
+        self._segment = None
+        self._index = None
+        self._size = 0
+        self._count = 0
+        # 正在合并的记录 [端口号, 第一段时间戳, 数据]
+        self._pending = None
+        self._block = bytearray()
+        self._block_ts = None
+        self.records = 0
+        self.bytes_written = 0
+
+    def _open_segment(self):
+        path = os.path.join(self.directory, f"segment-{self._next_number:06d}{SEGMENT_SUFFIX}")
+        self._next_number += 1
+        self._segment = open(path, 'wb', buffering=1 << 20)
+        self._index = open(path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX, 'wb')
+        wall = time.time_ns() if self.wall_base_ns is None else self.wall_base_ns
+        mono = time.monotonic_ns() if self.mono_base_ns is None else self.mono_base_ns
+        version = SEGMENT_VERSION if self.compress else 1
+        self._segment.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, version, 0, wall, mono))
+        self._size = SEGMENT_HEADER.size
+        self._count = 0
+
+    def _next_segment(self):
+        if self._segment is None or self._size >= self.segment_bytes:
+            self._close_segment()
+            self._open_segment()
+
+    def write(self, port_id, data, ts_ns=None):
+        """写入一段数据，ts_ns 默认取当前单调时钟"""
+        if ts_ns is None:
+            ts_ns = time.monotonic_ns()
+        pending = self._pending
+        if pending is not None:
+            if (pending[0] == port_id and ts_ns - pending[1] <= self.coalesce_ns
+                    and len(pending[2]) + len(data) <= MAX_RECORD_BYTES):
+                pending[2] += data
+                return
+            self._write_record(*pending)
+        self._pending = [port_id, ts_ns, bytearray(data)]
+
+    def _write_record(self, port_id, ts_ns, data):
+        record = RECORD_HEADER.pack(ts_ns, port_id, len(data)) + data
+        self.records += 1
+        if self.compress:
+            if not self._block:
+                self._block_ts = ts_ns
+            self._block += record
+            if len(self._block) >= self.block_bytes or (
+                    self.block_ns is not None and ts_ns - self._block_ts >= self.block_ns):
+                self._write_block()
+            return
+        self._next_segment()
+        if self._count % self.index_every == 0:
+            self._index.write(INDEX_ENTRY.pack(ts_ns, self._size))
+        self._segment.write(record)
+        self._size += len(record)
+        self._count += 1
+        self.bytes_written += len(record)
+
+    def _write_block(self):
+        if not self._block:
+            return
+        self._next_segment()
+        body = zlib.compress(self._block)
+        self._index.write(INDEX_ENTRY.pack(self._block_ts, self._size))
+        self._segment.write(BLOCK_HEADER.pack(self._block_ts, len(body), len(self._block)))
+        self._segment.write(body)
+        size = BLOCK_HEADER.size + len(body)
+        self._size += size
+        self._count += 1
+        self.bytes_written += size
+        self._block = bytearray()
+
+    def flush(self):
+        """写出正在合并的记录和未满的块，并刷新到文件"""
+        if self._pending is not None:
+            self._write_record(*self._pending)
+            self._pending = None
+        self._write_block()
+        if self._segment is not None:
+            self._segment.flush()
+            self._index.flush()
+
+    def _close_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._index.close()
+            self._segment = None
+            self._index = None
+
+    def close(self):
+        self.flush()
+        self._close_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_records(view, pos=0):
+    """从 pos 开始依次解出记录，产出 (下一条记录的偏移, 时间戳, 端口号, 数据)；不产出末尾不完整的记录"""
+    header_size = RECORD_HEADER.size
+    size = len(view)
+    while pos + header_size <= size:
+        ts, port_id, length = RECORD_HEADER.unpack_from(view, pos)
+        body = pos + header_size
+        if body + length > size:
+            return  # 写入中途被截断的最后一条记录
+        pos = body + length
+        yield pos, ts, port_id, view[body:pos]
+
+
+def iter_blocks(view, pos=0):
+    """从 pos 开始依次解压版本 2 段文件中的块，产出 (下一块的偏移, 块内记录的字节)；不产出末尾不完整的块"""
+    size = len(view)
+    while pos + BLOCK_HEADER.size <= size:
+        _, length, _ = BLOCK_HEADER.unpack_from(view, pos)
+        body = pos + BLOCK_HEADER.size
+        if body + length > size:
+            return  # 写入中途被截断的最后一块
+        pos = body + length
+        yield pos, memoryview(zlib.decompress(view[body:pos]))
+
+
+def list_segments(directory):
+    return sorted(glob.glob(os.path.join(directory, f"segment-*{SEGMENT_SUFFIX}")))
+
+
+def segment_number(path):
+    return int(os.path.basename(path)[len('segment-'):-len(SEGMENT_SUFFIX)])
+
+
+class CaptureSegment:
+    """通过 mmap 只读访问单个段文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        if self.size < SEGMENT_HEADER.size:
+            raise ValueError(f"段文件不完整: {path}")
+        magic, self.version, _, self.wall_base_ns, self.mono_base_ns = SEGMENT_HEADER.unpack_from(self._mmap, 0)
+        if magic != SEGMENT_MAGIC or self.version not in SEGMENT_VERSIONS:
+            raise ValueError(f"不是有效的采集段文件: {path}")
+        self.index_times = []
+        self.index_offsets = []
+        index_path = path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                raw = f.read()
+            for ts, offset in INDEX_ENTRY.iter_unpack(raw[:len(raw) - len(raw) % INDEX_ENTRY.size]):
+                self.index_times.append(ts)
+                self.index_offsets.append(offset)
+
+    def to_wall(self, ts_ns):
+        return self.wall_base_ns + (ts_ns - self.mono_base_ns)
+
+    def to_mono(self, wall_ns):
+        return wall_ns - self.wall_base_ns + self.mono_base_ns
+
+    def seek_offset(self, wall_ns):
+        """根据稀疏索引返回不晚于 wall_ns 的第一条记录所在区域的起始偏移"""
+        if wall_ns is None or not self.index_times:
+            return SEGMENT_HEADER.size
+        i = bisect.bisect_right(self.index_times, self.to_mono(wall_ns)) - 1
+        return self.index_offsets[i] if i >= 0 else SEGMENT_HEADER.size
+
+    def records(self, start_ns=None, end_ns=None, offset=None):
+        """遍历记录，产出 (墙上时间 ns, 端口号, memoryview)；end_ns 之后停止"""
+        buf = memoryview(self._mmap)
+        pos = self.seek_offset(start_ns) if offset is None else offset
+        start_mono = None if start_ns is None else self.to_mono(start_ns)
+        end_mono = None if end_ns is None else self.to_mono(end_ns)
+        if self.version == 1:
+            records = iter_records(buf, pos)
+        else:
+            records = (record for _, block in iter_blocks(buf, pos) for record in iter_records(block))
+        for _, ts, port_id, data in records:
+            if start_mono is not None and ts < start_mono:
+                continue
+            if end_mono is not None and ts >= end_mono:
+                break
+            yield self.to_wall(ts), port_id, data
+
+    def first_time(self):
+        for wall, _, _ in self.records():
+            return wall
+        return None
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # 仍有记录视图被引用，交给垃圾回收释放
+        self._file.close()
+
+
+class CaptureReader:
+    """按时间读取一个目录下的所有段文件"""
+
+    def __init__(self, directory):
+        self.segments = [CaptureSegment(path) for path in list_segments(directory)]
+        self._starts = [segment.first_time() for segment in self.segments]
+
+    def records(self, start_ns=None, end_ns=None, port_id=None):
+        """按时间范围（墙上时间 ns，左闭右开）和端口号遍历记录"""
+        first = 0
+        if start_ns is not None:
+            # 跳过整段都早于 start_ns 的段文件
+            starts = [s if s is not None else -1 for s in self._starts]
+            first = max(bisect.bisect_right(starts, start_ns) - 1, 0)
+        for segment, seg_start in zip(self.segments[first:], self._starts[first:]):
+            if end_ns is not None and seg_start is not None and seg_start >= end_ns:
+                break
+            for record in segment.records(start_ns, end_ns):
+                if port_id is None or record[1] == port_id:
+                    yield record
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
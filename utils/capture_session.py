@@ -0,0 +1,213 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import serial
+
+from utils.frame_parser import FrameParser
+from utils.hex_codec import to_hex
+from utils.logger import Logger
+from utils.scheduler import CronSpec, Scheduler
+from utils.sequence_tracker import SequenceTracker
+from utils.serial_reader import SerialReader
+
+
+def format_timestamp(ts):
+    """与接收日志一致的时间格式：2024-09-20 17:22:21,107"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)) + f",{int(ts * 1000) % 1000:03d}"
+
+
+class CaptureSession:
+    """一个采集时间窗口：打开串口，把解析出的帧写入本窗口自己的日志，结束时写摘要
+
+    停止时先让读线程退出，再取走串口缓冲区中已到达的数据，最后关闭文件，不丢已缓冲的字节。
+    """
+
+    def __init__(self, name, port_name, baudrate=9600, output_dir=os.path.join('logs', 'sessions')):
+        self.name = name
+        self.port_name = port_name
+        self.baudrate = baudrate
+        self.output_dir = output_dir
+        self.parser = FrameParser(name=port_name)
+        self.sequences = SequenceTracker()
+        self.serial_port = None
+        self.reader = None
+        self.started_at = None
+        self.stopped_at = None
+        self.frames = 0
+        self.log_path = None
+        self._log = None
+
+    def start(self):
+        self.started_at = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        base = os.path.join(self.output_dir, f"{self.name}-{stamp}")
+        try:
+            self.serial_port = serial.serial_for_url(self.port_name, self.baudrate, timeout=1)
+        except Exception as e:
+            Logger.error(f"采集窗口 {self.name} 打开串口 {self.port_name} 失败: {e}")
+            return False
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.log_path = base + '.log'
+        self._log = open(self.log_path, 'a', encoding='utf-8', buffering=1 << 16)
+        self.reader = SerialReader(self.serial_port, name=self.port_name,
+                                   parser=self.parser, on_frames=self.handle_frames)
+        self.reader.start()
+        Logger.info(f"采集窗口 {self.name} 开始：{self.port_name}，波特率 {self.baudrate}，写入 {self.log_path}")
+        return True
+
+    def handle_frames(self, frames):
+        """读线程回调：帧写入窗口日志，同时统计数据编号"""
+        stamp = format_timestamp(time.time())
+        lines = []
+        for frame in frames:
+            if len(frame) >= 12:
+                # 数据编号由端口上的网关统一递增，一个窗口就是一个数据流
+                self.sequences.observe(self.port_name, int.from_bytes(frame[8:12], 'big'),
+                                       int.from_bytes(frame[3:7], 'big'))
+            lines.append(f"{stamp} - 接收 : {to_hex(frame)}\n")
+        self._log.write(''.join(lines))
+        self.frames += len(frames)
+
+    def stop(self):
+        """停止采集并写出摘要，返回摘要字典"""
+        if self.reader is None:
+            return None
+        self.reader.stop(drain=True)
+        self.serial_port.close()
+        self.stopped_at = time.time()
+        self._log.close()
+        summary = self.summary()
+        with open(self.log_path[:-len('.log')] + '.summary.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        Logger.info(f"采集窗口 {self.name} 结束：{summary['frames']} 帧 / {summary['bytes']} 字节，"
+                    f"丢失 {summary['gaps']} 帧，重复 {summary['duplicates']} 帧，"
+                    f"未完成 {summary['pending_bytes']} 字节")
+        self.reader = None
+        return summary
+
+    def summary(self):
+        # 还没有收到帧时数据流不存在，计数全为 0
+        totals = self.sequences.stats(self.port_name) or self.sequences.totals()
+        return {
+            'name': self.name,
+            'port': self.port_name,
+            'baudrate': self.baudrate,
+            'start': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'end': datetime.fromtimestamp(self.stopped_at or time.time()).isoformat(timespec='seconds'),
+            'duration_s': round((self.stopped_at or time.time()) - self.started_at, 3),
+            'frames': self.frames,
+            'bytes': self.parser.bytes_in,
+            'garbage_bytes': self.parser.garbage_bytes,
+            'pending_bytes': self.parser.pending,
+            'devices': len(self.sequences.devices()),
+            'device_frames': {str(device_id): count
+                              for device_id, count in sorted(self.sequences.device_frames.items())},
+            'gaps': totals['missing'],
+            'duplicates': totals['duplicates'],
+            'reordered': totals['reordered'],
+            'loss_rate': totals['loss_rate'],
+            'log': self.log_path,
+        }
+
+
+class SessionScheduler:
+    """在一个进程里按计划运行多个采集窗口，所有定时由同一个 Scheduler 线程驱动
+
+    每个窗口配置：
+      name      窗口名，用于输出文件名
+      port      串口名或 pyserial URL
+      baudrate  波特率，默认 9600
+      duration  每次采集的秒数
+      start     可选，首次开始时间 'YYYY-mm-dd HH:MM:SS'，默认立即开始
+      cron      可选，五段式 cron 表达式，按计划重复开始
+      count     可选，与 cron 一起使用时的最大次数
+    同一个串口上的窗口不会重叠：到点时串口仍被占用则跳过本次。
+    """
+
+    def __init__(self, windows, output_dir=os.path.join('logs', 'sessions')):
+        self.windows = windows
+        self.output_dir = output_dir
+        self.scheduler = Scheduler('capture-sessions')
+        self.active = {}
+        self.summaries = []
+        self._remaining = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+
+    def start(self):
+        for window in self.windows:
+            self._remaining[window['name']] = window.get('count') if window.get('cron') else 1
+        self.scheduler.start()
+        for window in self.windows:
+            self._schedule_next(window, datetime.now())
+
+    def _schedule_next(self, window, after):
+        remaining = self._remaining[window['name']]
+        if remaining is not None and remaining <= 0:
+            self._check_idle()
+            return
+        if window.get('cron'):
+            moment = CronSpec(window['cron']).next_after(after)
+            if window.get('start'):
+                moment = max(moment, datetime.strptime(window['start'], '%Y-%m-%d %H:%M:%S'))
+        elif window.get('start'):
+            moment = datetime.strptime(window['start'], '%Y-%m-%d %H:%M:%S')
+        else:
+            moment = after
+        Logger.info(f"采集窗口 {window['name']} 计划于 {moment:%Y-%m-%d %H:%M:%S} 开始")
+        self.scheduler.call_at_datetime(moment, self._open, window)
+
+    def _open(self, window):
+        name = window['name']
+        if self._remaining[name] is not None:
+            self._remaining[name] -= 1
+        port_name = window['port']
+        with self._lock:
+            busy = port_name in self.active
+        if busy:
+            Logger.warning(f"串口 {port_name} 仍在被其它窗口使用，跳过本次采集窗口 {name}")
+        else:
+            session = CaptureSession(name, port_name, window.get('baudrate', 9600), self.output_dir)
+            if session.start():
+                with self._lock:
+                    self.active[port_name] = session
+                self.scheduler.call_later(window['duration'], self._close, session)
+        if window.get('cron'):
+            self._schedule_next(window, datetime.now())
+        else:
+            self._check_idle()
+
+    def _close(self, session):
+        with self._lock:
+            if self.active.get(session.port_name) is not session:
+                return  # 已被 stop() 结束
+            del self.active[session.port_name]
+        summary = session.stop()
+        with self._lock:
+            if summary is not None:
+                self.summaries.append(summary)
+        self._check_idle()
+
+    def _check_idle(self):
+        """所有窗口都不再有后续计划且没有正在采集的窗口时，wait() 返回"""
+        with self._lock:
+            done = not self.active and all(r is not None and r <= 0 for r in self._remaining.values())
+        if done:
+            self._idle.set()
+
+    def wait(self, timeout=None):
+        return self._idle.wait(timeout)
+
+    def stop(self):
+        """立即结束所有正在进行的窗口（同样写出摘要）并停止调度"""
+        self.scheduler.stop()
+        with self._lock:
+            sessions = list(self.active.values())
+            self.active.clear()
+        for session in sessions:
+            summary = session.stop()
+            if summary is not None:
+                self.summaries.append(summary)
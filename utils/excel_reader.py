@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+
+CACHE_VERSION = 1
+
+
+def iter_column(excel_file, column=4, min_row=2):
+    """以只读流式模式逐个产出某一列的非空单元格值，不加载样式和整个工作表"""
+    wb = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        for (value,) in ws.iter_rows(min_row=min_row, min_col=column, max_col=column, values_only=True):
+            if value is not None:
+                yield value
+    finally:
+        wb.close()
+
+
+def file_digest(path, chunk_size=1 << 20):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def cache_path_for(excel_file, column):
+    return f"{excel_file}.col{get_column_letter(column)}.cache"
+
+
+def _load_cache(cache_path, excel_file, column, min_row):
+    """缓存有效时返回缓存的列数据，否则返回 None
+
+    修改时间和大小都一致时直接命中；仅修改时间变化（例如被复制过）时再比对内容哈希。
+    """
+    if not os.path.exists(cache_path):
+        return None
+    stat = os.stat(excel_file)
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return None
+        if (header.get('version') != CACHE_VERSION or header.get('column') != column
+                or header.get('min_row') != min_row or header.get('size') != stat.st_size):
+            return None
+        if header.get('mtime_ns') != stat.st_mtime_ns and header.get('sha1') != file_digest(excel_file):
+            return None
+        return [json.loads(line) for line in f]
+
+
+def _write_cache(cache_path, excel_file, column, min_row, values):
+    stat = os.stat(excel_file)
+    header = {
+        'version': CACHE_VERSION,
+        'column': column,
+        'min_row': min_row,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha1': file_digest(excel_file),
+        'count': len(values),
+    }
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header) + '\n')
+        for value in values:
+            f.write(json.dumps(value, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, cache_path)
+
+
+def read_column_cached(excel_file, column=4, min_row=2):
+    """读取一列数据（统一转为字符串），结果缓存在 Excel 文件旁的 .cache 文件中，文件未变化时跳过 Excel 解析"""
+    cache_path = cache_path_for(excel_file, column)
+    values = _load_cache(cache_path, excel_file, column, min_row)
+    if values is None:
+        values = [str(value) for value in iter_column(excel_file, column, min_row)]
+        try:
+            _write_cache(cache_path, excel_file, column, min_row, values)
+        except OSError:
+            pass  # 目录只读时不缓存
+    return values
@@ -0,0 +1,170 @@
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from utils.frame_decoder import FRAME_DTYPE, FRAME_LEN, SEPARATOR_FIELDS, decode_frames, encode_frame
+
+# timestamp: 帧内时间（设备本地时间）；recv_time: 接收时的墙上时间；port: 端口号（采集服务的 id）
+FrameRow = namedtuple('FrameRow', 'device_id seq timestamp recv_time port voltage temperature channels')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    device_id   INTEGER NOT NULL,
+    seq         INTEGER NOT NULL,
+    ts          INTEGER NOT NULL,
+    recv_ms     INTEGER NOT NULL,
+    port        INTEGER,
+    voltage     INTEGER,
+    temperature INTEGER,
+    data1       INTEGER,
+    data2       INTEGER,
+    data3       INTEGER,
+    data4       INTEGER
+);
+CREATE INDEX IF NOT EXISTS frames_device_ts ON frames (device_id, ts);
+CREATE INDEX IF NOT EXISTS frames_device_seq ON frames (device_id, seq);
+"""
+
+COLUMNS = 'device_id, seq, ts, recv_ms, port, voltage, temperature, data1, data2, data3, data4'
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _local_seconds(dt):
+    """本地时间 datetime 转为与 ts 列相同的整数秒（按本地时间直接计数，不做时区换算）"""
+    return int((dt - EPOCH).total_seconds())
+
+
+def _from_local_seconds(ts):
+    return EPOCH + timedelta(seconds=ts)
+
+
+class FrameDB:
+    """解码后的帧存入 SQLite（WAL 模式），按 (设备, 时间) 和 (设备, 数据编号) 建索引
+
+    ts 列为帧内时间按本地时间计的秒数，帧内时间不合法（如 2 月 30 日）时用接收时间代替；
+    recv_ms 为接收时的墙上时间（ms）。
+    写入按批进行，一批一个事务；同一个数据库可以由一个写入方和任意多个查询方同时打开。
+    sqlite3 连接只能在创建它的线程中使用，写入方应在自己的写线程中创建 FrameDB。
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.conn = sqlite3.connect(path)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            # WAL 下 NORMAL 只在检查点时 fsync，断电最多丢失最后几个事务，不会损坏数据库
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.executescript(SCHEMA)
+        self.conn.execute('PRAGMA cache_size=-65536')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.inserted = 0
+        self.rejected = 0
+        self.time_fallbacks = 0
+
+    def insert(self, records):
+        """批量写入 [(接收时间 s, 端口号, 帧字节), ...]，返回写入的帧数
+
+        帧头、长度、分隔符或帧尾不正确的帧丢弃并计入 rejected；
+        结构完整但帧内时间不合法的帧照常写入，ts 用接收时间代替并计入 time_fallbacks。
+        """
+        records = [record for record in records if len(record[2]) == FRAME_LEN]
+        if not records:
+            return 0
+        buf = b''.join(bytes(frame) for _, _, frame in records)
+        decoded = decode_frames(buf)
+        # 帧都是 52 字节且首尾相接，offset // FRAME_LEN 即对应的记录下标
+        offsets = decoded['offset']
+        index = offsets // FRAME_LEN
+        # decode_frames 的 valid 同时包含时间检查，这里单独按帧结构判断是否保留
+        frames = np.frombuffer(buf, dtype=np.uint8).view(FRAME_DTYPE)[index]
+        intact = (offsets % FRAME_LEN == 0) & (frames['length'] == FRAME_LEN)
+        intact &= (frames['head'][:, 0] == 0xA9) & (frames['head'][:, 1] == 0x9A)
+        intact &= (frames['tail'][:, 0] == 0x0D) & (frames['tail'][:, 1] == 0x0A)
+        for name in SEPARATOR_FIELDS:
+            intact &= frames[name] == 0x2C
+        time_ok = ~np.isnat(decoded['timestamp'])
+        recv = np.array([record[0] for record in records], dtype=np.float64)[index]
+        gmtoff = time.localtime(recv[0]).tm_gmtoff if len(recv) else 0
+        ts = decoded['timestamp'].astype(np.int64)
+        ts = np.where(time_ok, ts, (recv + gmtoff).astype(np.int64))
+        channels = decoded['channels']
+        rows = zip(
+            decoded['device_id'].tolist(), decoded['seq'].tolist(), ts.tolist(),
+            (recv * 1000).astype(np.int64).tolist(), [records[i][1] for i in index.tolist()],
+            decoded['voltage'].tolist(), decoded['temperature'].tolist(),
+            channels[:, 0].tolist(), channels[:, 1].tolist(), channels[:, 2].tolist(), channels[:, 3].tolist(),
+        )
+        rows = [row for row, ok in zip(rows, intact.tolist()) if ok]
+        with self.conn:
+            self.conn.executemany(f"INSERT INTO frames ({COLUMNS}) VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows)
+        self.inserted += len(rows)
+        self.rejected += len(records) - len(rows)
+        self.time_fallbacks += int(np.count_nonzero(intact & ~time_ok))
+        return len(rows)
+
+    @staticmethod
+    def _row(row):
+        device_id, seq, ts, recv_ms, port, voltage, temperature, d1, d2, d3, d4 = row
+        return FrameRow(device_id, seq, _from_local_seconds(ts), datetime.fromtimestamp(recv_ms / 1000),
+                        port, voltage, temperature, (d1, d2, d3, d4))
+
+    def query(self, device_id, start=None, end=None, limit=None):
+        """设备在 [start, end) 内的帧（帧内时间，datetime），按时间排序"""
+        sql = f"SELECT {COLUMNS} FROM frames WHERE device_id = ?"
+        params = [device_id]
+        if start is not None:
+            sql += " AND ts >= ?"
+            params.append(_local_seconds(start))
+        if end is not None:
+            sql += " AND ts < ?"
+            params.append(_local_seconds(end))
+        sql += " ORDER BY ts, seq"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._row(row) for row in self.conn.execute(sql, params)]
+
+    def query_seq(self, device_id, first, last=None, limit=None):
+        """设备数据编号在 [first, last] 内的帧，按编号排序"""
+        sql = f"SELECT {COLUMNS} FROM frames WHERE device_id = ? AND seq >= ?"
+        params = [device_id, first]
+        if last is not None:
+            sql += " AND seq <= ?"
+            params.append(last)
+        sql += " ORDER BY seq, ts"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._row(row) for row in self.conn.execute(sql, params)]
+
+    def devices(self):
+        """每个设备的帧数和时间范围：[(设备编号, 帧数, 最早, 最晚), ...]"""
+        rows = self.conn.execute(
+            "SELECT device_id, COUNT(*), MIN(ts), MAX(ts) FROM frames GROUP BY device_id ORDER BY device_id")
+        return [(device_id, count, _from_local_seconds(first), _from_local_seconds(last))
+                for device_id, count, first, last in rows]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM frames").fetchone()[0]
+
+    @staticmethod
+    def to_frame(row):
+        """查询结果还原为原始 52 字节帧"""
+        return encode_frame(row.device_id, row.seq, row.timestamp, row.voltage, row.temperature, row.channels)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
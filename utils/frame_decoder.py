@@ -0,0 +1,140 @@
+import struct
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+# 52 字节定长数据帧，字段之间以 0x2C 分隔：
+# A9 9A | 长度 | 设备编号(4) | 2C | 数据编号(4) | 2C | 时间(11) | 2C | 电压(2) | 2C | 温度(2)
+#   | 2C | data1(4) | 2C | data2(4) | 2C | data3(4) | 2C | data4(4) | 0D 0A
+FRAME_LEN = 52
+FRAME_DTYPE = np.dtype([
+    ('head', 'u1', 2),
+    ('length', 'u1'),
+    ('device_id', '>u4'),
+    ('sep1', 'u1'),
+    ('seq', '>u4'),
+    ('sep2', 'u1'),
+    ('time', 'u1', 11),
+    ('sep3', 'u1'),
+    ('voltage', '>u2'),
+    ('sep4', 'u1'),
+    ('temperature', '>i2'),
+    ('sep5', 'u1'),
+    ('data1', '>i4'),
+    ('sep6', 'u1'),
+    ('data2', '>i4'),
+    ('sep7', 'u1'),
+    ('data3', '>i4'),
+    ('sep8', 'u1'),
+    ('data4', '>i4'),
+    ('tail', 'u1', 2),
+])
+assert FRAME_DTYPE.itemsize == FRAME_LEN
+
+SEPARATOR_FIELDS = ('sep1', 'sep2', 'sep3', 'sep4', 'sep5', 'sep6', 'sep7', 'sep8')
+CHANNEL_FIELDS = ('data1', 'data2', 'data3', 'data4')
+# 时间字段：年 - 月 - 日 空格 时 : 分 : 秒，例如 18 2D 09 2D 19 20 0F 3A 34 3A 14 = 24-9-25 15:52:20
+TIME_SEPARATORS = {1: 0x2D, 3: 0x2D, 5: 0x20, 7: 0x3A, 9: 0x3A}
+
+FRAME_STRUCT = struct.Struct('>2sBIcIc11scHchcicicici2s')
+assert FRAME_STRUCT.size == FRAME_LEN
+
+Frame = namedtuple('Frame', 'device_id seq timestamp voltage temperature channels')
+
+
+def decode_frame(frame):
+    """解码单个 52 字节帧，格式不正确时返回 None"""
+    if len(frame) != FRAME_LEN:
+        return None
+    (head, length, device_id, _, seq, _, raw_time, _, voltage, _, temperature,
+     _, data1, _, data2, _, data3, _, data4, tail) = FRAME_STRUCT.unpack(frame)
+    if head != b'\xA9\x9A' or length != FRAME_LEN or tail != b'\r\n':
+        return None
+    try:
+        timestamp = datetime(2000 + raw_time[0], raw_time[2], raw_time[4], raw_time[6], raw_time[8], raw_time[10])
+    except ValueError:
+        timestamp = None
+    return Frame(device_id, seq, timestamp, voltage, temperature, (data1, data2, data3, data4))
+
+
+def encode_frame(device_id, seq, timestamp, voltage=0, temperature=0, channels=(0, 0, 0, 0)):
+    """按帧格式编码一帧，timestamp 为 datetime"""
+    raw_time = bytes((timestamp.year % 100, 0x2D, timestamp.month, 0x2D, timestamp.day, 0x20,
+                      timestamp.hour, 0x3A, timestamp.minute, 0x3A, timestamp.second))
+    return FRAME_STRUCT.pack(b'\xA9\x9A', FRAME_LEN, device_id, b',', seq, b',', raw_time, b',', voltage, b',',
+                             temperature, b',', channels[0], b',', channels[1], b',', channels[2], b',', channels[3],
+                             b'\r\n')
+
+
+def _find_frame_starts(data):
+    """在任意字节流中查找结构完整的帧起点（帧头、长度、帧尾均正确且互不重叠）"""
+    if len(data) < FRAME_LEN:
+        return np.empty(0, dtype=np.int64)
+    starts = np.flatnonzero((data[:-FRAME_LEN + 1] == 0xA9) & (data[1:len(data) - FRAME_LEN + 2] == 0x9A))
+    starts = starts[(data[starts + 2] == FRAME_LEN)
+                    & (data[starts + FRAME_LEN - 2] == 0x0D)
+                    & (data[starts + FRAME_LEN - 1] == 0x0A)]
+    if len(starts) > 1 and np.any(np.diff(starts) < FRAME_LEN):
+        # 数据体中偶然出现的 A9 9A 会与前一个已接受的帧重叠，丢弃；
+        # 必须与已接受的起点比较，被丢弃的候选不能挡住后面的真正帧头
+        kept = []
+        last = -FRAME_LEN
+        for start in starts.tolist():
+            if start >= last + FRAME_LEN:
+                kept.append(start)
+                last = start
+        starts = np.array(kept, dtype=starts.dtype)
+    return starts
+
+
+def decode_frames(buf):
+    """一次性解码缓冲区中的全部定长帧，返回列式 NumPy 数组字典
+
+    buf 可以是首尾相接的帧序列（直接按结构化 dtype 视图解码），
+    也可以是夹杂垃圾字节的原始字节流（先向量化查找帧起点再聚合）。
+    返回的 valid 掩码标记分隔符、时间字段不合法的帧，这些帧的时间戳为 NaT。
+    """
+    data = np.frombuffer(buf, dtype=np.uint8)
+    aligned = (len(data) % FRAME_LEN == 0 and len(data) > 0
+               and np.all(data[0::FRAME_LEN] == 0xA9) and np.all(data[1::FRAME_LEN] == 0x9A))
+    if aligned:
+        offsets = np.arange(0, len(data), FRAME_LEN, dtype=np.int64)
+        records = data.view(FRAME_DTYPE)
+    else:
+        offsets = _find_frame_starts(data).astype(np.int64)
+        rows = data[offsets[:, None] + np.arange(FRAME_LEN)]
+        records = np.ascontiguousarray(rows).view(FRAME_DTYPE).reshape(len(offsets))
+
+    valid = (records['length'] == FRAME_LEN)
+    valid &= (records['head'][:, 0] == 0xA9) & (records['head'][:, 1] == 0x9A)
+    valid &= (records['tail'][:, 0] == 0x0D) & (records['tail'][:, 1] == 0x0A)
+    for name in SEPARATOR_FIELDS:
+        valid &= records[name] == 0x2C
+
+    raw_time = records['time']
+    for index, value in TIME_SEPARATORS.items():
+        valid &= raw_time[:, index] == value
+    year, month, day = raw_time[:, 0].astype(np.int64), raw_time[:, 2].astype(np.int64), raw_time[:, 4]
+    hour, minute, second = raw_time[:, 6], raw_time[:, 8], raw_time[:, 10]
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    valid &= (hour < 24) & (minute < 60) & (second < 60)
+
+    months = (year + 30) * 12 + np.clip(month, 1, 12) - 1  # 2000 + year - 1970
+    dates = months.astype('datetime64[M]').astype('datetime64[D]') + (np.clip(day, 1, 31) - 1).astype('timedelta64[D]')
+    seconds = hour.astype(np.int64) * 3600 + minute.astype(np.int64) * 60 + second
+    # 日期超出当月天数（如 2 月 30 日）时会滚到下个月
+    valid &= dates.astype('datetime64[M]') == months.astype('datetime64[M]')
+    timestamp = dates.astype('datetime64[s]') + seconds.astype('timedelta64[s]')
+    timestamp[~valid] = np.datetime64('NaT')
+
+    return {
+        'offset': offsets,
+        'device_id': records['device_id'].astype(np.uint32),
+        'seq': records['seq'].astype(np.uint32),
+        'timestamp': timestamp,
+        'voltage': records['voltage'].astype(np.uint16),
+        'temperature': records['temperature'].astype(np.int16),
+        'channels': np.stack([records[name].astype(np.int32) for name in CHANNEL_FIELDS], axis=1),
+        'valid': valid,
+    }
@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from utils.frame_decoder import CHANNEL_FIELDS, FRAME_DTYPE, FRAME_LEN, SEPARATOR_FIELDS, TIME_SEPARATORS
+from utils.hex_codec import to_hex
+
+# data: 首尾相接的帧字节；lengths: 每帧实际长度（截断的帧更短）；times: 每帧的墙上时间（datetime64[ms]）
+Batch = namedtuple('Batch', 'data lengths times')
+
+FORMATS = ('raw', 'hex', 'log', 'scap')
+
+
+class FrameGenerator:
+    """批量生成合成数据帧，用于压测解析、对账和存储
+
+    设备轮流出帧：全局第 k 帧属于第 k % devices 个设备，数据编号为 start_seq + k，
+    与真实网关一样由一个端口上的所有设备共用一个递增计数器；每轮（所有设备各一帧）时间前进 interval 秒。
+    电压、温度和四个通道为按设备错开相位的正弦加噪声。
+    按概率注入故障：gap 跳过该帧（编号空缺）、duplicate 重复发送、corrupt 随机改写一个字节、
+    truncate 截断为不完整的帧。所有帧用 NumPy 结构化数组一次性编码。
+    """
+
+    def __init__(self, devices=1000, base_device_id=0x253A0000, start=None, interval=1.0, start_seq=0,
+                 seed=None, corrupt=0.0, truncate=0.0, gap=0.0, duplicate=0.0):
+        self.devices = devices
+        self.base_device_id = base_device_id
+        start = start or datetime.now().replace(microsecond=0)
+        self.start = np.datetime64(start, 'ms')
+        self.interval = interval
+        self.start_seq = start_seq
+        self.corrupt = corrupt
+        self.truncate = truncate
+        self.gap = gap
+        self.duplicate = duplicate
+        self.rng = np.random.default_rng(seed)
+        self.phase = self.rng.random(devices) * 2 * np.pi
+        self.next_index = 0
+        self.counts = {'frames': 0, 'bytes': 0, 'gaps': 0, 'duplicates': 0, 'corrupted': 0, 'truncated': 0}
+
+    def generate(self, count):
+        """生成 count 个编号（注入故障后实际帧数可能不同），返回 Batch"""
+        rng = self.rng
+        k = np.arange(self.next_index, self.next_index + count, dtype=np.int64)
+        self.next_index += count
+        device = k % self.devices
+        times = self.start + (k * (self.interval * 1000 / self.devices)).astype('timedelta64[ms]')
+
+        repeats = np.ones(count, dtype=np.int64)
+        if self.gap:
+            repeats[rng.random(count) < self.gap] = 0
+        if self.duplicate:
+            repeats[(rng.random(count) < self.duplicate) & (repeats > 0)] = 2
+        self.counts['gaps'] += int(np.count_nonzero(repeats == 0))
+        self.counts['duplicates'] += int(np.count_nonzero(repeats == 2))
+        if not np.all(repeats == 1):
+            k, device, times = np.repeat(k, repeats), np.repeat(device, repeats), np.repeat(times, repeats)
+        n = len(k)
+
+        records = np.zeros(n, dtype=FRAME_DTYPE)
+        records['head'] = (0xA9, 0x9A)
+        records['length'] = FRAME_LEN
+        records['device_id'] = self.base_device_id + device
+        records['seq'] = (self.start_seq + k) % (1 << 32)
+        for name in SEPARATOR_FIELDS:
+            records[name] = 0x2C
+        records['tail'] = (0x0D, 0x0A)
+        self._encode_time(records['time'], times)
+
+        seconds = (times - self.start).astype(np.float64) / 1000
+        phase = self.phase[device]
+        records['voltage'] = 18000 + 400 * np.sin(seconds / 600 + phase) + rng.normal(0, 20, n)
+        records['temperature'] = 2500 + 500 * np.sin(seconds / 86400 * 2 * np.pi + phase) + rng.normal(0, 10, n)
+        for i, name in enumerate(CHANNEL_FIELDS):
+            period = 60.0 * (i + 1)
+            records[name] = 100000 * np.sin(seconds / period + phase * (i + 1)) + rng.normal(0, 500, n)
+
+        rows = records.view(np.uint8).reshape(n, FRAME_LEN)
+        if self.corrupt:
+            hit = np.flatnonzero(rng.random(n) < self.corrupt)
+            rows[hit, rng.integers(0, FRAME_LEN, len(hit))] ^= rng.integers(1, 256, len(hit), dtype=np.uint8)
+            self.counts['corrupted'] += len(hit)
+        lengths = np.full(n, FRAME_LEN, dtype=np.int64)
+        if self.truncate:
+            hit = np.flatnonzero(rng.random(n) < self.truncate)
+            lengths[hit] = rng.integers(3, FRAME_LEN, len(hit))
+            self.counts['truncated'] += len(hit)
+            data = rows[np.arange(FRAME_LEN) < lengths[:, None]].tobytes()
+        else:
+            data = rows.tobytes()
+
+        self.counts['frames'] += n
+        self.counts['bytes'] += len(data)
+        return Batch(data, lengths, times)
+
+    @staticmethod
+    def _encode_time(raw_time, times):
+        """datetime64[ms] 数组编码为 11 字节时间字段：yy 2D mm 2D dd 20 HH 3A MM 3A SS"""
+        days = times.astype('datetime64[D]')
+        months = times.astype('datetime64[M]')
+        second_of_day = (times.astype('datetime64[s]') - days).astype(np.int64)
+        raw_time[:, 0] = (times.astype('datetime64[Y]').astype(np.int64) + 1970) % 100
+        raw_time[:, 2] = months.astype(np.int64) % 12 + 1
+        raw_time[:, 4] = (days - months).astype(np.int64) + 1
+        raw_time[:, 6] = second_of_day // 3600
+        raw_time[:, 8] = second_of_day // 60 % 60
+        raw_time[:, 10] = second_of_day % 60
+        for index, value in TIME_SEPARATORS.items():
+            raw_time[:, index] = value
+
+    @staticmethod
+    def split(batch):
+        """把一批数据按帧切开，返回 bytes 列表"""
+        ends = np.cumsum(batch.lengths)
+        data = batch.data
+        return [data[end - length:end] for end, length in zip(ends.tolist(), batch.lengths.tolist())]
+
+    def frames(self, count):
+        return self.split(self.generate(count))
+
+    def iter_batches(self, total=None, batch_size=10000):
+        """连续产出批次，total 为 None 时不停止"""
+        remaining = total
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            yield self.generate(size)
+            if remaining is not None:
+                remaining -= size
+
+    def stream(self, port, total=None, rate=None, batch_size=None, stop_event=None):
+        """持续写入串口、pty 或 socket（任何有 write 的对象）
+
+        rate 为每秒帧数，按单调时钟计算每批的目标时刻，不累积漂移；为 None 时按对端能接收的速度全速写。
+        """
+        stop_event = stop_event or threading.Event()
+        batch_size = batch_size or (max(1, int(rate / 50)) if rate else 1000)
+        start = time.monotonic()
+        sent = 0
+        for batch in self.iter_batches(total, batch_size):
+            if stop_event.is_set():
+                break
+            if rate:
+                delay = start + sent / rate - time.monotonic()
+                if delay > 0 and stop_event.wait(delay):
+                    break
+            port.write(batch.data)
+            sent += len(batch.lengths)
+        return sent
+
+    def write_file(self, path, total, fmt='raw', batch_size=100000):
+        """写出 total 个编号的数据
+
+        raw  二进制帧流
+        hex  每行一帧的十六进制文本（与 data 01.txt 相同）
+        log  带时间戳的接收日志（与串口日志相同，可直接交给 Analyzed.py / convert_logs.py）
+        scap 二进制采集文件目录（utils.capture_file）
+        """
+        if fmt == 'scap':
+            from utils.capture_file import CaptureWriter
+            # 每次写入的都是完整帧，各自保留生成时间，不合并
+            with CaptureWriter(path, wall_base_ns=0, mono_base_ns=0, coalesce_ns=-1) as writer:
+                for batch in self.iter_batches(total, batch_size):
+                    times_ns = self._wall_ns(batch.times)
+                    for frame, ts_ns in zip(self.split(batch), times_ns.tolist()):
+                        writer.write(0, frame, ts_ns)
+            return self.counts
+
+        mode, kwargs = ('wb', {}) if fmt == 'raw' else ('w', {'encoding': 'utf-8'})
+        with open(path, mode, buffering=1 << 20, **kwargs) as f:
+            for batch in self.iter_batches(total, batch_size):
+                if fmt == 'raw':
+                    f.write(batch.data)
+                    continue
+                frames = self.split(batch)
+                if fmt == 'hex':
+                    f.write(''.join(to_hex(frame) + '\n' for frame in frames))
+                else:
+                    stamps = np.char.replace(np.char.replace(
+                        np.datetime_as_string(batch.times, unit='ms'), 'T', ' '), '.', ',')
+                    f.write(''.join(f"{stamp} - 接收 : {to_hex(frame)}\n"
+                                    for stamp, frame in zip(stamps.tolist(), frames)))
+        return self.counts
+
+    @staticmethod
+    def _wall_ns(times):
+        """本地时间的 datetime64 转为墙上时间 ns，与 utils.log_reader 对日志时间的解释一致"""
+        first = times[0].astype(datetime)
+        base_ns = int(time.mktime(first.timetuple())) * 1_000_000_000
+        return base_ns + (times - times[0].astype('datetime64[s]')).astype('timedelta64[ns]').astype(np.int64)
+
+    def stats(self):
+        return dict(self.counts, next_index=self.next_index)
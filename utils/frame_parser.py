@@ -0,0 +1,121 @@
+import time
+
+from utils.metrics import METRICS
+from utils.ring_buffer import RingBuffer, DROP_OLDEST
+
+FRAME_HEAD = b'\xA9\x9A'
+FRAME_TAIL = b'\x0D\x0A'
+# 帧头(2) + 长度(1) + 帧尾(2)
+MIN_FRAME_LEN = 5
+MAX_FRAME_LEN = 255
+
+
+class FrameParser:
+    """增量帧解析器：A9 9A | 长度 | 数据体 | 0D 0A
+
+    长度字节为整帧长度（含帧头与帧尾），例如 0x34 = 52 字节。
+    可以喂入任意切分的数据块，每个字节只会被扫描一次；帧损坏时从下一个帧头重新同步。
+    数据存放在定长环形缓冲区中，返回的帧是 memoryview 切片，仅在下一次 feed/fill_from
+    之前有效，需要保留时请调用 bytes(frame)。
+    """
+
+    def __init__(self, capacity=65536, overflow=DROP_OLDEST, name=None):
+        if capacity < 2 * MAX_FRAME_LEN:
+            raise ValueError(f"缓冲区容量至少为 {2 * MAX_FRAME_LEN} 字节")
+        self.ring = RingBuffer(capacity, overflow, scratch_size=MAX_FRAME_LEN)
+        self.name = name
+        self.bytes_in = 0
+        self.frames = 0
+        self.garbage_bytes = 0
+        self.dropped_frames = 0
+
+    @property
+    def pending(self):
+        """已接收但尚未组成完整帧的字节数"""
+        return len(self.ring)
+
+    def feed(self, data):
+        """喂入一段数据，返回其中解析出的完整帧列表"""
+        written = self.ring.write(data)
+        self.bytes_in += written
+        if written < len(data):
+            # 背压模式下放不下的数据只能丢弃
+            self.ring.overruns += 1
+            self.ring.dropped_bytes += len(data) - written
+        return self._parse()
+
+    def fill_from(self, stream, size=None):
+        """通过 stream.readinto 直接把数据读入缓冲区，返回 (读取字节数, 帧列表)"""
+        count = self.ring.readinto(stream, size)
+        self.bytes_in += count
+        return count, self._parse() if count else []
+
+    def _parse(self):
+        if not METRICS.enabled:
+            return self._parse_frames()
+        start = time.perf_counter()
+        garbage = self.garbage_bytes
+        frames = self._parse_frames()
+        elapsed = time.perf_counter() - start
+        if frames:
+            METRICS.observe('parse_seconds_per_frame', elapsed / len(frames), port=self.name)
+        if self.garbage_bytes != garbage:
+            METRICS.incr('garbage_bytes', self.garbage_bytes - garbage, port=self.name)
+        return frames
+
+    def _parse_frames(self):
+        ring = self.ring
+        frames = []
+        pos = 0
+        end = len(ring)
+        while end - pos >= 3:
+            if ring[pos] != 0xA9 or ring[pos + 1] != 0x9A:
+                start = ring.find(FRAME_HEAD, pos + 1)
+                if start < 0:
+                    # 末尾的 A9 可能是下一帧帧头的前半部分，暂时保留
+                    start = end - 1 if ring[end - 1] == 0xA9 else end
+                self.garbage_bytes += start - pos
+                pos = start
+                continue
+
+            length = ring[pos + 2]
+            if length < MIN_FRAME_LEN:
+                self.dropped_frames += 1
+                self.garbage_bytes += 1
+                pos += 1
+                continue
+            if end - pos < length:
+                break
+
+            if ring[pos + length - 2] == 0x0D and ring[pos + length - 1] == 0x0A:
+                frames.append(ring.peek(length, pos))
+                pos += length
+            else:
+                # 帧尾不匹配，丢弃当前帧头并从后续字节重新同步
+                self.dropped_frames += 1
+                self.garbage_bytes += 1
+                pos += 1
+
+        ring.consume(pos)
+        self.frames += len(frames)
+        return frames
+
+    def pending_bytes(self):
+        """尚未组成完整帧的字节副本，用于保存断点后恢复"""
+        return bytes(self.ring.peek(self.pending))
+
+    def reset(self):
+        """丢弃未完成的数据（计入垃圾字节）"""
+        self.garbage_bytes += self.pending
+        self.ring.clear()
+
+    def stats(self):
+        stats = {
+            'bytes': self.bytes_in,
+            'frames': self.frames,
+            'garbage_bytes': self.garbage_bytes,
+            'dropped_frames': self.dropped_frames,
+            'pending': self.pending,
+        }
+        stats.update({f'buffer_{k}': v for k, v in self.ring.stats().items()})
+        return stats
@@ -0,0 +1,46 @@
+# 0x00-0xFF 对应的两位大写十六进制文本
+HEX_TABLE = tuple(f'{i:02X}' for i in range(256))
+
+
+def to_hex(data, sep=' '):
+    """字节转大写十六进制文本，默认以空格分隔：A9 9A 34 ...
+
+    由 bytes.hex 在 C 层一次完成，代替逐字节 f'{byte:02X}' 再 join。
+    data 可以是 bytes、bytearray 或 memoryview。
+    """
+    return data.hex(sep).upper() if sep else data.hex().upper()
+
+
+def to_hex_table(data, sep=' '):
+    """查表实现，结果与 to_hex 相同，仅用于对比性能"""
+    return sep.join(map(HEX_TABLE.__getitem__, data))
+
+
+def from_hex(text):
+    """十六进制文本（可含空格）转字节"""
+    return bytes.fromhex(text)
+
+
+class LazyHex:
+    """延迟渲染的十六进制文本，作为 logging 的参数传入：
+
+        logging.info("接收 : %s", LazyHex(frame))
+
+    只有处理器真正输出这条记录时才调用 __str__ 生成文本，结果缓存，
+    多个处理器（app.log、send_data.log）共用一次渲染；日志级别未开启时完全不渲染。
+    memoryview 会先复制成 bytes，避免记录被延后格式化时底层缓冲区已被覆盖。
+    """
+
+    __slots__ = ('data', '_text')
+
+    def __init__(self, data):
+        self.data = data if isinstance(data, bytes) else bytes(data)
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = to_hex(self.data)
+        return self._text
+
+    def __len__(self):
+        return len(self.data)
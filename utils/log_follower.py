@@ -0,0 +1,274 @@
+import gzip
+import json
+import os
+import re
+
+from utils.capture_file import SEGMENT_HEADER, iter_blocks, iter_records, list_segments, segment_number
+from utils.frame_parser import FrameParser
+from utils.log_shard import SEGMENT_SUFFIX, rotated_segments
+
+CHECKPOINT_VERSION = 1
+# 用文件开头若干字节作为指纹，识别被原地重写（inode 不变）的文件
+FINGERPRINT_BYTES = 64
+READ_CHUNK = 1 << 20
+ROTATED_NAME = re.compile(SEGMENT_SUFFIX + r'(?:\.[^.]*)?$')
+
+
+def file_identity(st):
+    return [st.st_dev, st.st_ino]
+
+
+def read_head(path, size=FINGERPRINT_BYTES):
+    with open(path, 'rb') as f:
+        return f.read(size)
+
+
+def same_head(path, head):
+    """文件开头与断点中记录的指纹（十六进制）一致；inode 可能被删除的文件复用，只比 inode 不够"""
+    return read_head(path, len(head) // 2).hex() == head
+
+
+class LogFollower:
+    """增量跟踪不断增长的接收日志和二进制采集文件
+
+    断点文件记录每个日志文件的 (设备号, inode)、已处理到的字节偏移、开头指纹，
+    以及解析器中尚未组成完整帧的字节；每次只读取偏移之后的新数据，且只处理到最后一个完整行。
+      - 文件变短或开头指纹变化：视为被截断 / 重写，从头开始
+      - LogShard 轮转出的段在约 1 秒后被压缩为 .gz、原文件删除：按开头指纹找到压缩段接着读，
+        再读之后轮转出、还没读过的段；.gz 文件本身不单独跟踪
+      - 同一路径的 inode 变化：视为轮转，先在同目录下找到改名后的旧文件读完剩余部分，再从头读新文件；
+        改名后的旧文件先被读到时同样沿用原进度，其末尾的半帧留给原路径上的新文件
+    采集目录记录当前段号、段内偏移和每个端口的未完成字节。
+    extract(line) 从一行日志中取出十六进制文本（不是接收日志时返回 None）。
+    """
+
+    def __init__(self, checkpoint_path, extract):
+        self.checkpoint_path = checkpoint_path
+        self.extract = extract
+        self.files = {}
+        self.captures = {}
+        self.counts = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') == CHECKPOINT_VERSION:
+            self.files = state.get('files', {})
+            self.captures = state.get('captures', {})
+
+    def save(self):
+        """先写临时文件再替换，中途退出不会留下损坏的断点"""
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CHECKPOINT_VERSION, 'files': self.files, 'captures': self.captures}, f, indent=1)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def poll(self, paths, on_frame, capture_dirs=()):
+        """处理所有文件的新增内容，每个完整帧调用一次 on_frame(来源, 帧)，返回本次统计"""
+        self.counts = {'files': 0, 'bytes': 0, 'frames': 0, 'rotated': 0, 'truncated': 0}
+        # 先处理正在写的文件，由它的轮转处理按顺序读完旧段，轮转出的段只补读没跟踪过的部分
+        paths = sorted((os.path.normpath(path) for path in paths if not path.endswith('.gz')),
+                       key=lambda path: ROTATED_NAME.search(os.path.basename(path)) is not None)
+        for path in paths:
+            self._follow_file(path, on_frame)
+        for directory in capture_dirs:
+            self._follow_capture(os.path.normpath(directory), on_frame)
+        # 已被删除的文件不再保留进度；等待新文件出现的轮转占位保留
+        self.files = {path: cursor for path, cursor in self.files.items()
+                      if cursor['identity'] is None or os.path.exists(path)}
+        return self.counts
+
+    def _follow_file(self, path, on_frame):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return
+        identity = file_identity(st)
+        cursor = self.files.get(path)
+        carried = ''
+        if cursor is None:
+            cursor = self._adopt_renamed(path, identity)
+        elif cursor['identity'] is None:
+            # 轮转后改名的旧文件已先读完（见 _adopt_renamed），这里是原路径上的新文件
+            carried = cursor['pending']
+            cursor = None
+        elif cursor['identity'] != identity:
+            # 跨越轮转的半帧接到新文件开头
+            carried = self._finish_rotated(path, cursor, on_frame)
+            self.counts['rotated'] += 1
+            cursor = None
+        elif st.st_size < cursor['offset'] or not same_head(path, cursor['head']):
+            if self._find_compressed(path, cursor['head']) is not None:
+                # 旧文件轮转后已被压缩删除，新文件复用了它的 inode
+                carried = self._finish_rotated(path, cursor, on_frame)
+                self.counts['rotated'] += 1
+            else:
+                self.counts['truncated'] += 1
+            cursor = None
+        if cursor is None:
+            cursor = {'identity': identity, 'offset': 0, 'head': '', 'pending': carried}
+        if st.st_size > cursor['offset']:
+            self._read_lines(path, cursor, on_frame)
+        if len(cursor['head']) < 2 * FINGERPRINT_BYTES:
+            cursor['head'] = read_head(path, min(cursor['offset'], FINGERPRINT_BYTES)).hex()
+        successor = cursor.pop('successor', None)
+        if successor is not None:
+            # 旧文件已读到末尾，剩下的半帧交给原路径上的新文件（它可能还没创建）
+            self.files[successor] = {'identity': None, 'offset': 0, 'head': '', 'pending': cursor['pending']}
+            cursor['pending'] = ''
+        self.files[path] = cursor
+
+    def _adopt_renamed(self, path, identity):
+        """新出现的路径其实是之前跟踪的文件改名而来（轮转）：沿用原来的进度"""
+        for other, cursor in list(self.files.items()):
+            if other == path or cursor['identity'] != identity or not same_head(path, cursor['head']):
+                continue
+            try:
+                moved = file_identity(os.stat(other)) != identity
+            except FileNotFoundError:
+                moved = True
+            if moved:
+                # 断点处的半帧属于旧文件的后续内容，沿用；原路径留给轮转后的新文件，从头读
+                del self.files[other]
+                return dict(cursor, successor=other)
+        return None
+
+    def _finish_rotated(self, path, cursor, on_frame):
+        """path 已轮转：读完旧文件的剩余部分，以及之后轮转出、还没读过的段，返回留给新文件的半帧"""
+        renamed = self._find_renamed(path, cursor['identity'], cursor['head'])
+        if renamed is None:
+            renamed = self._find_compressed(path, cursor['head'])
+        if renamed is None:
+            return cursor['pending']
+        self._read_lines(renamed, cursor, on_frame)
+        if not renamed.endswith('.gz'):
+            # 改名后的旧文件也可能在跟踪列表中，记下它已读完
+            self.files[renamed] = dict(cursor, pending='')
+        segments = [os.path.normpath(segment) for segment in rotated_segments(path)]
+        if renamed not in segments:
+            return cursor['pending']
+        pending = cursor['pending']
+        for segment in segments[segments.index(renamed) + 1:]:
+            if segment in self.files:
+                continue
+            try:
+                identity = file_identity(os.stat(segment))
+            except FileNotFoundError:
+                continue
+            later = {'identity': identity, 'offset': 0, 'head': '', 'pending': pending}
+            self._read_lines(segment, later, on_frame)
+            pending = later['pending']
+            if not segment.endswith('.gz'):
+                self.files[segment] = dict(later, pending='')
+        return pending
+
+    @staticmethod
+    def _find_compressed(path, head):
+        """旧文件已被压缩并删除时，按开头指纹在 path 轮转出的 .gz 段中查找"""
+        if not head:
+            return None
+        head = bytes.fromhex(head)
+        for segment in reversed(rotated_segments(path)):
+            if not segment.endswith('.gz'):
+                continue
+            try:
+                with gzip.open(segment, 'rb') as f:
+                    if f.read(len(head)) == head:
+                        return os.path.normpath(segment)
+            except OSError:
+                continue
+        return None
+
+    @staticmethod
+    def _find_renamed(path, identity, head):
+        """轮转后改名的旧文件（app.log -> app.log.1 等），按 inode 和开头指纹在同目录下查找"""
+        for entry in os.scandir(os.path.dirname(path) or '.'):
+            candidate = os.path.normpath(entry.path)
+            try:
+                if (candidate != path and file_identity(os.stat(candidate)) == identity
+                        and same_head(candidate, head)):
+                    return candidate
+            except OSError:
+                continue
+        return None
+
+    def _read_lines(self, path, cursor, on_frame):
+        parser = FrameParser()
+        parser.feed(bytes.fromhex(cursor['pending']))
+        self.counts['files'] += 1
+        with (gzip.open if path.endswith('.gz') else open)(path, 'rb') as f:
+            f.seek(cursor['offset'])
+            rest = b''
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                data = rest + chunk
+                end = data.rfind(b'\n') + 1
+                # 最后一行可能还没写完，留到下次
+                rest = data[end:]
+                for line in data[:end].decode('utf-8', errors='replace').splitlines():
+                    hex_text = self.extract(line)
+                    if not hex_text:
+                        continue
+                    try:
+                        payload = bytes.fromhex(hex_text)
+                    except ValueError:
+                        continue
+                    for frame in parser.feed(payload):
+                        on_frame(path, frame)
+                        self.counts['frames'] += 1
+                cursor['offset'] += end
+                self.counts['bytes'] += end
+        cursor['pending'] = parser.pending_bytes().hex()
+
+    def _follow_capture(self, directory, on_frame):
+        segments = list_segments(directory)
+        cursor = self.captures.get(directory) or {'segment': 0, 'offset': 0, 'pending': {}}
+        parsers = {}
+        for port_id, pending in cursor['pending'].items():
+            parser = parsers[int(port_id)] = FrameParser()
+            parser.feed(bytes.fromhex(pending))
+
+        for path in segments:
+            number = segment_number(path)
+            if number < cursor['segment']:
+                continue
+            size = os.path.getsize(path)
+            if number > cursor['segment'] or size < cursor['offset']:
+                if number == cursor['segment']:
+                    self.counts['truncated'] += 1
+                cursor['segment'], cursor['offset'] = number, SEGMENT_HEADER.size
+            if size <= cursor['offset']:
+                continue
+            self.counts['files'] += 1
+            with open(path, 'rb') as f:
+                version = SEGMENT_HEADER.unpack(f.read(SEGMENT_HEADER.size))[1]
+                f.seek(cursor['offset'])
+                data = f.read()
+            view = memoryview(data)
+            # 正在写入的最后一条记录（版本 2 为最后一块）不完整时不读，下次从它开始
+            if version == 1:
+                records = ((end, port_id, body) for end, _, port_id, body in iter_records(view))
+            else:
+                records = ((end, port_id, body) for end, block in iter_blocks(view)
+                           for _, _, port_id, body in iter_records(block))
+            pos = 0
+            for end, port_id, body in records:
+                parser = parsers.get(port_id)
+                if parser is None:
+                    parser = parsers[port_id] = FrameParser()
+                for frame in parser.feed(body):
+                    on_frame(f"{path}#{port_id}", frame)
+                    self.counts['frames'] += 1
+                pos = end
+            view.release()
+            cursor['offset'] += pos
+            self.counts['bytes'] += pos
+
+        cursor['pending'] = {str(port_id): parser.pending_bytes().hex()
+                             for port_id, parser in parsers.items() if parser.pending}
+        self.captures[directory] = cursor
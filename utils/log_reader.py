@@ -0,0 +1,36 @@
+import re
+import time
+
+from utils.frame_parser import FrameParser
+
+# 2024-09-20 17:22:21,107 - 接收 : A9 9A ...（也兼容 "接收 (HEX):" 和采集服务的 "- id 001 -"）
+LINE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:,(\d{3}))?.*?接收 (?:\(HEX\))?: ?([0-9A-Fa-f ]*)$')
+
+
+def parse_log(path, port_id=0):
+    """逐行解析文本日志，产出 (墙上时间 ns, 端口号, 原始字节)"""
+    last_second = None
+    second_ns = 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = LINE_PATTERN.match(line.rstrip('\r\n'))
+            if not match:
+                continue
+            stamp, millis, hex_text = match.groups()
+            if stamp != last_second:
+                last_second = stamp
+                second_ns = int(time.mktime(time.strptime(stamp, '%Y-%m-%d %H:%M:%S'))) * 1_000_000_000
+            try:
+                data = bytes.fromhex(hex_text)
+            except ValueError:
+                continue
+            if data:
+                yield second_ns + int(millis or 0) * 1_000_000, port_id, data
+
+
+def iter_log_frames(path):
+    """从文本日志中重组完整帧，产出 (帧完成时的墙上时间 ns, 帧字节)"""
+    parser = FrameParser()
+    for ts_ns, _, data in parse_log(path):
+        for frame in parser.feed(data):
+            yield ts_ns, bytes(frame)
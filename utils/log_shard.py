@@ -0,0 +1,355 @@
+import gzip
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+
+from utils.metrics import METRICS
+
+FSYNC_POLICIES = ('never', 'rotate', 'interval', 'always')
+# 轮转段在原文件名的扩展名之前插入的时间和序号：app.20261018-120000-1.log
+SEGMENT_SUFFIX = r'\.(\d{8}-\d{6})(?:-(\d+))?'
+
+DEFAULT_OPTIONS = {
+    'max_bytes': 64 << 20,
+    'rotate_interval': 86400,
+    'buffer_size': 1 << 20,
+    'fsync': 'rotate',
+    'fsync_interval': 5.0,
+    'compress': True,
+    'compress_level': 6,
+    'keep_files': 30,
+    'keep_bytes': None,
+    'keep_days': None,
+}
+
+
+class LogShard:
+    """一个按大小和时间轮转的日志文件
+
+    当前段始终写在 path（如 logs/app.log），轮转时改名为 app.20261018-120000.log（时间为轮转时刻），
+    由后台维护线程压缩为 .gz 并按 keep_files / keep_bytes / keep_days 删除最旧的段。
+    以二进制方式写入，缓冲区 buffer_size 字节；写入后最多约 1 秒由维护线程刷到系统。
+    fsync 策略：never 从不；rotate 仅在轮转和关闭时；interval 每 fsync_interval 秒；always 每次写入。
+    rotate_interval 按本地时间对齐（86400 即每天零点），为 0 或 None 时只按大小轮转。
+    """
+
+    def __init__(self, path, max_bytes=64 << 20, rotate_interval=86400, buffer_size=1 << 20,
+                 fsync='rotate', fsync_interval=5.0, compress=True, compress_level=6,
+                 keep_files=30, keep_bytes=None, keep_days=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"未知的 fsync 策略: {fsync!r}，可选 {FSYNC_POLICIES}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compress = compress
+        self.compress_level = compress_level
+        self.keep_files = keep_files
+        self.keep_bytes = keep_bytes
+        self.keep_days = keep_days
+        directory, name = os.path.split(path)
+        self.directory = directory or '.'
+        self.stem, self.ext = os.path.splitext(name)
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._rotate_at = float('inf')
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self.rotations = 0
+        self.bytes_written = 0
+        self._last_stamp = None
+        self._last_suffix = 0
+
+    def _next_boundary(self, ts):
+        if not self.rotate_interval:
+            return float('inf')
+        offset = time.localtime(ts).tm_gmtoff
+        return ((ts + offset) // self.rotate_interval + 1) * self.rotate_interval - offset
+
+    def _open(self, now):
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.path, 'ab', buffering=self.buffer_size)
+        self._size = self._file.tell()
+        # 上次运行留下的当前段：按它最后写入的时间计算边界，已过期则在本次第一次写入时轮转
+        last_write = os.fstat(self._file.fileno()).st_mtime if self._size else now
+        self._rotate_at = self._next_boundary(last_write)
+        MAINTAINER.register(self)
+
+    def write(self, text):
+        """写入文本（可以是多行），必要时先轮转；线程安全"""
+        data = text.encode('utf-8')
+        now = time.time()
+        with self._lock:
+            if self._file is None:
+                self._open(now)
+            if now >= self._rotate_at:
+                if self._size:
+                    self._rotate(now)
+                else:
+                    self._rotate_at = self._next_boundary(now)
+            self._file.write(data)
+            self._size += len(data)
+            self.bytes_written += len(data)
+            self._dirty = True
+            if self._size >= self.max_bytes:
+                # 批量写入不拆行，一个段最多超出 max_bytes 一次写入的大小
+                self._rotate(now)
+            elif self.fsync == 'always':
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _rotate(self, now):
+        """关闭当前段并改名，交给维护线程压缩和清理"""
+        if self.fsync != 'never':
+            self._sync()
+        self._file.close()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        # 同一秒内的序号只增不减：保留策略删掉的旧段不能让后面的段复用它的序号排到前面
+        suffix = self._last_suffix + 1 if stamp == self._last_stamp else 0
+        while True:
+            name = f"{self.stem}.{stamp}-{suffix}{self.ext}" if suffix else f"{self.stem}.{stamp}{self.ext}"
+            target = os.path.join(self.directory, name)
+            if not (os.path.exists(target) or os.path.exists(target + '.gz')):
+                break
+            suffix += 1
+        self._last_stamp, self._last_suffix = stamp, suffix
+        os.replace(self.path, target)
+        self.rotations += 1
+        if METRICS.enabled:
+            METRICS.incr('log_rotations')
+        MAINTAINER.submit(self, target)
+        self._file = open(self.path, 'ab', buffering=self.buffer_size)
+        self._size = 0
+        self._rotate_at = self._next_boundary(now)
+
+    def flush(self, sync=False):
+        """把缓冲区写到系统；sync 为 True 时同时 fsync"""
+        with self._lock:
+            if self._file is None:
+                return
+            if sync:
+                self._sync()
+            elif self._dirty:
+                self._file.flush()
+                self._dirty = False
+
+    def maintain(self):
+        """维护线程周期调用：刷缓冲区，interval 策略下按时 fsync"""
+        with self._lock:
+            if self._file is None:
+                return
+            if self.fsync == 'interval' and time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+            elif self._dirty:
+                self._file.flush()
+                self._dirty = False
+
+    def close(self):
+        """关闭当前段（不轮转）；之后再写入会重新打开"""
+        with self._lock:
+            if self._file is None:
+                return
+            if self.fsync != 'never':
+                self._sync()
+            self._file.close()
+            self._file = None
+        MAINTAINER.unregister(self)
+
+    def segments(self):
+        """已轮转的段（含已压缩的），按时间从旧到新"""
+        return rotated_segments(self.path)
+
+    def compress_segment(self, path):
+        """压缩一个已轮转的段：先写临时文件再改名，中途退出不会留下损坏的 .gz"""
+        if not self.compress or path.endswith('.gz') or not os.path.exists(path):
+            return path
+        target = path + '.gz'
+        tmp = target + '.tmp'
+        with open(path, 'rb') as src, gzip.open(tmp, 'wb', compresslevel=self.compress_level) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        shutil.copystat(path, tmp)
+        os.replace(tmp, target)
+        os.remove(path)
+        return target
+
+    def enforce_retention(self):
+        """按数量、总大小和天数删除最旧的段，返回删除的文件"""
+        segments = [(path, os.stat(path)) for path in self.segments()]
+        total = sum(st.st_size for _, st in segments)
+        cutoff = time.time() - self.keep_days * 86400 if self.keep_days else None
+        removed = []
+        for path, st in segments:
+            too_many = self.keep_files is not None and len(segments) - len(removed) > self.keep_files
+            too_big = self.keep_bytes is not None and total > self.keep_bytes
+            too_old = cutoff is not None and st.st_mtime < cutoff
+            if not (too_many or too_big or too_old):
+                break
+            os.remove(path)
+            total -= st.st_size
+            removed.append(path)
+        return removed
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'size': self._size,
+            'bytes_written': self.bytes_written,
+            'rotations': self.rotations,
+            'segments': len(self.segments()),
+        }
+
+
+class ShardMaintainer:
+    """进程内唯一的后台维护线程：压缩已轮转的段、执行保留策略、周期刷写所有打开的分片
+
+    写线程只做改名，压缩和删除都在这里完成，不占用采集线程。
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._shards = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._busy = 0
+        self._idle = threading.Condition(self._lock)
+        self.compressed = 0
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='log-shard-maintainer', daemon=True)
+            self._thread.start()
+
+    def register(self, shard):
+        """分片打开时登记；顺带补做上次退出前未压缩的段"""
+        with self._lock:
+            new = shard not in self._shards
+            self._shards.add(shard)
+            self._ensure_started()
+        if new:
+            for path in shard.segments():
+                if shard.compress and not path.endswith('.gz'):
+                    self.submit(shard, path)
+
+    def unregister(self, shard):
+        with self._lock:
+            self._shards.discard(shard)
+
+    def submit(self, shard, path):
+        with self._lock:
+            self._busy += 1
+            self._ensure_started()
+        self._queue.put((shard, path))
+
+    def wait(self, timeout=None):
+        """等待所有已提交的压缩任务完成"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._busy == 0, timeout)
+
+    def _run(self):
+        while True:
+            try:
+                shard, path = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                with self._lock:
+                    shards = list(self._shards)
+                for shard in shards:
+                    try:
+                        shard.maintain()
+                    except Exception as e:
+                        logging.error(f"刷写日志 {shard.path} 失败: {e}")
+                continue
+            try:
+                if shard.compress_segment(path) != path:
+                    self.compressed += 1
+                shard.enforce_retention()
+            except Exception as e:
+                logging.error(f"压缩或清理日志段 {path} 失败: {e}")
+            finally:
+                with self._idle:
+                    self._busy -= 1
+                    self._idle.notify_all()
+
+
+MAINTAINER = ShardMaintainer()
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def open_shard(path, **options):
+    """按路径取得共享的分片，同一文件的所有写入方（logging 处理器、接收管道）使用同一个对象；
+    options 只在第一次创建时生效，未给出的项取 DEFAULT_OPTIONS"""
+    key = os.path.abspath(path)
+    with _registry_lock:
+        shard = _registry.get(key)
+        if shard is None:
+            shard = _registry[key] = LogShard(path, **dict(DEFAULT_OPTIONS, **options))
+        return shard
+
+
+def rotated_segments(path):
+    """path 已轮转出的段（含已压缩的），按时间从旧到新
+
+    同一秒内多次轮转时按序号排序：app.20261018-120000.log < app.20261018-120000-1.log
+    """
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    pattern = re.compile(re.escape(stem) + SEGMENT_SUFFIX + re.escape(ext) + r'(?:\.gz)?$')
+    try:
+        names = os.listdir(directory or '.')
+    except FileNotFoundError:
+        return []
+    found = []
+    for entry in names:
+        match = pattern.match(entry)
+        if match:
+            found.append(((match.group(1), int(match.group(2) or 0)), os.path.join(directory, entry)))
+    return [segment for _, segment in sorted(found)]
+
+
+def close_all():
+    with _registry_lock:
+        shards = list(_registry.values())
+    for shard in shards:
+        shard.close()
+
+
+def safe_name(name):
+    """端口名转文件名：COM5 -> COM5，/dev/ttyUSB0 -> dev_ttyUSB0，loop:// -> loop"""
+    return re.sub(r'[^0-9A-Za-z._-]+', '_', name).strip('_.') or 'port'
+
+
+class ShardHandler(logging.Handler):
+    """写入 LogShard 的 logging 处理器，替代 FileHandler；告警及以上立即刷到系统"""
+
+    def __init__(self, shard, level=logging.NOTSET):
+        super().__init__(level)
+        self.shard = shard
+
+    def emit(self, record):
+        try:
+            self.shard.write(self.format(record) + '\n')
+            if record.levelno >= logging.WARNING:
+                self.shard.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.shard.flush()
+
+    def close(self):
+        self.shard.close()
+        super().close()
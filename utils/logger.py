@@ -1,16 +1,194 @@
+import json
 import logging
 import os
+import queue
+import threading
+import time
+
+from utils.hex_codec import LazyHex, to_hex
+from utils.log_shard import DEFAULT_OPTIONS, ShardHandler, open_shard, safe_name
+from utils.metrics import METRICS
 
 class SendLogFilter(logging.Filter):
     """自定义过滤器，只允许发送数据的日志通过"""
     def filter(self, record):
-        return "接收" in record.getMessage()
+        # 只看消息模板和文本参数：十六进制参数不可能包含"接收"，不必为被丢弃的记录渲染
+        if "接收" in str(record.msg):
+            return True
+        args = record.args if isinstance(record.args, tuple) else (record.args,)
+        return any("接收" in str(arg) for arg in args if arg is not None and not isinstance(arg, LazyHex))
+
+class ReceiveLogPipeline:
+    """接收数据的异步批量日志管道
+
+    读线程只把 (时间戳, 前缀, 原始字节, 端口) 放入有界队列，后台写线程批量格式化，
+    在累计 batch_size 条或距上次写入超过 flush_interval 秒时写入 send_data.log：
+    带端口的记录另写入 port_dir 下该端口自己的分片（如 logs/ports/COM5.log），不再进入 app.log；
+    不带端口的记录与之前一样同时写入 app.log。所有文件都是 LogShard，按 shard_options 轮转和压缩。
+    队列满时直接丢弃并计数，不阻塞读线程。
+    """
+
+    def __init__(self, log_dir='logs', queue_size=100000, batch_size=1000, flush_interval=0.5,
+                 port_dir=None, shard_options=None):
+        self.log_dir = log_dir
+        self.port_dir = port_dir or os.path.join(log_dir, 'ports')
+        self.shard_options = shard_options or {}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+
+    def start(self):
+        METRICS.register_gauge('log_queue_depth', self.depth)
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='receive-log-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, data, prefix="接收 : ", port=None):
+        """在读线程中调用：入队原始字节，不做任何格式化"""
+        try:
+            self._queue.put_nowait((time.time(), prefix, bytes(data), port))
+            self.enqueued += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if METRICS.enabled:
+                METRICS.incr('log_dropped')
+            return False
+
+    def depth(self):
+        """队列中尚未写出的记录数"""
+        return self._queue.qsize()
+
+    def stop(self, timeout=5.0):
+        """停止写线程，队列中剩余的记录会全部写出"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        METRICS.unregister_gauge('log_queue_depth')
+        if self.dropped:
+            logging.warning(f"接收日志队列已满，共丢弃 {self.dropped} 条记录。")
+
+    @staticmethod
+    def _format(records):
+        """批量格式化，输出与 logging 配置一致的两种行格式，按端口分组
+
+        返回 (app.log 文本, send_data.log 文本, {端口: 文本})
+        """
+        app_lines = []
+        send_lines = []
+        port_lines = {}
+        last_second = None
+        for ts, prefix, data, port in records:
+            second = int(ts)
+            if second != last_second:
+                last_second = second
+                stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+            message = prefix + to_hex(data)
+            line = f"{stamp},{int(ts * 1000) % 1000:03d} - {message}\n"
+            send_lines.append(line)
+            if port is None:
+                app_lines.append(f"{stamp} - INFO - {message}\n")
+            else:
+                port_lines.setdefault(port, []).append(line)
+        return ''.join(app_lines), ''.join(send_lines), {port: ''.join(lines) for port, lines in port_lines.items()}
+
+    def _shard(self, path):
+        return open_shard(path, **self.shard_options)
+
+    def _write_batch(self, pending, app_log, send_log, port_logs):
+        app_text, send_text, port_texts = self._format(pending)
+        write_start = time.perf_counter()
+        if app_text:
+            app_log.write(app_text)
+            app_log.flush()
+        send_log.write(send_text)
+        send_log.flush()
+        for port, text in port_texts.items():
+            shard = port_logs.get(port)
+            if shard is None:
+                shard = port_logs[port] = self._shard(os.path.join(self.port_dir, safe_name(port) + '.log'))
+            shard.write(text)
+            shard.flush()
+        if METRICS.enabled:
+            METRICS.observe('log_write_seconds', time.perf_counter() - write_start)
+            METRICS.incr('log_records_written', len(pending))
+        self.written += len(pending)
+
+    def _run(self):
+        app_log = self._shard(os.path.join(self.log_dir, 'app.log'))
+        send_log = self._shard(os.path.join(self.log_dir, 'send_data.log'))
+        port_logs = {}
+        pending = []
+        last_flush = time.monotonic()
+        try:
+            while not (self._stop_event.is_set() and self._queue.empty()):
+                try:
+                    pending.append(self._queue.get(timeout=self.flush_interval))
+                    while len(pending) < self.batch_size:
+                        pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+
+                now = time.monotonic()
+                if pending and (len(pending) >= self.batch_size or now - last_flush >= self.flush_interval
+                                or self._stop_event.is_set()):
+                    self._write_batch(pending, app_log, send_log, port_logs)
+                    pending = []
+                    last_flush = now
+        finally:
+            # 判断之后才设置停止标志时，最后一批还留在 pending 中，退出前写出
+            if pending:
+                self._write_batch(pending, app_log, send_log, port_logs)
+            # app.log 和 send_data.log 与 logging 处理器共用，只刷写不关闭；端口分片由本管道独占
+            app_log.flush()
+            send_log.flush()
+            for shard in port_logs.values():
+                shard.close()
+
+    def stats(self):
+        return {
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'queue_depth': self.depth(),
+        }
+
 
 class Logger:
+    receive_pipeline = None
+    # 日志目录和分片轮转参数，setup_logger 从 config/logging.json 读取
+    log_dir = 'logs'
+    port_dir = None
+    shard_options = dict(DEFAULT_OPTIONS)
+    _send_handler = None
+
     @staticmethod
-    def setup_logger():
-        """设置日志格式、日志级别和输出文件"""
-        log_dir = 'logs'
+    def load_config(config_path=os.path.join('config', 'logging.json')):
+        """读取日志配置；文件不存在时使用默认值"""
+        if not os.path.exists(config_path):
+            return
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        Logger.log_dir = config.pop('log_dir', Logger.log_dir)
+        Logger.port_dir = config.pop('port_dir', Logger.port_dir)
+        Logger.shard_options = dict(DEFAULT_OPTIONS, **config)
+
+    @staticmethod
+    def setup_logger(config_path=os.path.join('config', 'logging.json')):
+        """设置日志格式、日志级别和输出文件
+
+        app.log 和 send_data.log 都是按大小和时间轮转、后台压缩的分片（utils.log_shard），
+        参数见 config/logging.json。
+        """
+        Logger.load_config(config_path)
+        log_dir = Logger.log_dir
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
@@ -18,24 +196,26 @@ class Logger:
             level=logging.DEBUG,
             format='%(asctime)s - %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S',
-            filename=os.path.join(log_dir, 'app.log'),
-            filemode='a'
+            handlers=[ShardHandler(open_shard(os.path.join(log_dir, 'app.log'), **Logger.shard_options))]
         )
 
-        # 添加自定义过滤器，仅记录发送数据的日志
-        file_handler = logging.FileHandler(os.path.join(log_dir, 'send_data.log'), mode='a')
-        file_handler.setLevel(logging.INFO)
-        file_handler.addFilter(SendLogFilter())
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
-        logging.getLogger().addHandler(file_handler)
+        # 添加自定义过滤器，仅记录发送数据的日志；重复调用时不再重复添加
+        if Logger._send_handler is None:
+            file_handler = ShardHandler(open_shard(os.path.join(log_dir, 'send_data.log'), **Logger.shard_options))
+            file_handler.setLevel(logging.INFO)
+            file_handler.addFilter(SendLogFilter())
+            file_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+            logging.getLogger().addHandler(file_handler)
+            Logger._send_handler = file_handler
 
     @staticmethod
-    def debug(message):
-        logging.debug(message)
+    def debug(message, *args):
+        """args 非空时按 logging 的 % 格式延迟渲染，例如 Logger.debug("数据: %s", LazyHex(data))"""
+        logging.debug(message, *args)
 
     @staticmethod
-    def info(message):
-        logging.info(message)
+    def info(message, *args):
+        logging.info(message, *args)
 
     @staticmethod
     def warning(message):
@@ -48,3 +228,32 @@ class Logger:
     @staticmethod
     def critical(message):
         logging.critical(message)
+
+    @staticmethod
+    def start_receive_pipeline(**kwargs):
+        """启动接收数据的异步日志管道，之后 Logger.receive 不再同步写文件"""
+        if Logger.receive_pipeline is None:
+            kwargs.setdefault('log_dir', Logger.log_dir)
+            kwargs.setdefault('port_dir', Logger.port_dir)
+            kwargs.setdefault('shard_options', Logger.shard_options)
+            Logger.receive_pipeline = ReceiveLogPipeline(**kwargs)
+            Logger.receive_pipeline.start()
+        return Logger.receive_pipeline
+
+    @staticmethod
+    def stop_receive_pipeline():
+        if Logger.receive_pipeline is not None:
+            Logger.receive_pipeline.stop()
+            Logger.receive_pipeline = None
+
+    @staticmethod
+    def receive(data, prefix="接收 : ", port=None):
+        """记录一帧接收数据：管道启动时入队，否则同步写日志
+
+        给出 port 时，管道把该帧写入这个端口自己的分片（logs/ports/<port>.log）。
+        """
+        pipeline = Logger.receive_pipeline
+        if pipeline is not None:
+            pipeline.put(data, prefix, port)
+        else:
+            logging.info('%s%s', prefix, LazyHex(data))
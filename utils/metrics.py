@@ -0,0 +1,236 @@
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Histogram:
+    """以 2 为底的对数分桶直方图，记录开销为常数时间
+
+    值先乘以 scale 再分桶：第 i 个桶的上界为 2^i / scale。
+    """
+
+    def __init__(self, name, scale=1.0, buckets=32):
+        self.name = name
+        self.scale = scale
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        scaled = value * self.scale
+        index = 0 if scaled < 1 else min(int(math.log2(scaled)) + 1, len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def upper_bound(self, index):
+        return (1 << index) / self.scale
+
+    def percentile(self, fraction):
+        """返回百分位所在桶的上界"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+
+class LatencyHistogram(Histogram):
+    """延迟直方图：记录秒，按微秒分桶"""
+
+    def __init__(self, name, buckets=32):
+        super().__init__(name, scale=1e6, buckets=buckets)
+
+    def summary(self):
+        if not self.count:
+            return f"{self.name}: 无数据"
+        return (f"{self.name}: n={self.count} 平均 {self.total / self.count * 1000:.3f}ms "
+                f"p50≤{self.percentile(0.5) * 1000:.3f}ms p99≤{self.percentile(0.99) * 1000:.3f}ms "
+                f"最大 {self.max * 1000:.3f}ms")
+
+
+class Metrics:
+    """进程内指标注册表
+
+    计数器和直方图按线程分片存放，热路径上只修改本线程的字典，不加锁；
+    读取时再把各线程的分片合并。默认关闭，调用方应先判断 METRICS.enabled，
+    关闭时热路径上只剩一次属性判断。
+    """
+
+    def __init__(self, prefix='serial'):
+        self.prefix = prefix
+        self.enabled = False
+        self._local = threading.local()
+        self._shards = []
+        self._gauges = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._dump_stop = threading.Event()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = ({}, {})
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def incr(self, name, value=1, **labels):
+        counters = self._shard()[0]
+        key = (name, tuple(sorted(labels.items())))
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, scale=1e6, **labels):
+        """记录一个观测值（默认单位为秒，按微秒分桶；大小类指标传 scale=1）"""
+        histograms = self._shard()[1]
+        key = (name, tuple(sorted(labels.items())))
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(name, scale)
+        histogram.record(value)
+
+    def register_gauge(self, name, func, **labels):
+        """注册一个在读取时才求值的瞬时指标，例如队列深度"""
+        self._gauges[(name, tuple(sorted(labels.items())))] = func
+
+    def unregister_gauge(self, name, **labels):
+        self._gauges.pop((name, tuple(sorted(labels.items()))), None)
+
+    def collect(self):
+        """合并所有线程的分片，返回 (计数器, 直方图, 瞬时值)"""
+        counters = {}
+        histograms = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard_counters, shard_histograms in shards:
+            for key, value in dict(shard_counters).items():
+                counters[key] = counters.get(key, 0) + value
+            for key, histogram in dict(shard_histograms).items():
+                merged = histograms.get(key)
+                if merged is None:
+                    merged = histograms[key] = Histogram(histogram.name, histogram.scale, len(histogram.counts))
+                merged.merge(histogram)
+        gauges = {}
+        for key, func in list(self._gauges.items()):
+            try:
+                gauges[key] = func()
+            except Exception:
+                pass
+        return counters, histograms, gauges
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        items = list(labels) + list(extra)
+        if not items:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+    def render_prometheus(self):
+        """Prometheus 文本格式
+
+        每个指标前写一行 # TYPE；直方图每次输出全部桶的上界（最后一个桶收容溢出值，只作为 +Inf），
+        即使桶内计数为 0，保证同一指标各次采集的 le 集合不变。
+        """
+        counters, histograms, gauges = self.collect()
+        lines = []
+
+        def declare(family, kind):
+            if family != declared[0]:
+                lines.append(f"# TYPE {family} {kind}")
+                declared[0] = family
+
+        declared = [None]
+        for (name, labels), value in sorted(counters.items()):
+            declare(f"{self.prefix}_{name}_total", 'counter')
+            lines.append(f"{self.prefix}_{name}_total{self._labels(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            declare(f"{self.prefix}_{name}", 'gauge')
+            lines.append(f"{self.prefix}_{name}{self._labels(labels)} {value}")
+        for (name, labels), histogram in sorted(histograms.items()):
+            declare(f"{self.prefix}_{name}", 'histogram')
+            cumulative = 0
+            for index, count in enumerate(histogram.counts[:-1]):
+                cumulative += count
+                le = (('le', f"{histogram.upper_bound(index):g}"),)
+                lines.append(f"{self.prefix}_{name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{self.prefix}_{name}_bucket{self._labels(labels, (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{self.prefix}_{name}_sum{self._labels(labels)} {histogram.total}")
+            lines.append(f"{self.prefix}_{name}_count{self._labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def start_http_server(self, port=9108, host='127.0.0.1'):
+        """在本地端口上提供 /metrics"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        logging.info(f"指标接口已启动: http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def start_periodic_dump(self, interval=60.0):
+        """每 interval 秒把全部指标写入日志"""
+        def dump_loop():
+            while not self._dump_stop.wait(interval):
+                logging.info("运行指标:\n" + self.render_prometheus())
+
+        self._dump_stop.clear()
+        threading.Thread(target=dump_loop, name='metrics-dump', daemon=True).start()
+
+    def stop(self):
+        self._dump_stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# 进程内共享的指标实例，默认关闭
+METRICS = Metrics()
+
+
+def setup_metrics(http_port=None, dump_interval=None):
+    """按配置开启指标：http_port 提供 /metrics，dump_interval 定期写日志；都不配置时保持关闭"""
+    if not http_port and not dump_interval:
+        return METRICS
+    METRICS.enable()
+    if http_port:
+        METRICS.start_http_server(int(http_port))
+    if dump_interval:
+        METRICS.start_periodic_dump(float(dump_interval))
+    return METRICS
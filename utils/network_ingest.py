@@ -0,0 +1,178 @@
+import asyncio
+from collections import OrderedDict
+
+from utils.frame_parser import FrameParser
+from utils.logger import Logger
+from utils.metrics import METRICS
+
+
+class TcpFrameProtocol(asyncio.Protocol):
+    """单个 DTU 的 TCP 连接：每个连接一个 FrameParser，解析出的帧交给 ingest.on_frames"""
+
+    def __init__(self, ingest):
+        self.ingest = ingest
+        self.transport = None
+        self.name = None
+        self.parser = None
+        self.bytes_received = 0
+        self.paused = False
+
+    def connection_made(self, transport):
+        peer = transport.get_extra_info('peername') or ('?', 0)
+        self.name = f"tcp {peer[0]}:{peer[1]}"
+        if len(self.ingest.connections) >= self.ingest.max_connections:
+            Logger.warning(f"连接数已达上限 {self.ingest.max_connections}，拒绝 {self.name}")
+            transport.close()
+            return
+        self.transport = transport
+        self.parser = FrameParser(self.ingest.buffer_size, name=self.name)
+        self.ingest.connections.add(self)
+        self.ingest.accepted += 1
+        Logger.info(f"DTU 已连接: {self.name}")
+
+    def data_received(self, data):
+        self.bytes_received += len(data)
+        self.ingest.feed(self.parser, data, 'tcp')
+        if not self.paused and self.ingest.backlog() > self.ingest.high_water:
+            # 下游（日志管道）积压：暂停读取，由 TCP 窗口把压力传回 DTU
+            self.paused = True
+            self.transport.pause_reading()
+            self.ingest.paused.add(self)
+            self.ingest.pause_events += 1
+
+    def connection_lost(self, exc):
+        if self.transport is None:
+            return
+        self.ingest.connections.discard(self)
+        self.ingest.paused.discard(self)
+        self.ingest.garbage_bytes += self.parser.garbage_bytes
+        Logger.info(f"DTU 已断开: {self.name}，收到 {self.bytes_received} 字节" + (f"（{exc}）" if exc else ""))
+
+    def resume(self):
+        self.paused = False
+        self.transport.resume_reading()
+
+
+class UdpFrameProtocol(asyncio.DatagramProtocol):
+    """UDP 接收：按来源地址各用一个 FrameParser，来源过多时淘汰最久未活动的"""
+
+    def __init__(self, ingest, max_peers=4096):
+        self.ingest = ingest
+        self.max_peers = max_peers
+        self.parsers = OrderedDict()
+
+    def datagram_received(self, data, addr):
+        parser = self.parsers.get(addr)
+        if parser is None:
+            if len(self.parsers) >= self.max_peers:
+                _, oldest = self.parsers.popitem(last=False)
+                self.ingest.garbage_bytes += oldest.garbage_bytes
+            parser = self.parsers[addr] = FrameParser(self.ingest.buffer_size, name=f"udp {addr[0]}:{addr[1]}")
+        else:
+            self.parsers.move_to_end(addr)
+        self.ingest.feed(parser, data, 'udp')
+
+    def error_received(self, exc):
+        Logger.error(f"UDP 接收出错: {exc}")
+
+
+class NetworkIngest:
+    """asyncio 网络接收：同时接受大量 DTU 的 TCP 连接（可选 UDP），与串口共用帧解析和日志路径
+
+    on_frames(source, frames) 在事件循环线程中调用，frames 为 memoryview，仅在回调内有效，
+    与 SerialReader 的 on_frames 约定相同。backlog() 返回下游积压量（默认为接收日志管道的队列长度），
+    超过 high_water 时暂停对应连接的读取，降到 low_water 以下后恢复。
+    """
+
+    def __init__(self, on_frames, host='0.0.0.0', tcp_port=9000, udp_port=None, backlog=None,
+                 high_water=50000, low_water=10000, max_connections=10000, buffer_size=16384):
+        self.on_frames = on_frames
+        self.host = host
+        self.tcp_port = tcp_port
+        self.udp_port = udp_port
+        self.backlog = backlog or self.pipeline_backlog
+        self.high_water = high_water
+        self.low_water = low_water
+        self.max_connections = max_connections
+        self.buffer_size = buffer_size
+        self.connections = set()
+        self.paused = set()
+        self.accepted = 0
+        self.bytes_received = 0
+        self.frames = 0
+        self.garbage_bytes = 0
+        self.pause_events = 0
+        self._server = None
+        self._udp_transport = None
+        self._watcher = None
+
+    @staticmethod
+    def pipeline_backlog():
+        pipeline = Logger.receive_pipeline
+        return pipeline.depth() if pipeline is not None else 0
+
+    def feed(self, parser, data, proto):
+        """把收到的数据交给连接自己的解析器；一次收到的数据可能远大于缓冲区，分段喂入"""
+        self.bytes_received += len(data)
+        if METRICS.enabled:
+            METRICS.incr('bytes_received', len(data), port=proto)
+        view = memoryview(data)
+        step = self.buffer_size // 2
+        for start in range(0, len(view), step):
+            frames = parser.feed(view[start:start + step])
+            if not frames:
+                continue
+            self.frames += len(frames)
+            if METRICS.enabled:
+                METRICS.incr('frames_received', len(frames), port=proto)
+            try:
+                self.on_frames(parser.name, frames)
+            except Exception as e:
+                Logger.error(f"处理 {parser.name} 数据时出错: {e}")
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self.tcp_port is not None:
+            self._server = await loop.create_server(lambda: TcpFrameProtocol(self), self.host, self.tcp_port,
+                                                    backlog=1024, reuse_address=True)
+            self.tcp_port = self._server.sockets[0].getsockname()[1]
+            Logger.info(f"TCP 监听 {self.host}:{self.tcp_port}")
+        if self.udp_port is not None:
+            self._udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: UdpFrameProtocol(self), local_addr=(self.host, self.udp_port))
+            self.udp_port = self._udp_transport.get_extra_info('sockname')[1]
+            Logger.info(f"UDP 监听 {self.host}:{self.udp_port}")
+        METRICS.register_gauge('network_connections', lambda: len(self.connections))
+        self._watcher = asyncio.create_task(self._watch_backlog())
+
+    async def _watch_backlog(self):
+        """积压回落后恢复被暂停的连接"""
+        while True:
+            await asyncio.sleep(0.05)
+            if self.paused and self.backlog() < self.low_water:
+                for protocol in list(self.paused):
+                    protocol.resume()
+                self.paused.clear()
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+        if self._server is not None:
+            self._server.close()
+            for protocol in list(self.connections):
+                protocol.transport.close()
+            await self._server.wait_closed()
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+        METRICS.unregister_gauge('network_connections')
+
+    def stats(self):
+        return {
+            'connections': len(self.connections),
+            'accepted': self.accepted,
+            'paused': len(self.paused),
+            'pause_events': self.pause_events,
+            'bytes_received': self.bytes_received,
+            'frames': self.frames,
+            'garbage_bytes': self.garbage_bytes + sum(p.parser.garbage_bytes for p in self.connections),
+        }
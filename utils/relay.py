@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+
+from utils.hex_codec import LazyHex
+from utils.logger import Logger
+from utils.metrics import LatencyHistogram, METRICS
+
+BLOCK = 'block'
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+
+
+class RelayWriter:
+    """串口转发的写线程：读线程只入队，写线程把积压的小块合并后一次写出
+
+    队列满时的策略：
+      block        读线程最多等待 block_timeout 秒，仍然满则丢弃本块
+      drop_newest  丢弃新到的数据块
+      drop_oldest  丢弃最旧的数据块，为新数据腾出空间
+    """
+
+    def __init__(self, port, name='COM4', max_queue=1024, policy=DROP_OLDEST,
+                 max_batch_bytes=4096, block_timeout=0.1):
+        if policy not in (BLOCK, DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"未知的队列策略: {policy}")
+        self.port = port
+        self.name = name
+        self.max_queue = max_queue
+        self.policy = policy
+        self.max_batch_bytes = max_batch_bytes
+        self.block_timeout = block_timeout
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.written_bytes = 0
+        self.write_calls = 0
+        self.errors = 0
+        self.queue_wait = LatencyHistogram('排队等待')
+        self.write_time = LatencyHistogram('串口写入')
+        self.end_to_end = LatencyHistogram('入队到写完')
+
+    def start(self):
+        self._running = True
+        METRICS.register_gauge('forward_queue_depth', lambda: len(self._queue), port=self.name)
+        self._thread = threading.Thread(target=self._run, name=f"relay-{self.name}", daemon=True)
+        self._thread.start()
+
+    def put(self, data):
+        """读线程调用：入队一块数据，返回是否被接收"""
+        item = (time.perf_counter(), bytes(data))
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                if self.policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                    if METRICS.enabled:
+                        METRICS.incr('forward_dropped', port=self.name)
+                elif self.policy == DROP_NEWEST or not self._cond.wait_for(
+                        lambda: len(self._queue) < self.max_queue or not self._running, self.block_timeout):
+                    self.dropped += 1
+                    if METRICS.enabled:
+                        METRICS.incr('forward_dropped', port=self.name)
+                    return False
+            self._queue.append(item)
+            self.enqueued += 1
+            self._cond.notify_all()
+        return True
+
+    def _take_batch(self):
+        """取出若干块，总长度不超过 max_batch_bytes（至少一块）"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or not self._running)
+            batch = []
+            size = 0
+            while self._queue and (not batch or size + len(self._queue[0][1]) <= self.max_batch_bytes):
+                item = self._queue.popleft()
+                batch.append(item)
+                size += len(item[1])
+            self._cond.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if not self._running:
+                    break
+                continue
+            dequeued_at = time.perf_counter()
+            for enqueued_at, _ in batch:
+                self.queue_wait.record(dequeued_at - enqueued_at)
+
+            chunk = b''.join(data for _, data in batch)
+            try:
+                self.port.write(chunk)
+                self.write_calls += 1
+                self.written_bytes += len(chunk)
+                Logger.debug("发送到 %s 的数据: %s", self.name, LazyHex(chunk))
+            except Exception as e:
+                self.errors += 1
+                Logger.error(f"发送数据到 {self.name} 时出错: {e}")
+                if METRICS.enabled:
+                    METRICS.incr('errors', kind='forward', port=self.name)
+            done_at = time.perf_counter()
+            self.write_time.record(done_at - dequeued_at)
+            for enqueued_at, _ in batch:
+                self.end_to_end.record(done_at - enqueued_at)
+            if METRICS.enabled:
+                METRICS.incr('forwarded_bytes', len(chunk), port=self.name)
+                for enqueued_at, _ in batch:
+                    METRICS.observe('forward_seconds', done_at - enqueued_at, port=self.name)
+
+    def stop(self, timeout=2.0):
+        """停止写线程，队列中剩余的数据会先写完"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        METRICS.unregister_gauge('forward_queue_depth', port=self.name)
+
+    def report(self):
+        Logger.info(f"{self.name} 转发统计：入队 {self.enqueued} 块，丢弃 {self.dropped} 块，"
+                    f"{self.write_calls} 次写入共 {self.written_bytes} 字节，错误 {self.errors} 次")
+        for histogram in (self.queue_wait, self.write_time, self.end_to_end):
+            Logger.info(f"{self.name} {histogram.summary()}")
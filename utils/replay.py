@@ -0,0 +1,125 @@
+import math
+import threading
+import time
+from array import array
+
+import serial
+
+from utils.logger import Logger
+
+
+def percentile(values, fraction):
+    """已排序序列的百分位数（最近秩）"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+
+class ReplayEngine:
+    """按节奏回放帧序列
+
+    所有帧在构造时一次性拼接成一个 bytes，回放时只做切片写出。
+    发送时刻基于单调时钟计算（第 i 帧的目标时刻 = 起始时刻 + 偏移），不会累积漂移；
+    落后于计划时把所有已到期的帧合并成一次 write。
+      rate=N           每秒 N 帧
+      rate=None        不限速，按波特率能写多快就写多快
+      timestamps=[...] 按原始采集时间间隔回放（单位：秒，可乘以 speed 加速）
+    """
+
+    def __init__(self, frames, rate=None, timestamps=None, speed=1.0, max_batch=64):
+        self.payload = b''.join(frames)
+        self.offsets = array('q', [0])
+        for frame in frames:
+            self.offsets.append(self.offsets[-1] + len(frame))
+        self.count = len(frames)
+        self.rate = rate
+        self.max_batch = max_batch
+        if timestamps is not None:
+            base = timestamps[0] if timestamps else 0.0
+            self.schedule = array('d', ((ts - base) / speed for ts in timestamps))
+        elif rate:
+            self.schedule = array('d', (i / rate for i in range(self.count)))
+        else:
+            self.schedule = None
+        self.lateness = array('d')
+        self.sent = 0
+        self.write_calls = 0
+        self.elapsed = 0.0
+        self.failed_ports = []
+
+    def run(self, *ports, stop_event=None):
+        """把所有帧写到给定串口（可以是多个），返回统计信息
+
+        某个串口写入出错（例如 USB 串口被拔出）时记录错误并停止向它发送，其余串口继续；全部出错时提前结束。
+        """
+        stop_event = stop_event or threading.Event()
+        ports = list(ports)
+        payload = memoryview(self.payload)
+        offsets, schedule = self.offsets, self.schedule
+        sent = 0
+        start = time.monotonic()
+        while sent < self.count and ports and not stop_event.is_set():
+            now = time.monotonic() - start
+            if schedule is None:
+                due = min(sent + self.max_batch, self.count)
+            else:
+                due = sent
+                limit = min(sent + self.max_batch, self.count)
+                while due < limit and schedule[due] <= now:
+                    due += 1
+                if due == sent:
+                    stop_event.wait(schedule[sent] - now)
+                    continue
+                for i in range(sent, due):
+                    self.lateness.append(now - schedule[i])
+
+            chunk = payload[offsets[sent]:offsets[due]]
+            for port in list(ports):
+                try:
+                    port.write(chunk)
+                except serial.SerialException as e:
+                    name = getattr(port, 'port', None) or repr(port)
+                    Logger.error(f"回放写入串口 {name} 出错，停止向该串口发送: {e}")
+                    ports.remove(port)
+                    self.failed_ports.append(name)
+            if not ports:
+                break
+            self.write_calls += 1
+            sent = due
+        self.elapsed = time.monotonic() - start
+        self.sent = sent
+        return self.stats()
+
+    def stats(self):
+        sent = self.sent
+        if self.schedule is not None and self.count > 1:
+            span = self.schedule[self.count - 1]
+            target_rate = (self.count - 1) / span if span > 0 else None
+        else:
+            target_rate = None
+        lateness = sorted(self.lateness)
+        mean = sum(lateness) / len(lateness) if lateness else 0.0
+        jitter = math.sqrt(sum((x - mean) ** 2 for x in lateness) / len(lateness)) if lateness else 0.0
+        return {
+            'frames': sent,
+            'bytes': self.offsets[sent],
+            'write_calls': self.write_calls,
+            'elapsed_s': self.elapsed,
+            'target_rate': target_rate,
+            'achieved_rate': (sent - 1) / self.elapsed if sent > 1 and self.elapsed > 0 else None,
+            'lateness_mean_ms': mean * 1000,
+            'lateness_p50_ms': percentile(lateness, 0.50) * 1000,
+            'lateness_p99_ms': percentile(lateness, 0.99) * 1000,
+            'lateness_max_ms': (lateness[-1] if lateness else 0.0) * 1000,
+            'jitter_ms': jitter * 1000,
+            'failed_ports': list(self.failed_ports),
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        target = f"{s['target_rate']:.2f}" if s['target_rate'] else "不限"
+        achieved = f"{s['achieved_rate']:.2f}" if s['achieved_rate'] else "-"
+        return (f"发送 {s['frames']} 帧 / {s['bytes']} 字节，{s['write_calls']} 次写入，用时 {s['elapsed_s']:.2f}s，"
+                f"目标 {target} 帧/s，实际 {achieved} 帧/s，"
+                f"延迟 p50 {s['lateness_p50_ms']:.2f}ms p99 {s['lateness_p99_ms']:.2f}ms，抖动 {s['jitter_ms']:.2f}ms"
+                + (f"，写入出错的串口 {', '.join(s['failed_ports'])}" if s['failed_ports'] else ""))
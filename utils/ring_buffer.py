@@ -0,0 +1,150 @@
+DROP_OLDEST = 'drop_oldest'
+BACKPRESSURE = 'backpressure'
+
+
+class RingBuffer:
+    """定长环形字节缓冲区，底层为 bytearray + memoryview
+
+    写入方可以通过 readinto 直接把串口数据读进空闲区域，读出方通过 peek 拿到
+    memoryview 切片，只有跨越缓冲区末尾的数据才会拷贝到临时区。
+    溢出策略：
+      drop_oldest  丢弃最旧的数据为新数据腾出空间（计入 overruns）
+      backpressure 只接收空闲空间能容纳的部分，剩余数据留在调用方/串口驱动中
+    """
+
+    def __init__(self, capacity, overflow=DROP_OLDEST, scratch_size=256):
+        if overflow not in (DROP_OLDEST, BACKPRESSURE):
+            raise ValueError(f"未知的溢出策略: {overflow}")
+        self.capacity = capacity
+        self.overflow = overflow
+        self._data = bytearray(capacity)
+        self._view = memoryview(self._data)
+        self._scratch = bytearray(scratch_size)
+        self._head = 0
+        self._size = 0
+        self.high_water = 0
+        self.overruns = 0
+        self.dropped_bytes = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def free(self):
+        return self.capacity - self._size
+
+    def _make_room(self, size):
+        """按溢出策略为 size 字节腾出空间，返回实际可写入的字节数"""
+        if size <= self.free:
+            return size
+        if self.overflow == BACKPRESSURE:
+            return self.free
+        size = min(size, self.capacity)
+        drop = size - self.free
+        if drop > 0:
+            self.overruns += 1
+            self.dropped_bytes += drop
+            self.consume(drop)
+        return size
+
+    def _commit(self, size):
+        self._size += size
+        if self._size > self.high_water:
+            self.high_water = self._size
+
+    def _free_segments(self, size):
+        """返回写入 size 字节所需的一段或两段空闲区域视图"""
+        tail = (self._head + self._size) % self.capacity
+        first = min(size, self.capacity - tail)
+        segments = [self._view[tail:tail + first]]
+        if first < size:
+            segments.append(self._view[:size - first])
+        return segments
+
+    def write(self, data):
+        """写入数据，返回实际写入的字节数"""
+        data = memoryview(data)
+        if len(data) > self.capacity and self.overflow == DROP_OLDEST:
+            # 只有最后 capacity 字节能留下
+            skipped = len(data) - self.capacity
+            self.overruns += 1
+            self.dropped_bytes += skipped
+            data = data[skipped:]
+        size = self._make_room(len(data))
+        offset = 0
+        for segment in self._free_segments(size):
+            segment[:] = data[offset:offset + len(segment)]
+            offset += len(segment)
+        self._commit(size)
+        return size
+
+    def readinto(self, stream, size=None):
+        """调用 stream.readinto 把数据直接读入空闲区域，返回读取的字节数"""
+        size = self._make_room(self.free if size is None else size)
+        total = 0
+        for segment in self._free_segments(size):
+            n = stream.readinto(segment) or 0
+            self._commit(n)
+            total += n
+            if n < len(segment):
+                break
+        return total
+
+    def __getitem__(self, index):
+        return self._data[(self._head + index) % self.capacity]
+
+    def find(self, sub, start=0):
+        """从逻辑偏移 start 开始查找 sub，返回逻辑偏移，未找到返回 -1"""
+        head, size, cap = self._head, self._size, self.capacity
+        if head + size <= cap:
+            pos = self._data.find(sub, head + start, head + size)
+            return pos - head if pos >= 0 else -1
+        # 数据跨越缓冲区末尾：分别查找两段，并检查拼接处
+        first_len = cap - head
+        if start < first_len:
+            pos = self._data.find(sub, head + start, cap)
+            if pos >= 0:
+                return pos - head
+            seam_start = max(start, first_len - len(sub) + 1)
+            for i in range(seam_start, min(first_len, size - len(sub) + 1)):
+                if all(self[i + k] == b for k, b in enumerate(sub)):
+                    return i
+            start = first_len
+        pos = self._data.find(sub, start - first_len, size - first_len)
+        return pos + first_len if pos >= 0 else -1
+
+    def peek(self, size, offset=0):
+        """返回逻辑区间 [offset, offset + size) 的 memoryview，不消费数据
+
+        返回的视图在下一次写入前有效；跨越末尾的数据会拷贝到内部临时区。
+        """
+        start = (self._head + offset) % self.capacity
+        if start + size <= self.capacity:
+            return self._view[start:start + size]
+        if size > len(self._scratch):
+            self._scratch = bytearray(size)
+        first = self.capacity - start
+        self._scratch[:first] = self._view[start:]
+        self._scratch[first:size] = self._view[:size - first]
+        return memoryview(self._scratch)[:size]
+
+    def consume(self, size):
+        """丢弃最前面的 size 字节"""
+        size = min(size, self._size)
+        self._head = (self._head + size) % self.capacity
+        self._size -= size
+        if self._size == 0:
+            self._head = 0
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'used': self._size,
+            'high_water': self.high_water,
+            'overruns': self.overruns,
+            'dropped_bytes': self.dropped_bytes,
+        }
@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+
+from utils.logger import Logger
+
+
+class Timer:
+    """Scheduler 返回的定时任务句柄"""
+
+    __slots__ = ('when', 'callback', 'args', 'cancelled')
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """单线程定时器：所有定时任务放在一个按单调时钟排序的最小堆里，由一个线程依次执行
+
+    取消任务只做标记，到期时跳过。回调在调度线程中执行，不应长时间阻塞。
+    """
+
+    def __init__(self, name='scheduler'):
+        self.name = name
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """停止调度线程，未到期的任务不再执行；可以在回调中调用"""
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def call_at(self, when, callback, *args):
+        """在单调时钟 when 时刻执行 callback(*args)"""
+        timer = Timer(when, callback, args)
+        with self._cond:
+            heapq.heappush(self._heap, (when, next(self._counter), timer))
+            self._cond.notify()
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def call_at_datetime(self, moment, callback, *args):
+        """在本地时间 moment（datetime）执行；换算为单调时钟，不受之后系统校时影响"""
+        return self.call_later(max(0.0, (moment - datetime.now()).total_seconds()), callback, *args)
+
+    def pending(self):
+        with self._cond:
+            return sum(1 for _, _, timer in self._heap if not timer.cancelled)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if not self._running:
+                    return
+                _, _, timer = heapq.heappop(self._heap)
+            if timer.cancelled:
+                continue
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                Logger.error(f"定时任务 {getattr(timer.callback, '__name__', timer.callback)} 执行出错: {e}")
+
+
+class CronSpec:
+    """五段式 cron 表达式：分 时 日 月 周，支持 *、a-b、a,b 和 /步长（周日为 0 或 7）"""
+
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expr):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 表达式需要 5 段: {expr!r}")
+        self.expr = expr
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self.RANGES))
+        self.weekdays = {day % 7 for day in self.weekdays}
+        # 与 cron 一致：日和周都有限制时，满足任意一个即可
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for part in field.split(','):
+            part, _, step = part.partition('/')
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(x) for x in part.split('-'))
+            else:
+                start = int(part)
+                end = high if step else start
+            if not low <= start <= end <= high:
+                raise ValueError(f"cron 字段超出范围: {field!r}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, moment):
+        weekday = moment.isoweekday() % 7
+        if self.any_day:
+            return weekday in self.weekdays
+        if self.any_weekday:
+            return moment.day in self.days
+        return moment.day in self.days or weekday in self.weekdays
+
+    def next_after(self, moment):
+        """严格晚于 moment 的下一个触发时刻"""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"cron 表达式没有可触发的时间: {self.expr!r}")
@@ -0,0 +1,160 @@
+from utils.logger import Logger
+
+SEQ_MODULUS = 1 << 32
+HALF_RANGE = 1 << 31
+
+OK = 'ok'
+GAP = 'gap'
+DUPLICATE = 'duplicate'
+REORDER = 'reorder'
+WRAP = 'wrap'
+RESET = 'reset'
+
+
+class StreamSequence:
+    """单个数据流的序号状态：当前最大序号和其之前 window 个序号的到达位图"""
+
+    __slots__ = ('highest', 'seen', 'received', 'missing', 'duplicates', 'reordered', 'wraps', 'resets')
+
+    def __init__(self, seq):
+        self.highest = seq
+        self.seen = 1
+        self.received = 1
+        self.missing = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.wraps = 0
+        self.resets = 0
+
+    def loss_rate(self):
+        expected = self.received + self.missing
+        return self.missing / expected if expected else 0.0
+
+
+class SequenceTracker:
+    """按数据流在线检测 4 字节数据编号的丢包、重复、乱序和回绕，每帧常数时间
+
+    数据编号由网关按端口统一递增，同一端口上的所有设备共用一个计数器，
+    因此按数据流（端口、网络连接或日志文件）而不是按设备判定；每个设备的帧数另行统计。
+    序号按 2^32 取模比较：向前跳跃视为丢包（跨过 0xFFFFFFFF 时计一次回绕），
+    落后 window 以内时用位图区分重复和迟到的乱序帧（迟到帧会冲减之前记的丢包），
+    落后超过 reset_threshold 时视为网关重启、序号重新开始。
+    丢包、重复、乱序、重启时调用 on_event(事件字典)。
+    """
+
+    def __init__(self, on_event=None, window=64, reset_threshold=1024):
+        self.on_event = on_event
+        self.window = window
+        self.reset_threshold = reset_threshold
+        self._mask = (1 << window) - 1
+        self._streams = {}
+        self.device_frames = {}
+
+    def observe(self, stream, seq, device_id=None):
+        """记录数据流 stream 上一帧的序号，返回事件类型；device_id 只用于按设备计数和事件信息"""
+        if device_id is not None:
+            self.device_frames[device_id] = self.device_frames.get(device_id, 0) + 1
+        state = self._streams.get(stream)
+        if state is None:
+            self._streams[stream] = StreamSequence(seq)
+            return OK
+
+        delta = (seq - state.highest) % SEQ_MODULUS
+        if delta == 0:
+            state.duplicates += 1
+            return self._emit(DUPLICATE, stream, device_id, seq, state)
+
+        if delta < HALF_RANGE:
+            # 向前：中间跳过的序号都记为丢失
+            wrapped = seq < state.highest
+            state.seen = ((state.seen << delta) | 1) & self._mask if delta < self.window else 1
+            state.highest = seq
+            state.received += 1
+            if wrapped:
+                state.wraps += 1
+            if delta > 1:
+                state.missing += delta - 1
+                return self._emit(GAP, stream, device_id, seq, state, lost=delta - 1)
+            return WRAP if wrapped else OK
+
+        back = SEQ_MODULUS - delta
+        if back >= self.reset_threshold:
+            # 序号大幅回退，视为网关重启
+            state.highest = seq
+            state.seen = 1
+            state.received += 1
+            state.resets += 1
+            return self._emit(RESET, stream, device_id, seq, state)
+
+        if back < self.window:
+            bit = 1 << back
+            if state.seen & bit:
+                state.duplicates += 1
+                return self._emit(DUPLICATE, stream, device_id, seq, state)
+            state.seen |= bit
+        # 迟到的帧：之前已按丢失计数，这里冲减（超出位图范围时无法区分重复，按迟到处理）
+        state.received += 1
+        state.reordered += 1
+        if state.missing:
+            state.missing -= 1
+        return self._emit(REORDER, stream, device_id, seq, state)
+
+    def _emit(self, kind, stream, device_id, seq, state, **extra):
+        if self.on_event is not None:
+            event = {'type': kind, 'stream': stream, 'device_id': device_id, 'seq': seq, 'highest': state.highest}
+            event.update(extra)
+            self.on_event(event)
+        return kind
+
+    def stats(self, stream):
+        state = self._streams.get(stream)
+        if state is None:
+            return None
+        return {
+            'highest': state.highest,
+            'received': state.received,
+            'missing': state.missing,
+            'duplicates': state.duplicates,
+            'reordered': state.reordered,
+            'wraps': state.wraps,
+            'resets': state.resets,
+            'loss_rate': state.loss_rate(),
+        }
+
+    def snapshot(self, stream):
+        """数据流当前的判定状态 (最大序号, 到达位图)，用于把分块统计的结果衔接起来"""
+        state = self._streams.get(stream)
+        return None if state is None else (state.highest, state.seen)
+
+    def restore(self, stream, snapshot, missing=0):
+        """以 snapshot 为判定状态重新开始统计该数据流；除已记丢包数 missing 外计数清零"""
+        state = StreamSequence(snapshot[0])
+        state.seen = snapshot[1]
+        state.received = 0
+        state.missing = missing
+        self._streams[stream] = state
+
+    def streams(self):
+        return sorted(self._streams, key=str)
+
+    def devices(self):
+        """出现过的设备编号，各自的帧数见 device_frames"""
+        return sorted(self.device_frames)
+
+    def totals(self):
+        """所有数据流的汇总计数"""
+        totals = {'received': 0, 'missing': 0, 'duplicates': 0, 'reordered': 0, 'wraps': 0, 'resets': 0}
+        for state in self._streams.values():
+            for key in totals:
+                totals[key] += getattr(state, key)
+        expected = totals['received'] + totals['missing']
+        totals['loss_rate'] = totals['missing'] / expected if expected else 0.0
+        return totals
+
+
+def log_sequence_event(event):
+    """通用的 on_event：数据编号异常写入告警日志"""
+    if event['type'] == GAP:
+        Logger.warning(f"{event['stream']} 丢失 {event['lost']} 帧（设备 {event['device_id']}，收到编号 {event['seq']}）")
+    else:
+        Logger.warning(f"{event['stream']} 数据编号异常 {event['type']}：{event['seq']}（设备 {event['device_id']}）")
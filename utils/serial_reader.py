@@ -0,0 +1,141 @@
+import threading
+import time
+
+from utils.logger import Logger
+from utils.metrics import METRICS
+
+
+class SerialReader:
+    """事件驱动的串口读线程：阻塞读 + 超时，替代 in_waiting 忙等轮询
+
+    传入 parser 时数据通过 readinto 直接读入解析器的环形缓冲区，
+    解析出的帧交给 on_frames；否则每次读到的原始数据交给 on_data。
+    """
+
+    def __init__(self, serial_port, on_data=None, name=None, chunk_size=4096, parser=None, on_frames=None):
+        self.serial_port = serial_port
+        self.on_data = on_data
+        self.parser = parser
+        self.on_frames = on_frames
+        self.name = name or getattr(serial_port, 'port', None) or 'serial'
+        if parser is not None and parser.name is None:
+            parser.name = self.name
+        self.chunk_size = chunk_size
+        self._stop_event = threading.Event()
+        self._thread = None
+        # 统计信息，仅由读线程写入
+        self.bytes_received = 0
+        self.read_calls = 0
+        self.cpu_seconds = 0.0
+        self.started_at = None
+        self.stopped_at = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动读线程"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name=f"reader-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0, drain=False):
+        """发出停止信号并等待读线程退出；drain 为 True 时再取走串口缓冲区中剩余的数据"""
+        self._stop_event.set()
+        # POSIX 下可以直接打断阻塞中的 read，其它平台最多等待一个串口超时周期
+        cancel_read = getattr(self.serial_port, 'cancel_read', None)
+        if cancel_read is not None:
+            try:
+                cancel_read()
+            except Exception:
+                pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            if drain and not self._thread.is_alive():
+                self.drain()
+
+    def drain(self):
+        """读线程退出后调用：把串口缓冲区中已到达的数据全部读出并交给回调，避免关闭串口时丢失"""
+        port = self.serial_port
+        try:
+            while port.is_open and port.in_waiting:
+                size = min(port.in_waiting, self.chunk_size)
+                if self.parser is not None:
+                    count, frames = self.parser.fill_from(port, size)
+                    if frames:
+                        self.on_frames(frames)
+                else:
+                    data = port.read(size)
+                    count = len(data)
+                    if data:
+                        self.on_data(data)
+                if not count:
+                    break
+                self.bytes_received += count
+        except Exception as e:
+            Logger.error(f"读取串口 {self.name} 剩余数据时出错: {e}")
+
+    def run(self):
+        """读循环：至少阻塞等待 1 个字节，随后一次取走缓冲区中已有的全部数据"""
+        self.started_at = time.monotonic()
+        cpu_start = time.thread_time()
+        port = self.serial_port
+        parser = self.parser
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    size = min(max(1, port.in_waiting), self.chunk_size)
+                    if parser is not None:
+                        count, frames = parser.fill_from(port, size)
+                    else:
+                        data = port.read(size)
+                        count = len(data)
+                except Exception as e:
+                    if not self._stop_event.is_set():
+                        Logger.error(f"读取串口 {self.name} 数据时出错: {e}")
+                        if METRICS.enabled:
+                            METRICS.incr('errors', kind='read', port=self.name)
+                    break
+
+                self.cpu_seconds = time.thread_time() - cpu_start
+                if not count:
+                    continue
+                self.read_calls += 1
+                self.bytes_received += count
+                if METRICS.enabled:
+                    METRICS.incr('bytes_received', count, port=self.name)
+                    METRICS.observe('read_size_bytes', count, scale=1, port=self.name)
+                    if parser is not None:
+                        METRICS.incr('frames_received', len(frames), port=self.name)
+                try:
+                    if parser is None:
+                        self.on_data(data)
+                    elif frames:
+                        self.on_frames(frames)
+                except Exception as e:
+                    Logger.error(f"处理串口 {self.name} 数据时出错: {e}")
+                    if METRICS.enabled:
+                        METRICS.incr('errors', kind='handler', port=self.name)
+        finally:
+            self.cpu_seconds = time.thread_time() - cpu_start
+            self.stopped_at = time.monotonic()
+            Logger.info(f"串口 {self.name} 读线程已退出，{self.format_stats()}")
+
+    def stats(self):
+        """返回读线程的吞吐与 CPU 占用统计"""
+        end = self.stopped_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            'port': self.name,
+            'bytes': self.bytes_received,
+            'reads': self.read_calls,
+            'elapsed_s': elapsed,
+            'cpu_s': self.cpu_seconds,
+            'cpu_percent': 100.0 * self.cpu_seconds / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"接收 {s['bytes']} 字节 / {s['reads']} 次读取，"
+                f"运行 {s['elapsed_s']:.1f}s，CPU {s['cpu_s']:.3f}s ({s['cpu_percent']:.2f}%)")
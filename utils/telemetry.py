@@ -0,0 +1,125 @@
+import threading
+import time
+from array import array
+
+from utils.frame_decoder import decode_frame
+from utils.sequence_tracker import SequenceTracker
+
+FIELDS = ('voltage', 'temperature', 'data1', 'data2', 'data3', 'data4')
+
+
+class DeviceSeries:
+    """单个设备最近 capacity 帧的定长环形存储，每个字段一个 array('d')"""
+
+    def __init__(self, device_id, capacity):
+        self.device_id = device_id
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.values = {name: array('d', bytes(8 * capacity)) for name in FIELDS}
+        self.next = 0
+        self.size = 0
+        self.frames = 0
+        self.latest = None
+        self.latest_time = None
+
+    def append(self, ts, frame):
+        i = self.next
+        self.times[i] = ts
+        values = self.values
+        values['voltage'][i] = frame.voltage
+        values['temperature'][i] = frame.temperature
+        for name, value in zip(FIELDS[2:], frame.channels):
+            values[name][i] = value
+        self.next = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+        self.frames += 1
+        self.latest = frame
+        self.latest_time = ts
+
+    def recent(self, field, since):
+        """从新到旧产出 since 之后的 (时间, 值)"""
+        times = self.times
+        values = self.values[field]
+        i = self.next
+        for _ in range(self.size):
+            i = (i - 1) % self.capacity
+            if times[i] < since:
+                break
+            yield times[i], values[i]
+
+
+class TelemetryStore:
+    """按设备编号组织的内存遥测存储
+
+    每个设备保存最新一帧和最近 capacity 帧的环形窗口，总内存只与设备数和 capacity 有关。
+    latest() 为一次字典查找；窗口统计只遍历时间窗口内的帧。
+    数据编号按帧所在的数据流（端口、连接）交给 SequenceTracker 检测丢包、重复和乱序。
+    """
+
+    def __init__(self, capacity=1024, sequences=None):
+        self.capacity = capacity
+        self.sequences = sequences if sequences is not None else SequenceTracker()
+        self._devices = {}
+        self._lock = threading.Lock()
+        self.invalid_frames = 0
+
+    def add(self, frame, ts=None, stream=None):
+        """在读线程中调用：解码并记录一帧，返回解码结果（格式不正确时为 None）
+
+        stream 为帧所在的数据流（如端口名），数据编号在同一数据流内连续。
+        """
+        decoded = decode_frame(frame)
+        if decoded is None:
+            self.invalid_frames += 1
+            return None
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            series = self._devices.get(decoded.device_id)
+            if series is None:
+                series = self._devices[decoded.device_id] = DeviceSeries(decoded.device_id, self.capacity)
+            series.append(ts, decoded)
+            self.sequences.observe(stream, decoded.seq, decoded.device_id)
+        return decoded
+
+    def devices(self):
+        return sorted(self._devices)
+
+    def latest(self, device_id):
+        """最新一帧的字段值，设备不存在时返回 None"""
+        series = self._devices.get(device_id)
+        if series is None or series.latest is None:
+            return None
+        frame = series.latest
+        return {
+            'device_id': device_id,
+            'received_at': series.latest_time,
+            'seq': frame.seq,
+            'timestamp': frame.timestamp,
+            'voltage': frame.voltage,
+            'temperature': frame.temperature,
+            'channels': frame.channels,
+        }
+
+    def window_stats(self, device_id, field, seconds, now=None):
+        """最近 seconds 秒内某个字段的 min/max/mean，窗口内没有数据时返回 None"""
+        series = self._devices.get(device_id)
+        if series is None:
+            return None
+        since = (time.time() if now is None else now) - seconds
+        with self._lock:
+            values = [value for _, value in series.recent(field, since)]
+        if not values:
+            return None
+        return {'count': len(values), 'min': min(values), 'max': max(values), 'mean': sum(values) / len(values)}
+
+    def gap_count(self, stream=None):
+        """数据流当前记为丢失的帧数，stream 为 None 时为所有数据流之和"""
+        if stream is None:
+            return self.sequences.totals()['missing']
+        stats = self.sequences.stats(stream)
+        return stats['missing'] if stats else 0
+
+    def snapshot(self):
+        """所有设备的最新值，供看板一次取走"""
+        return {device_id: self.latest(device_id) for device_id in self.devices()}